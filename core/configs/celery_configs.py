@@ -15,3 +15,23 @@ task_serializer = 'pickle'
 result_serializer = 'json'
 accept_content = ['json', 'json', 'pickle']
 result_expire = timedelta(minutes=5)
+
+beat_schedule = {
+    'sync-campaigns': {
+        'task': 'gse.products.tasks.sync_campaigns',
+        'schedule': timedelta(minutes=1),
+    },
+    # picks up media deletions whose flush gave up retrying.
+    'flush-media-deletions': {
+        'task': 'gse.products.tasks.delete_media_files',
+        'schedule': timedelta(minutes=30),
+    },
+    'update-co-purchases': {
+        'task': 'gse.products.tasks.update_co_purchases',
+        'schedule': timedelta(hours=1),
+    },
+    'expire-product-rankings': {
+        'task': 'gse.products.tasks.expire_rankings',
+        'schedule': timedelta(hours=1),
+    },
+}
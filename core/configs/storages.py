@@ -2,7 +2,7 @@ from decouple import config
 
 STORAGES = {
     "default": {
-        "BACKEND": "storages.backends.s3.S3Storage",
+        "BACKEND": "gse.utils.storages.SharedS3Storage",
         "OPTIONS": {
         },
     },
@@ -12,10 +12,18 @@ STORAGES = {
         },
     },
 }
-DATA_UPLOAD_MAX_MEMORY_SIZE = 500 * 1024 * 1024
+# files are streamed to disk by the upload handlers, this only bounds the other parts of a request body.
+DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
 AWS_S3_ACCESS_KEY_ID = config('AWS_S3_ACCESS_KEY_ID')
 AWS_SECRET_ACCESS_KEY = config('AWS_SECRET_ACCESS_KEY')
 AWS_S3_ENDPOINT_URL = config('AWS_S3_ENDPOINT_URL')
 AWS_STORAGE_BUCKET_NAME = config('AWS_STORAGE_BUCKET_NAME')
 AWS_SERVICE_NAME = config('AWS_SERVICE_NAME')
 AWS_S3_FILE_OVERWRITE = False
+# base url of a cdn or a public bucket serving product media, their urls are then built without signing.
+PRODUCT_MEDIA_PUBLIC_URL = config('PRODUCT_MEDIA_PUBLIC_URL', default='')
+# botocore client of `gse.utils.storages.get_s3_resource`, shared by the storage and `Bucket`.
+AWS_S3_MAX_POOL_CONNECTIONS = config('AWS_S3_MAX_POOL_CONNECTIONS', default=20, cast=int)
+AWS_S3_CONNECT_TIMEOUT = config('AWS_S3_CONNECT_TIMEOUT', default=5, cast=int)
+AWS_S3_READ_TIMEOUT = config('AWS_S3_READ_TIMEOUT', default=60, cast=int)
+AWS_S3_MAX_ATTEMPTS = config('AWS_S3_MAX_ATTEMPTS', default=5, cast=int)
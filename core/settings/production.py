@@ -23,7 +23,7 @@ DATABASES = {
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.redis.RedisCache",
-        "LOCATION": config('REDIS_LOCATION', default="redis://127.0.0.1:6379"),
+        "LOCATION": REDIS_LOCATION,
     }
 }
 
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 
+from gse.products.selectors import primary_image_prefetch
 from .models import Cart, CartItem
 
 User = get_user_model()
@@ -30,3 +31,10 @@ def get_cart_by_owner(owner: User) -> Cart | None:
 
 def get_cart_by_item_id(item_id: int) -> Cart | None:
     return Cart.objects.filter(items__id=item_id).first()
+
+
+def get_cart_with_products_by_owner(owner: User) -> Cart | None:
+    return Cart.objects.select_related('owner') \
+        .prefetch_related('items__product__category', primary_image_prefetch('items__product__media')) \
+        .filter(owner=owner) \
+        .first()
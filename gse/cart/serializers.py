@@ -1,19 +1,24 @@
 from rest_framework import serializers
 
+from gse.products.media_urls import MediaUrlsListSerializer, MediaUrlsMixin
 from gse.products.serializers import ProductListSerializer
 from .models import Cart, CartItem
 
 
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(MediaUrlsMixin, serializers.ModelSerializer):
     product = ProductListSerializer(read_only=True)
     total_price = serializers.SerializerMethodField()
 
     def get_total_price(self, obj) -> int:
         return obj.get_total_price()
 
+    def get_media_names(self, obj) -> list[str]:
+        return self.fields['product'].get_media_names(obj.product)
+
     class Meta:
         model = CartItem
         exclude = ('cart',)
+        list_serializer_class = MediaUrlsListSerializer
 
 
 class CartSerializer(serializers.ModelSerializer):
@@ -14,7 +14,8 @@ from .selectors import (
     get_all_carts,
     get_all_cart_items,
     get_cart_by_item_id,
-    get_cart_item_by_id
+    get_cart_item_by_id,
+    get_cart_with_products_by_owner
 )
 from .serializers import CartSerializer, CartItemAddSerializer, CartItemSerializer
 from .services import add_cart_item
@@ -30,7 +31,11 @@ class CartRetrieveAPI(RetrieveAPIView):
     permission_classes = [IsAdminOrOwner]
 
     def get_object(self):
-        return self.request.user.cart
+        cart = get_cart_with_products_by_owner(owner=self.request.user)
+        if cart is None:
+            raise Http404('سبد خرید پیدا نشد.')
+        self.check_object_permissions(self.request, cart)
+        return cart
 
     def get(self, request, *args, **kwargs):
         response = super().get(request, *args, **kwargs)
@@ -8,6 +8,7 @@ from rest_framework.response import Response
 
 from gse.products.models import Product
 from gse.utils import is_child_of, format_errors
+from gse.utils.counters import CachedCount, EstimatedCount
 from gse.utils.doc_serializers import ResponseSerializer
 from gse.utils.permissions import IsAdminOrOwner, IsAdminOrSupporter
 from .models import Question, Answer
@@ -25,6 +26,7 @@ class QuestionListAPI(ListAPIView):
     permission_classes = [IsAdminOrSupporter]
     queryset = get_all_questions()
     filterset_fields = ['status']
+    count_strategy = EstimatedCount(fallback=CachedCount(timeout=30))
 
 
 @extend_schema(tags=['FAQ'])
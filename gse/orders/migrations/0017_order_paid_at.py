@@ -0,0 +1,24 @@
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_paid_at(apps, schema_editor):
+    # the last update of a successful order is the closest known time of its payment.
+    Order = apps.get_model('orders', 'Order')
+    Order.objects.filter(status='success').update(paid_at=F('updated_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0016_order_status_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='paid_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_paid_at, migrations.RunPython.noop),
+    ]
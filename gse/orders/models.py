@@ -3,10 +3,11 @@ from decimal import Decimal
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator
 from django.db import models
+from django.utils import timezone
 
 from gse.products.models import Product
 from gse.users.models import User
-from .choices import ORDER_STATUS_CHOICES, ORDER_STATUS_PENDING
+from .choices import ORDER_STATUS_CHOICES, ORDER_STATUS_PENDING, ORDER_STATUS_SUCCESS
 
 
 class Order(models.Model):
@@ -26,9 +27,37 @@ class Order(models.Model):
         null=True,
         db_index=True
     )
+    # set once, the first time the order is saved as successful.
+    paid_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
     created_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_stored_status()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.remember_stored_status()
+
+    def remember_stored_status(self):
+        """
+        Keeps the status as it is in the database, so saves can tell a status change without reading it again.
+        It stays None for new orders and orders loaded without their status.
+        """
+        self._stored_status = self.__dict__.get('status')
+
+    def save(self, *args, **kwargs):
+        if self.status == ORDER_STATUS_SUCCESS and self.paid_at is None:
+            self.paid_at = timezone.now()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'paid_at'}
+        super().save(*args, **kwargs)
+        if kwargs.get('update_fields') is None or 'status' in kwargs['update_fields']:
+            self.remember_stored_status()
+
     def remove_if_no_item(self):
         items_count = self.items.count()
         if items_count == 0:
@@ -46,6 +75,10 @@ class Order(models.Model):
 
     class Meta:
         ordering = ('-updated_date',)
+        indexes = [
+            # successful orders in id order, read by the co-purchase job.
+            models.Index(fields=['status', 'id'], name='order_status_id_idx'),
+        ]
 
 
 class OrderItem(models.Model):
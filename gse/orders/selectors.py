@@ -3,6 +3,7 @@ from datetime import datetime
 from pytz import timezone
 
 from gse.products.models import Product
+from gse.products.selectors import primary_image_prefetch
 from gse.users.choices import USER_ROLE_ADMIN, USER_ROLE_SUPPORT
 from gse.users.models import User
 from .choices import ORDER_STATUS_SUCCESS, ORDER_STATUS_PENDING
@@ -10,7 +11,11 @@ from .models import Order, Coupon
 
 
 def get_all_orders() -> list[Order]:
-    return Order.objects.prefetch_related('items').select_related('owner', 'coupon').all()
+    return Order.objects.prefetch_related(
+        'items__product__category',
+        primary_image_prefetch('items__product__media'),
+        'payment'
+    ).select_related('owner', 'coupon').all()
 
 
 def get_pending_orders() -> list[Order]:
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from gse.payment.serializers import PaymentSerializer
+from gse.products.media_urls import MediaUrlsListSerializer, MediaUrlsMixin
 from gse.products.serializers import ProductListSerializer
 from .choices import ORDER_STATUS_PENDING
 from .models import Order, OrderItem, Coupon
@@ -13,16 +14,20 @@ from .selectors import (
 )
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(MediaUrlsMixin, serializers.ModelSerializer):
     product = ProductListSerializer(read_only=True)
     total_price = serializers.SerializerMethodField()
 
     def get_total_price(self, obj) -> int:
         return obj.total_price
 
+    def get_media_names(self, obj) -> list[str]:
+        return self.fields['product'].get_media_names(obj.product)
+
     class Meta:
         model = OrderItem
         fields = '__all__'
+        list_serializer_class = MediaUrlsListSerializer
 
 
 class CouponSerializer(serializers.ModelSerializer):
@@ -7,16 +7,27 @@ from gse.cart.models import Cart, CartItem
 from gse.products.models import Product
 from gse.products.selectors import get_products_for_update_by_ids
 from gse.users.models import User
+from gse.utils.caching import bump_cache_version, CACHE_NAMESPACE_PRODUCTS
 from .choices import ORDER_STATUS_CANCELLED
 from .models import Order, Coupon, OrderItem
 
 
+def bump_stock_cache_version(products: dict[int, Product], previous_quantities: dict[int, int]) -> None:
+    """
+    Invalidates the cached product responses when a product ran out of stock or is back in stock.
+    Other stock changes are left to the cache lifetime, so checkouts do not empty the cache of every page.
+    """
+    if any((product.quantity > 0) != (previous_quantities[product_id] > 0) for product_id, product in products.items()):
+        bump_cache_version(CACHE_NAMESPACE_PRODUCTS)
+
+
 @transaction.atomic()
 def create_order(owner: User, items: list[dict[str, int | Product]]) -> Order:
     cart = Cart.objects.select_related('owner').prefetch_related('items__product').get(owner=owner)
 
     products_ids = [item['product'].id for item in items]
     products = get_products_for_update_by_ids(products_ids)
+    previous_quantities = {product_id: product.quantity for product_id, product in products.items()}
 
     products_to_update = []
     cart_items_to_delete = []
@@ -37,6 +48,7 @@ def create_order(owner: User, items: list[dict[str, int | Product]]) -> Order:
         order_items.append(OrderItem(order=None, product=product, quantity=quantity))
 
     Product.objects.bulk_update(products_to_update, ['quantity'])
+    bump_stock_cache_version(products, previous_quantities)
     CartItem.objects.filter(id__in=[item.id for item in cart_items_to_delete]).delete()
     order = Order.objects.create(owner=owner)
 
@@ -83,10 +95,12 @@ def cancel_order(order: Order) -> Order:
     items = order.items.select_related('product')
     product_ids = [item.product_id for item in items]
     products = get_products_for_update_by_ids(product_ids)
+    previous_quantities = {product_id: product.quantity for product_id, product in products.items()}
     for item in items:
         product = products[item.product_id]
         product.quantity += item.quantity
     Product.objects.bulk_update(products.values(), ['quantity'])
+    bump_stock_cache_version(products, previous_quantities)
     order.save()
     return order
 
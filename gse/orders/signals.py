@@ -1,6 +1,9 @@
+from django.db import transaction
 from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
 
+from gse.products.tasks import schedule_ranking_refresh
+from .choices import ORDER_STATUS_SUCCESS
 from .models import Order
 
 
@@ -12,6 +15,18 @@ def check_order_item_count(sender, instance, created, **kwargs):
             instance.delete()
 
 
+@receiver(post_save, sender=Order)
+def refresh_product_rankings(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    # only paid orders count as sales, so only payments and status changes of paid orders (e.g. a cancel) matter.
+    # sent before `Order.save` stores the new status, `_stored_status` is still the previous one.
+    previous_status = getattr(instance, '_stored_status', None)
+    if previous_status != instance.status and ORDER_STATUS_SUCCESS in (previous_status, instance.status):
+        product_ids = list(instance.items.values_list('product_id', flat=True))
+        transaction.on_commit(lambda: schedule_ranking_refresh(product_ids))
+
+
 @receiver(pre_delete, sender=Order)
 def check_coupon_usage_limit(sender, instance, **kwargs):
     if instance.coupon is not None:
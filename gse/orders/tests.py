@@ -1,3 +1,95 @@
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from gse.products.models import Product
+from gse.users.models import User
+from .choices import ORDER_STATUS_CANCELLED, ORDER_STATUS_SUCCESS
+from .models import Order, OrderItem
+from .services import cancel_order, create_order, set_order_status
+
+
+@mock.patch('gse.orders.signals.schedule_ranking_refresh')
+class OrderPaymentTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email='user@example.com', password='password')
+        self.product = Product.objects.create(title='product', quantity=10, description='-', unit_price=1000)
+        self.order = Order.objects.create(owner=user)
+        OrderItem.objects.create(order=self.order, product=self.product, quantity=1)
+
+    def save(self, order):
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+
+    def test_paid_at_is_set_once(self, _):
+        self.save(self.order)
+        self.assertIsNone(self.order.paid_at)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            set_order_status(self.order, ORDER_STATUS_SUCCESS)
+        paid_at = Order.objects.get(id=self.order.id).paid_at
+        self.assertIsNotNone(paid_at)
+
+        self.save(self.order)
+        self.assertEqual(Order.objects.get(id=self.order.id).paid_at, paid_at)
+
+    def test_rankings_are_refreshed_when_the_paid_status_changes(self, schedule_ranking_refresh):
+        self.save(self.order)
+        schedule_ranking_refresh.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            set_order_status(self.order, ORDER_STATUS_SUCCESS)
+        schedule_ranking_refresh.assert_called_once_with([self.product.id])
+
+        # saves that keep the status, e.g. an address change, do not read the items.
+        with self.assertNumQueries(2):
+            self.save(self.order)
+        schedule_ranking_refresh.assert_called_once()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            set_order_status(self.order, ORDER_STATUS_CANCELLED)
+        self.assertEqual(schedule_ranking_refresh.call_count, 2)
+
+    def test_the_status_of_loaded_orders_is_known_without_a_query(self, schedule_ranking_refresh):
+        self.save(self.order)
+        order = Order.objects.get(id=self.order.id)
+        order.status = ORDER_STATUS_SUCCESS
+        # the status is not written, so it did not change.
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save(update_fields=['discount_percent'])
+        schedule_ranking_refresh.assert_not_called()
+
+        order.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            set_order_status(order, ORDER_STATUS_SUCCESS)
+        schedule_ranking_refresh.assert_called_once_with([self.product.id])
+
+
+@mock.patch('gse.orders.signals.schedule_ranking_refresh')
+@mock.patch('gse.orders.services.bump_cache_version')
+class OrderStockTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='user@example.com', password='password')
+        self.product = Product.objects.create(title='product', quantity=2, description='-', unit_price=1000)
+
+    def order(self, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            return create_order(self.user, [{'product': self.product, 'quantity': quantity}])
+
+    def cancel(self, order):
+        with self.captureOnCommitCallbacks(execute=True):
+            cancel_order(order)
+
+    def test_product_responses_are_invalidated_only_when_stock_runs_out_or_returns(self, bump_cache_version, _):
+        first = self.order(1)
+        bump_cache_version.assert_not_called()
+
+        second = self.order(1)
+        self.assertEqual(bump_cache_version.call_count, 1)
+
+        self.cancel(first)
+        self.assertEqual(bump_cache_version.call_count, 2)
+        self.cancel(second)
+        self.assertEqual(bump_cache_version.call_count, 2)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 2)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Product, ProductCategory, ProductDetail, ProductMedia, ProductReview
+from .models import Campaign, Product, ProductCategory, ProductDetail, ProductMedia, ProductReview
 
 
 class ProductDetailInline(admin.TabularInline):
@@ -47,3 +47,11 @@ class ProductMediaAdmin(admin.ModelAdmin):
 class ProductReviewAdmin(admin.ModelAdmin):
     list_display = ('owner', 'rate', 'product')
     list_filter = ('rate',)
+
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ('title', 'id', 'discount_percent', 'starts_at', 'ends_at', 'is_active')
+    list_filter = ('is_active',)
+    search_fields = ('title',)
+    filter_horizontal = ('products', 'categories')
@@ -6,11 +6,17 @@ from rest_framework.generics import ListAPIView, RetrieveAPIView, DestroyAPIView
 from rest_framework.response import Response
 
 from gse.utils import format_errors
+from gse.utils.caching import (
+    ConditionalGetMixin,
+    VersionedCacheMixin,
+    CACHE_NAMESPACE_CATEGORIES,
+    CACHE_NAMESPACE_PRODUCTS
+)
 from gse.utils.doc_serializers import ResponseSerializer
 from gse.utils.permissions import IsAdminOrSupporter
 from ..models import ProductCategory
-from ..selectors import get_parent_categories, get_all_categories
-from ..serializers import ProductCategoryWriteSerializer, ProductCategoryReadSerializer
+from ..selectors import get_parent_categories_with_sub_categories, get_all_categories, get_category_tree
+from ..serializers import ProductCategoryWriteSerializer, ProductCategoryReadSerializer, CategoryTreeSerializer
 
 
 @extend_schema(tags=['ProductCategories'])
@@ -75,13 +81,15 @@ class CategoryDeleteAPI(DestroyAPIView):
 
 
 @extend_schema(tags=['ProductCategories'])
-class CategoriesListAPI(ListAPIView):
+class CategoriesListAPI(ConditionalGetMixin, VersionedCacheMixin, ListAPIView):
     """
     API for listing all categories.
     """
-    queryset = get_parent_categories()
+    queryset = get_parent_categories_with_sub_categories()
     serializer_class = ProductCategoryReadSerializer
     search_fields = ['title']
+    cache_namespaces = (CACHE_NAMESPACE_CATEGORIES,)
+    cache_control = {'public': True, 'max_age': 300}
 
 
 @extend_schema(tags=['ProductCategories'])
@@ -92,3 +100,21 @@ class CategoryRetrieveAPI(RetrieveAPIView):
     queryset = get_all_categories()
     serializer_class = ProductCategoryReadSerializer
     lookup_url_kwarg = 'category_id'
+
+
+@extend_schema(tags=['ProductCategories'])
+class CategoryTreeAPI(ConditionalGetMixin, ListAPIView):
+    """
+    API for retrieving the whole category tree with the products count of each category and its descendants.
+    """
+    serializer_class = CategoryTreeSerializer
+    pagination_class = None
+    filter_backends = []
+    cache_namespaces = (CACHE_NAMESPACE_CATEGORIES, CACHE_NAMESPACE_PRODUCTS)
+    cache_control = {'public': True, 'max_age': 300}
+
+    def list(self, request, *args, **kwargs):
+        return Response(
+            data={'data': get_category_tree()},
+            status=status.HTTP_200_OK
+        )
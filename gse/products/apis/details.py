@@ -1,7 +1,7 @@
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema
 from rest_framework import status
-from rest_framework.generics import DestroyAPIView, UpdateAPIView
+from rest_framework.generics import DestroyAPIView, ListAPIView, UpdateAPIView
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
 
@@ -9,10 +9,23 @@ from gse.utils import is_child_of, format_errors, update_response
 from gse.utils.doc_serializers import ResponseSerializer
 from gse.utils.permissions import IsAdminOrSupporter
 from ..models import Product, ProductDetail
-from ..selectors import get_all_details
+from ..selectors import get_all_details, get_product_details
 from ..serializers import ProductDetailSerializer
 
 
+@extend_schema(tags=['ProductDetails'])
+class ProductDetailListAPI(ListAPIView):
+    """
+    API for listing the detail rows (with their ids) of a product, accessible only to admin users.
+    Public reads use the `specs` of the product instead.
+    """
+    serializer_class = ProductDetailSerializer
+    permission_classes = [IsAdminOrSupporter]
+
+    def get_queryset(self):
+        return get_product_details(self.kwargs.get('product_id'))
+
+
 @extend_schema(tags=['ProductDetails'])
 class ProductDetailCreateAPI(GenericAPIView):
     """
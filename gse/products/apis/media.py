@@ -1,3 +1,5 @@
+from botocore.exceptions import BotoCoreError, ClientError
+from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema
 from rest_framework import status
@@ -10,11 +12,27 @@ from gse.utils.doc_serializers import ResponseSerializer
 from gse.utils.permissions import IsAdminOrSupporter
 from ..models import Product, ProductMedia
 from ..selectors import get_all_media
-from ..serializers import ProductMediaSerializer
+from ..serializers import (
+    ProductMediaSerializer,
+    MediaUploadInitiateSerializer,
+    MediaUploadPartsSerializer,
+    MediaUploadCompleteSerializer,
+    MediaUploadTokenSerializer
+)
+from ..upload_handlers import MediaUploadMixin
+from ..uploads import abort_media_upload, complete_media_upload, get_media_upload_part_urls, initiate_media_upload
+
+
+def storage_error_response(error: BotoCoreError | ClientError) -> Response:
+    # an error answered by the bucket is a bad gateway, a bucket that can not be reached is unavailable.
+    return Response(
+        data={'data': {'errors': {'storage': 'ارتباط با فضای ذخیره سازی برقرار نشد، لطفا دوباره تلاش کنید.'}}},
+        status=status.HTTP_502_BAD_GATEWAY if isinstance(error, ClientError) else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
 
 
 @extend_schema(tags=['ProductMedia'])
-class ProductMediaCreateAPI(GenericAPIView):
+class ProductMediaCreateAPI(MediaUploadMixin, GenericAPIView):
     """
     API for creating product media, accessible only to admin users.
     """
@@ -38,7 +56,7 @@ class ProductMediaCreateAPI(GenericAPIView):
 
 
 @extend_schema(tags=['ProductMedia'])
-class ProductMediaUpdateAPI(UpdateAPIView):
+class ProductMediaUpdateAPI(MediaUploadMixin, UpdateAPIView):
     """
     API for updating product media, accessible only to admin users.
     """
@@ -81,3 +99,121 @@ class ProductMediaDeleteAPI(DestroyAPIView):
                 status=status.HTTP_404_NOT_FOUND
             )
         return super().destroy(request, *args, **kwargs)
+
+
+@extend_schema(tags=['ProductMedia'])
+class MediaUploadInitiateAPI(GenericAPIView):
+    """
+    API for starting a direct multipart upload of a product media to the bucket, accessible only to admin users.
+    The client then uploads each part to its presigned url and completes the upload.
+    """
+    serializer_class = MediaUploadInitiateSerializer
+    permission_classes = [IsAdminOrSupporter]
+
+    def post(self, request, *args, **kwargs):
+        product: Product = get_object_or_404(Product, id=kwargs.get('product_id'))
+        serializer = self.serializer_class(data=request.data)
+        if serializer.is_valid():
+            try:
+                upload = initiate_media_upload(product.id, **serializer.validated_data)
+            except (BotoCoreError, ClientError) as e:
+                return storage_error_response(e)
+            return Response(data={'data': upload}, status=status.HTTP_201_CREATED)
+        return Response(
+            data={'data': {'errors': format_errors(serializer.errors)}},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
+@extend_schema(tags=['ProductMedia'])
+class MediaUploadPartsAPI(GenericAPIView):
+    """
+    API for getting the presigned urls of the parts of a direct upload, accessible only to admin users.
+    """
+    serializer_class = MediaUploadPartsSerializer
+    permission_classes = [IsAdminOrSupporter]
+
+    def post(self, request, *args, **kwargs):
+        product: Product = get_object_or_404(Product, id=kwargs.get('product_id'))
+        serializer = self.serializer_class(data=request.data, context={'product': product})
+        if serializer.is_valid():
+            try:
+                parts = get_media_upload_part_urls(
+                    serializer.validated_data['upload_token'],
+                    serializer.validated_data['part_numbers']
+                )
+            except (BotoCoreError, ClientError) as e:
+                return storage_error_response(e)
+            return Response(data={'data': {'parts': parts}}, status=status.HTTP_200_OK)
+        return Response(
+            data={'data': {'errors': format_errors(serializer.errors)}},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
+@extend_schema(tags=['ProductMedia'])
+class MediaUploadCompleteAPI(GenericAPIView):
+    """
+    API for completing a direct upload and registering it as a product media, accessible only to admin users.
+    """
+    serializer_class = MediaUploadCompleteSerializer
+    permission_classes = [IsAdminOrSupporter]
+
+    @extend_schema(responses={201: ResponseSerializer})
+    def post(self, request, *args, **kwargs):
+        product: Product = get_object_or_404(Product, id=kwargs.get('product_id'))
+        serializer = self.serializer_class(data=request.data, context={'product': product})
+        if not serializer.is_valid():
+            return Response(
+                data={'data': {'errors': format_errors(serializer.errors)}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            complete_media_upload(
+                serializer.validated_data['upload_token'],
+                serializer.validated_data['parts'],
+                serializer.validated_data['is_primary']
+            )
+        except ValidationError as e:
+            return Response(data={'data': {'errors': {'media': e.messages[0]}}}, status=status.HTTP_400_BAD_REQUEST)
+        except ClientError as e:
+            if e.response['ResponseMetadata']['HTTPStatusCode'] >= 500:
+                return storage_error_response(e)
+            return Response(
+                data={'data': {'errors': {'parts': 'تکمیل آپلود ناموفق بود، قسمت های ارسال شده را بررسی کنید.'}}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except BotoCoreError as e:
+            return storage_error_response(e)
+        return Response(
+            data={'data': {'message': 'رسانه محصول با موفقیت ثبت شد.'}},
+            status=status.HTTP_201_CREATED
+        )
+
+
+@extend_schema(tags=['ProductMedia'])
+class MediaUploadAbortAPI(GenericAPIView):
+    """
+    API for aborting a direct upload and discarding its uploaded parts, accessible only to admin users.
+    """
+    serializer_class = MediaUploadTokenSerializer
+    permission_classes = [IsAdminOrSupporter]
+
+    @extend_schema(responses={200: ResponseSerializer})
+    def post(self, request, *args, **kwargs):
+        product: Product = get_object_or_404(Product, id=kwargs.get('product_id'))
+        serializer = self.serializer_class(data=request.data, context={'product': product})
+        if serializer.is_valid():
+            try:
+                abort_media_upload(serializer.validated_data['upload_token'])
+            except ClientError as e:
+                # already completed or aborted uploads are not found.
+                if e.response['ResponseMetadata']['HTTPStatusCode'] >= 500:
+                    return storage_error_response(e)
+            except BotoCoreError as e:
+                return storage_error_response(e)
+            return Response(data={'data': {'message': 'آپلود لغو شد.'}}, status=status.HTTP_200_OK)
+        return Response(
+            data={'data': {'errors': format_errors(serializer.errors)}},
+            status=status.HTTP_400_BAD_REQUEST
+        )
@@ -1,46 +1,118 @@
+from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
-from drf_spectacular.utils import extend_schema
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 from rest_framework import status
 from rest_framework.generics import GenericAPIView
 from rest_framework.generics import ListAPIView, RetrieveAPIView, DestroyAPIView
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 
 from gse.utils import format_errors
+from gse.utils.caching import (
+    ConditionalGetMixin,
+    VersionedCacheMixin,
+    CACHE_NAMESPACE_PRODUCTS,
+    CACHE_NAMESPACE_CATEGORIES,
+    CACHE_NAMESPACE_REVIEWS,
+    CACHE_NAMESPACE_RELATED_PRODUCTS
+)
+from gse.utils.counters import CachedCount
 from gse.utils.doc_serializers import ResponseSerializer
 from gse.utils.permissions import IsAdminOrSupporter
+from ..filters import ProductFilter, ProductOrderingFilter, ProductSearchFilter
+from ..importers import import_products, read_rows
+from ..media_urls import MediaUrlsCacheMixin
 from ..models import Product
-from ..selectors import get_all_products
+from ..selectors import get_all_products, get_all_products_with_details, get_product_facets, get_related_products
 from ..serializers import (
+    ProductBulkPriceUpdateSerializer,
     ProductDetailsSerializer,
     ProductListSerializer,
+    ProductImportSerializer,
     ProductOperationsSerializer,
     ProductUpdateSerializer
 )
-from ..services import create_product
+from ..services import create_product, bulk_update_prices
 
 
 @extend_schema(tags=['Products'])
-class ProductsListAPI(ListAPIView):
+class ProductsListAPI(MediaUrlsCacheMixin, ConditionalGetMixin, VersionedCacheMixin, ListAPIView):
     """
-    API for listing all products, with optional filters and search functionality.
+    API for listing all products, with optional filters, ranked full-text search, sorting (`?ordering=bestseller`)
+    and the facet counts of the filtered products (`?facets=true`).
     """
     queryset = get_all_products()
     serializer_class = ProductListSerializer
-    filterset_fields = ['available']
-    search_fields = ['title', 'description', 'slug', 'category__title']
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, ProductOrderingFilter]
+    filterset_class = ProductFilter
+    count_strategy = CachedCount(timeout=60)
+    cache_namespaces = (CACHE_NAMESPACE_PRODUCTS, CACHE_NAMESPACE_CATEGORIES, CACHE_NAMESPACE_REVIEWS)
+    cache_control = {'public': True, 'max_age': 30}
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='facets',
+                description='Adds the price range and the category/spec counts of the filtered products.',
+                required=False,
+                type=bool
+            )
+        ]
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        if request.query_params.get('facets') in ('true', '1'):
+            response.data['facets'] = get_product_facets(queryset)
+        return response
 
 
 @extend_schema(tags=['Products'])
-class ProductRetrieveAPI(RetrieveAPIView):
+class ProductRetrieveAPI(MediaUrlsCacheMixin, ConditionalGetMixin, VersionedCacheMixin, RetrieveAPIView):
     """
     API for retrieving the details of a specific product.
     """
-    queryset = get_all_products()
+    queryset = get_all_products_with_details()
     serializer_class = ProductDetailsSerializer
     lookup_url_kwarg = 'product_id'
+    cache_namespaces = (CACHE_NAMESPACE_PRODUCTS, CACHE_NAMESPACE_CATEGORIES, CACHE_NAMESPACE_REVIEWS)
+    cache_control = {'public': True, 'max_age': 60}
 
-    def get(self, request, *args, **kwargs):
-        response = super().get(request, *args, **kwargs)
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        return Response(
+            data={'data': response.data},
+            status=response.status_code
+        )
+
+
+@extend_schema(tags=['Products'])
+class ProductRelatedAPI(MediaUrlsCacheMixin, ConditionalGetMixin, VersionedCacheMixin, ListAPIView):
+    """
+    API for listing the products most often bought together with a specific product.
+    """
+    serializer_class = ProductListSerializer
+    pagination_class = None
+    filter_backends = []
+    cache_namespaces = (
+        CACHE_NAMESPACE_PRODUCTS,
+        CACHE_NAMESPACE_CATEGORIES,
+        CACHE_NAMESPACE_REVIEWS,
+        CACHE_NAMESPACE_RELATED_PRODUCTS
+    )
+    cache_control = {'public': True, 'max_age': 300}
+
+    def get_queryset(self):
+        return get_related_products(self.kwargs['product_id'])
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
         return Response(
             data={'data': response.data},
             status=response.status_code
@@ -106,3 +178,57 @@ class ProductDestroyAPI(DestroyAPIView):
     queryset = get_all_products()
     permission_classes = [IsAdminOrSupporter]
     lookup_url_kwarg = 'product_id'
+
+
+@extend_schema(tags=['Products'])
+class ProductImportAPI(GenericAPIView):
+    """
+    API for importing products from a csv or jsonl file, accessible only to admin users.
+    Rows are created or updated by sku (or slug) and invalid rows are reported by their row number.
+    """
+    serializer_class = ProductImportSerializer
+    permission_classes = [IsAdminOrSupporter]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data)
+        if serializer.is_valid():
+            file = serializer.validated_data['file']
+            report = import_products(read_rows(file.file, serializer.validated_data['format']))
+            return Response(
+                data={'data': {'message': 'درون ریزی محصولات انجام شد.', **report}},
+                status=status.HTTP_200_OK
+            )
+        return Response(
+            data={'data': {'errors': format_errors(serializer.errors)}},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
+@extend_schema(tags=['Products'])
+class ProductBulkPriceUpdateAPI(GenericAPIView):
+    """
+    API for changing the price and/or discount of many products at once, accessible only to admin users.
+    """
+    serializer_class = ProductBulkPriceUpdateSerializer
+    permission_classes = [IsAdminOrSupporter]
+
+    @extend_schema(responses={200: ResponseSerializer})
+    def patch(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data)
+        if serializer.is_valid():
+            try:
+                updated_count = bulk_update_prices(**serializer.validated_data)
+            except ValidationError as e:
+                return Response(
+                    data={'data': {'errors': {'price': e.messages[0]}}},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            return Response(
+                data={'data': {'message': f'قیمت {updated_count} محصول به روز رسانی شد.', 'updated': updated_count}},
+                status=status.HTTP_200_OK
+            )
+        return Response(
+            data={'data': {'errors': format_errors(serializer.errors)}},
+            status=status.HTTP_400_BAD_REQUEST
+        )
@@ -9,6 +9,8 @@ from rest_framework.response import Response
 
 from gse.orders.selectors import has_purchased
 from gse.utils import is_child_of, format_errors
+from gse.utils.caching import ConditionalGetMixin, VersionedCacheMixin, CACHE_NAMESPACE_REVIEWS
+from gse.utils.counters import CachedCount
 from gse.utils.doc_serializers import ResponseSerializer
 from gse.utils.permissions import IsAdminOrOwner
 from ..models import Product, ProductReview
@@ -17,12 +19,15 @@ from ..serializers import ProductReviewSerializer
 
 
 @extend_schema(tags=['ProductReviews'])
-class ProductReviewListAPI(ListAPIView):
+class ProductReviewListAPI(ConditionalGetMixin, VersionedCacheMixin, ListAPIView):
     """
     API for listing product reviews.
     """
     serializer_class = ProductReviewSerializer
     filterset_fields = ['rate']
+    count_strategy = CachedCount(timeout=60)
+    cache_namespaces = (CACHE_NAMESPACE_REVIEWS,)
+    cache_control = {'public': True, 'max_age': 60}
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
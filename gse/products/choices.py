@@ -5,3 +5,20 @@ MEDIA_TYPE_CHOICES = (
     (MEDIA_TYPE_IMAGE, 'عکس'),
     (MEDIA_TYPE_VIDEO, 'ویدیو')
 )
+
+MEDIA_ALLOWED_TYPES = {
+    'images': ['image/jpeg', 'image/png', 'image/jpg', 'image/gif'],
+    'videos': ['video/mp4']
+}
+MEDIA_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif')
+MEDIA_VIDEO_EXTENSIONS = ('.mp4',)
+MEDIA_MAX_SIZE = 500 * 1024 * 1024
+MEDIA_MAX_VIDEO_DURATION = 600
+
+IMPORT_FORMAT_CSV = 'csv'
+IMPORT_FORMAT_JSONL = 'jsonl'
+
+IMPORT_FORMAT_CHOICES = (
+    (IMPORT_FORMAT_CSV, 'CSV'),
+    (IMPORT_FORMAT_JSONL, 'JSON Lines')
+)
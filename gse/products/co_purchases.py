@@ -0,0 +1,96 @@
+import logging
+from collections import Counter, defaultdict
+from itertools import permutations
+
+from django.db import IntegrityError, transaction
+
+from gse.orders.choices import ORDER_STATUS_SUCCESS
+from gse.orders.models import Order, OrderItem
+from gse.utils.caching import bump_cache_version, CACHE_NAMESPACE_RELATED_PRODUCTS
+from .models import CoPurchaseOrder, ProductCoPurchase
+
+CO_PURCHASE_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+def get_uncounted_order_ids(limit: int, after_id: int = 0) -> list[int]:
+    # a range of `order_status_id_idx`, each batch of a run starts after the orders of the previous one.
+    return list(
+        Order.objects.order_by('id')
+        .filter(status=ORDER_STATUS_SUCCESS, id__gt=after_id, co_purchase__isnull=True)
+        .values_list('id', flat=True)[:limit]
+    )
+
+
+def record_counted_orders(order_ids: list[int]) -> bool:
+    """Records the orders as counted, returns False when one of them was already recorded by a concurrent run."""
+    try:
+        with transaction.atomic():
+            CoPurchaseOrder.objects.bulk_create([CoPurchaseOrder(order_id=order_id) for order_id in order_ids])
+    except IntegrityError:
+        logger.warning(
+            'Could not record orders %s to %s as counted, stopping the co-purchase run.',
+            order_ids[0], order_ids[-1], exc_info=True
+        )
+        return False
+    return True
+
+
+def count_co_purchases(order_ids: list[int]) -> Counter:
+    """Returns how many of the orders contain each ordered pair of products."""
+    baskets = defaultdict(set)
+    items = OrderItem.objects.order_by().filter(order_id__in=order_ids).values_list('order_id', 'product_id')
+    for order_id, product_id in items:
+        baskets[order_id].add(product_id)
+
+    pairs = Counter()
+    for product_ids in baskets.values():
+        pairs.update(permutations(sorted(product_ids), 2))
+    return pairs
+
+
+def add_co_purchases(pairs: Counter) -> None:
+    product_ids = {product_id for product_id, _ in pairs}
+    co_purchases = {
+        (co_purchase.product_id, co_purchase.related_product_id): co_purchase
+        for co_purchase in ProductCoPurchase.objects.select_for_update()
+        .order_by('id')
+        .filter(product_id__in=product_ids, related_product_id__in=product_ids)
+    }
+
+    updated, created = [], []
+    for (product_id, related_product_id), count in pairs.items():
+        co_purchase = co_purchases.get((product_id, related_product_id))
+        if co_purchase is None:
+            created.append(
+                ProductCoPurchase(product_id=product_id, related_product_id=related_product_id, score=count)
+            )
+        else:
+            co_purchase.score += count
+            updated.append(co_purchase)
+
+    ProductCoPurchase.objects.bulk_update(updated, ['score'], batch_size=500)
+    ProductCoPurchase.objects.bulk_create(created, batch_size=500)
+
+
+def build_co_purchases(batch_size: int = CO_PURCHASE_BATCH_SIZE) -> int:
+    """
+    Adds the successful orders that were not counted yet to `ProductCoPurchase`, `batch_size` orders per
+    transaction. Counted orders are recorded with their counts, so an order paid long after it was placed
+    is still counted and a run that fails half way resumes where it stopped. Returns the number of orders counted.
+    """
+    counted_count, last_order_id = 0, 0
+    while True:
+        with transaction.atomic():
+            order_ids = get_uncounted_order_ids(batch_size, after_id=last_order_id)
+            # recorded first, so a concurrent run that picked the same orders stops here instead of counting twice.
+            if not order_ids or not record_counted_orders(order_ids):
+                break
+            add_co_purchases(count_co_purchases(order_ids))
+        counted_count += len(order_ids)
+        last_order_id = order_ids[-1]
+
+    if counted_count:
+        bump_cache_version(CACHE_NAMESPACE_RELATED_PRODUCTS)
+    return counted_count
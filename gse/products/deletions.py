@@ -0,0 +1,50 @@
+from botocore.exceptions import BotoCoreError, ClientError
+
+from gse.utils.redis_client import get_redis_client
+
+MEDIA_DELETION_QUEUE_KEY = 'products:media-deletions'
+MEDIA_DELETION_SCHEDULED_KEY = 'products:media-deletions:scheduled'
+# deletions of a burst (e.g. a product with all its media) wait for each other and are flushed together.
+MEDIA_DELETION_DELAY = 5
+# the most keys a single `DeleteObjects` request accepts.
+MEDIA_DELETION_BATCH_SIZE = 1000
+
+
+def queue_media_deletions(keys: list[str]) -> bool:
+    """
+    Adds storage keys to the deletion queue, a redis set, so a key queued twice is deleted once.
+    Returns True when no flush is scheduled yet and the caller has to schedule one.
+    """
+    keys = [key for key in keys if key]
+    if not keys:
+        return False
+    pipeline = get_redis_client().pipeline()
+    pipeline.sadd(MEDIA_DELETION_QUEUE_KEY, *keys)
+    pipeline.set(MEDIA_DELETION_SCHEDULED_KEY, 1, nx=True, ex=MEDIA_DELETION_DELAY * 60)
+    _, scheduled = pipeline.execute()
+    return bool(scheduled)
+
+
+def flush_media_deletions(bucket, batch_size: int = MEDIA_DELETION_BATCH_SIZE, get_referenced_keys=None) -> int:
+    """
+    Deletes the queued keys with one `DeleteObjects` request per `batch_size` keys.
+    `get_referenced_keys` returns the keys of a batch that are in use again and must be kept.
+    Keys that could not be deleted are queued again, their count is returned so the caller can retry.
+    """
+    client = get_redis_client()
+    # cleared first, so keys queued from now on schedule another flush instead of being missed by this one.
+    client.delete(MEDIA_DELETION_SCHEDULED_KEY)
+    while keys := client.spop(MEDIA_DELETION_QUEUE_KEY, batch_size):
+        if get_referenced_keys is not None:
+            referenced_keys = get_referenced_keys(keys)
+            keys = [key for key in keys if key not in referenced_keys]
+            if not keys:
+                continue
+        try:
+            failed_keys = bucket.delete_file_objects(keys)
+        except (BotoCoreError, ClientError):
+            failed_keys = keys
+        if failed_keys:
+            client.sadd(MEDIA_DELETION_QUEUE_KEY, *failed_keys)
+            return len(failed_keys)
+    return 0
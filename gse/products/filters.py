@@ -0,0 +1,84 @@
+import django_filters
+from django import forms
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from .models import Product, ProductCategory
+from .search import search_products
+from .selectors import filter_products_by_category_tree, filter_products_by_specs
+
+SPEC_SEPARATOR = ':'
+# each one matches an index of `Product`, so a page is read from the index instead of sorting every product.
+PRODUCT_ORDERINGS = {
+    'price': ('final_price', 'id'),
+    '-price': ('-final_price', '-id'),
+    'newest': ('-created_date', '-id'),
+    'bestseller': ('-sales_count_30d', '-id'),
+    'top-rated': ('-popularity_score', '-id'),
+}
+
+
+class ProductSearchFilter(SearchFilter):
+    """
+    Full-text product search, ranked by relevance, replacing the `icontains` lookups of `SearchFilter`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        return search_products(queryset, query)
+
+
+class ProductOrderingFilter(OrderingFilter):
+    """
+    Sorts products by one of `PRODUCT_ORDERINGS` (e.g. `?ordering=bestseller`), replacing the relevance order of a search.
+    """
+    ordering_description = f'One of: {", ".join(PRODUCT_ORDERINGS)}.'
+
+    def get_ordering(self, request, queryset, view):
+        return PRODUCT_ORDERINGS.get(request.query_params.get(self.ordering_param))
+
+    def get_valid_fields(self, queryset, view, context=None):
+        return [(ordering, ordering) for ordering in PRODUCT_ORDERINGS]
+
+
+class SpecField(forms.Field):
+    """Parses repeated `attribute:value` query parameters into `{attribute: [values]}`."""
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        if not value:
+            return {}
+        specs = {}
+        for spec in [value] if isinstance(value, str) else value:
+            attribute, separator, spec_value = spec.partition(SPEC_SEPARATOR)
+            if not (attribute and separator and spec_value):
+                raise forms.ValidationError('مشخصه باید به صورت attribute:value ارسال شود.')
+            specs.setdefault(attribute, []).append(spec_value)
+        return specs
+
+
+class SpecFilter(django_filters.Filter):
+    field_class = SpecField
+
+
+class ProductFilter(django_filters.FilterSet):
+    min_price = django_filters.NumberFilter(field_name='final_price', lookup_expr='gte')
+    max_price = django_filters.NumberFilter(field_name='final_price', lookup_expr='lte')
+    spec = SpecFilter(
+        method='filter_specs',
+        help_text='`attribute:value`, repeat it to filter on more values (OR) or attributes (AND).'
+    )
+    category = django_filters.ModelChoiceFilter(
+        queryset=ProductCategory.objects.all(),
+        method='filter_category',
+        help_text='Products of this category and all of its sub categories.'
+    )
+
+    class Meta:
+        model = Product
+        fields = ['available', 'category', 'min_price', 'max_price', 'spec']
+
+    def filter_category(self, queryset, name, value):
+        return filter_products_by_category_tree(queryset, value)
+
+    def filter_specs(self, queryset, name, value):
+        return filter_products_by_specs(queryset, value)
@@ -0,0 +1,185 @@
+import csv
+import io
+import json
+from itertools import islice
+from typing import IO, Iterable, Iterator
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from gse.utils.caching import bump_cache_version, CACHE_NAMESPACE_PRODUCTS, CACHE_NAMESPACE_CATEGORIES
+from .choices import IMPORT_FORMAT_CSV, IMPORT_FORMAT_CHOICES
+from .models import Product, ProductCategory, ProductDetail
+from .search import index_products
+from .serializers import ProductImportRowSerializer
+from .services import invalidate_category_tree, refresh_product_specs
+
+CSV_CATEGORY_SEPARATOR = '|'
+CSV_OPTIONAL_COLUMNS = ('sku', 'available', 'discount_percent', 'categories', 'details')
+
+PRODUCT_IMPORT_FIELDS = (
+    'sku', 'title', 'slug', 'quantity', 'description', 'available', 'unit_price', 'discount_percent', 'final_price'
+)
+
+
+def guess_import_format(file_name: str) -> str | None:
+    extension = file_name.rsplit('.', 1)[-1].lower()
+    return extension if extension in dict(IMPORT_FORMAT_CHOICES) else None
+
+
+def parse_csv_row(row: dict) -> dict:
+    """
+    Turns a csv row into the shape of a jsonl row: categories are `|` separated titles
+    and details are a json list of `{"attribute": ..., "value": ...}` objects.
+    """
+    row = {key: value for key, value in row.items() if key and not (key in CSV_OPTIONAL_COLUMNS and value == '')}
+    if 'categories' in row:
+        row['categories'] = [title.strip() for title in row['categories'].split(CSV_CATEGORY_SEPARATOR)]
+    if 'details' in row:
+        try:
+            row['details'] = json.loads(row['details'])
+        except ValueError:
+            pass  # reported by the row serializer.
+    return row
+
+
+def read_rows(stream: IO[bytes], file_format: str) -> Iterator[dict]:
+    """
+    Lazily yields the rows of a csv or jsonl byte stream, so files of any size are read in constant memory.
+    """
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        if file_format == IMPORT_FORMAT_CSV:
+            for row in csv.DictReader(text_stream):
+                yield parse_csv_row(row)
+        else:
+            for line in text_stream:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield row if isinstance(row, dict) else {'__invalid__': line}
+    finally:
+        # leaves closing the underlying stream to its owner.
+        text_stream.detach()
+
+
+def get_row_key(data: dict) -> tuple[str, str]:
+    if data.get('sku'):
+        return 'sku', data['sku']
+    return 'slug', slugify(data['title'], allow_unicode=True)
+
+
+def validate_chunk(rows: list[tuple[int, dict]], report: dict) -> list[tuple[int, dict]]:
+    """Validates the rows of a chunk, resolving every category title with a single query."""
+    valid_rows = []
+    for row_number, row in rows:
+        if '__invalid__' in row:
+            report['errors'].append({'row': row_number, 'errors': {'row': ['سطر یک شیء json معتبر نیست.']}})
+            continue
+        serializer = ProductImportRowSerializer(data=row)
+        if serializer.is_valid():
+            valid_rows.append((row_number, serializer.validated_data))
+        else:
+            report['errors'].append({'row': row_number, 'errors': serializer.errors})
+
+    titles = {title for _, data in valid_rows for title in data.get('categories', ())}
+    categories = dict(ProductCategory.objects.filter(title__in=titles).values_list('title', 'id'))
+
+    resolved_rows = []
+    for row_number, data in valid_rows:
+        unknown = [title for title in data.get('categories', ()) if title not in categories]
+        if unknown:
+            report['errors'].append({
+                'row': row_number,
+                'errors': {'categories': [f'دسته بندی "{title}" وجود ندارد.' for title in unknown]}
+            })
+            continue
+        if 'categories' in data:
+            data['category_ids'] = {categories[title] for title in data.pop('categories')}
+        resolved_rows.append((row_number, data))
+    return resolved_rows
+
+
+@transaction.atomic
+def save_chunk(rows: list[tuple[int, dict]]) -> tuple[int, int]:
+    """
+    Upserts the products of a validated chunk by sku (or by slug when a row has no sku), and replaces
+    their details and categories with a handful of bulk queries. Returns the created and updated counts.
+    """
+    # a key repeated in the same chunk is applied once, the last row wins.
+    rows_by_key = {get_row_key(data): data for _, data in rows}
+    skus = [value for field, value in rows_by_key if field == 'sku']
+    slugs = [value for field, value in rows_by_key if field == 'slug']
+    existing = {('sku', product.sku): product for product in Product.objects.filter(sku__in=skus)}
+    for product in Product.objects.filter(slug__in=slugs).order_by('-id'):
+        existing[('slug', product.slug)] = product
+
+    now = timezone.now()
+    new_products, updated_products = [], []
+    for key, data in rows_by_key.items():
+        product = existing.get(key)
+        if product is None:
+            product = Product()
+            new_products.append(product)
+        else:
+            product.updated_date = now
+            updated_products.append(product)
+        for field in PRODUCT_IMPORT_FIELDS:
+            if field in data:
+                setattr(product, field, data[field])
+        product.populate_computed_fields()
+        data['product'] = product
+
+    Product.objects.bulk_create(new_products)
+    Product.objects.bulk_update(updated_products, [*PRODUCT_IMPORT_FIELDS, 'updated_date'])
+
+    with_details = [data for data in rows_by_key.values() if 'details' in data]
+    ProductDetail.objects.filter(product__in=[data['product'] for data in with_details]).delete()
+    ProductDetail.objects.bulk_create([
+        ProductDetail(product=data['product'], **detail)
+        for data in with_details
+        for detail in data['details']
+    ])
+    refresh_product_specs([data['product'].id for data in with_details])
+
+    through_model = Product.category.through
+    with_categories = [data for data in rows_by_key.values() if 'category_ids' in data]
+    through_model.objects.filter(product__in=[data['product'] for data in with_categories]).delete()
+    through_model.objects.bulk_create([
+        through_model(product_id=data['product'].id, productcategory_id=category_id)
+        for data in with_categories
+        for category_id in data['category_ids']
+    ])
+
+    # bulk queries send no signals, so the side effects of the signal handlers are applied once per chunk.
+    index_products(data['product'].id for data in rows_by_key.values())
+    bump_cache_version(CACHE_NAMESPACE_PRODUCTS)
+    bump_cache_version(CACHE_NAMESPACE_CATEGORIES)
+    invalidate_category_tree()
+    return len(new_products), len(updated_products)
+
+
+def import_products(rows: Iterable[dict], chunk_size: int = 500) -> dict:
+    """
+    Imports product rows chunk by chunk, each chunk in its own transaction.
+    Invalid rows are skipped and reported with their (1-based) row number.
+    """
+    report = {'created': 0, 'updated': 0, 'failed': 0, 'errors': []}
+    numbered_rows = enumerate(rows, start=1)
+    while chunk := list(islice(numbered_rows, chunk_size)):
+        errors_count = len(report['errors'])
+        valid_rows = validate_chunk(chunk, report)
+        if valid_rows:
+            try:
+                created, updated = save_chunk(valid_rows)
+            except IntegrityError as e:
+                report['errors'].extend({'row': row_number, 'errors': {'row': [str(e)]}} for row_number, _ in valid_rows)
+            else:
+                report['created'] += created
+                report['updated'] += updated
+        report['failed'] += len(report['errors']) - errors_count
+    return report
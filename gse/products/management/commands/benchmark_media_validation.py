@@ -0,0 +1,71 @@
+import os
+import resource
+from io import BytesIO
+
+from django.core.files.images import get_image_dimensions
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from gse.products.choices import MEDIA_ALLOWED_TYPES, MEDIA_TYPE_IMAGE, MEDIA_TYPE_VIDEO
+from gse.products.media_inspection import inspect_media
+from gse.products.media_probe import PROBE_CACHE_ATTRIBUTE, probe_media
+from gse.products.validators import validate_file_type
+
+
+def get_cpu_time() -> float:
+    # ffprobe runs in a child process, its time is part of the cost of an upload.
+    return sum(
+        usage.ru_utime + usage.ru_stime
+        for usage in (resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN))
+    )
+
+
+def inspect_per_layer(file) -> None:
+    """What validating an upload cost before `MediaInspection`: the serializer and the model each did their own work."""
+    media_type = validate_file_type(file, MEDIA_ALLOWED_TYPES)
+    for _ in range(2):
+        if media_type == MEDIA_TYPE_IMAGE:
+            get_image_dimensions(file)
+        elif media_type == MEDIA_TYPE_VIDEO:
+            probe_media(file)
+            delattr(file, PROBE_CACHE_ATTRIBUTE)
+
+
+def inspect_once(file) -> None:
+    inspect_media(file)  # serializer
+    inspect_media(file)  # model, served from the upload
+
+
+class Command(BaseCommand):
+    help = 'Measures the cpu time of validating a media upload in the serializer and the model.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--video', help='An mp4 file to benchmark as well, needs ffprobe.')
+
+    def build_image(self) -> tuple[str, bytes]:
+        buffer = BytesIO()
+        Image.new('RGB', (950, 950), (200, 120, 40)).save(buffer, 'JPEG', quality=90)
+        return 'benchmark.jpg', buffer.getvalue()
+
+    def measure(self, inspect, name: str, content: bytes, iterations: int) -> float:
+        started_at = get_cpu_time()
+        for _ in range(iterations):
+            inspect(SimpleUploadedFile(name, content))
+        return (get_cpu_time() - started_at) / iterations * 1000
+
+    def handle(self, *args, **options):
+        samples = [self.build_image()]
+        if options['video']:
+            with open(options['video'], 'rb') as file:
+                samples.append((os.path.basename(options['video']), file.read()))
+
+        for name, content in samples:
+            iterations = options['iterations'] if name == 'benchmark.jpg' else max(options['iterations'] // 20, 1)
+            before = self.measure(inspect_per_layer, name, content, iterations)
+            after = self.measure(inspect_once, name, content, iterations)
+            self.stdout.write(
+                f'{name}: {before:.3f} ms per upload before, {after:.3f} ms after '
+                f'({iterations} iteration(s)).'
+            )
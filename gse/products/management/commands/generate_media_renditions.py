@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from gse.products.models import ProductMedia
+from gse.products.tasks import generate_media_renditions
+
+
+class Command(BaseCommand):
+    help = 'Queues the rendition job of every product image or video whose renditions are missing or stale.'
+
+    def handle(self, *args, **options):
+        media_files = ProductMedia.objects.only('id', 'media', 'renditions')
+        queued = 0
+        for media in media_files.iterator(chunk_size=500):
+            if media.renditions.get('source') != media.media.name:
+                generate_media_renditions.delay(media.id)
+                queued += 1
+        self.stdout.write(self.style.SUCCESS(f'{queued} media file(s) queued.'))
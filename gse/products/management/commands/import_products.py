@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from gse.products.choices import IMPORT_FORMAT_CHOICES
+from gse.products.importers import guess_import_format, import_products, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Imports (creates or updates by sku/slug) products from a csv or jsonl file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=dict(IMPORT_FORMAT_CHOICES).keys())
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or guess_import_format(options['path'])
+        if file_format is None:
+            raise CommandError('Could not guess the file format, pass it with --format.')
+
+        with open(options['path'], 'rb') as stream:
+            report = import_products(read_rows(stream, file_format), chunk_size=options['chunk_size'])
+
+        for error in report['errors']:
+            self.stderr.write(f'row {error["row"]}: {error["errors"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{report["created"]} product(s) created, {report["updated"]} updated, {report["failed"]} failed.'
+        ))
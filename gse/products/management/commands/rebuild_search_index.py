@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from gse.products.models import Product
+from gse.products.search import index_products
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index of all products.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        product_ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+        for start in range(0, len(product_ids), batch_size):
+            index_products(product_ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f'{len(product_ids)} product(s) indexed.'))
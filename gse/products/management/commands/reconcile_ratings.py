@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from gse.products.services import reconcile_product_ratings
+
+
+class Command(BaseCommand):
+    help = 'Backfills and reconciles the denormalized rating columns of products from their reviews.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report the number of out of sync products without writing them.'
+        )
+
+    def handle(self, *args, **options):
+        stale_count = reconcile_product_ratings(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f'{stale_count} product(s) are out of sync.')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{stale_count} product(s) reconciled.'))
@@ -0,0 +1,115 @@
+import os
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .media_inspection import get_content_hash
+from .models import MediaBlob, ProductMedia
+from .renditions import get_rendition_names
+
+
+def build_blob_name(content_hash: str, file_name: str) -> str:
+    _, extension = os.path.splitext(file_name)
+    return f'{content_hash}{extension.lower()}'
+
+
+def acquire_media_blob(file, storage) -> MediaBlob:
+    """
+    Returns the blob holding the content of `file` with one more reference.
+    The content is only written to the storage when no blob has it yet, a blob with a single
+    reference is one that was just written.
+    """
+    content_hash = get_content_hash(file)
+    blob: MediaBlob | None = MediaBlob.objects.select_for_update().filter(sha256=content_hash).first()
+    if blob is None:
+        name = storage.save(build_blob_name(content_hash, file.name), file)
+        try:
+            with transaction.atomic():
+                return MediaBlob.objects.create(sha256=content_hash, name=name, size=file.size, ref_count=1)
+        except IntegrityError:
+            # the same content was stored by a concurrent upload meanwhile, both may have written the same name.
+            blob = MediaBlob.objects.select_for_update().get(sha256=content_hash)
+            if name != blob.name:
+                storage.delete(name)
+
+    MediaBlob.objects.filter(id=blob.id).update(ref_count=F('ref_count') + 1)
+    blob.ref_count += 1
+    return blob
+
+
+def release_media_blob(blob_id: int) -> list[str]:
+    """
+    Drops a reference to a blob, call it once the referencing row is gone or points elsewhere.
+    Returns the name of the file when that was the last reference.
+    """
+    blob: MediaBlob | None = MediaBlob.objects.select_for_update().filter(id=blob_id).first()
+    if blob is None:
+        return []
+    if blob.ref_count > 1:
+        MediaBlob.objects.filter(id=blob_id).update(ref_count=F('ref_count') - 1)
+        return []
+    blob.delete()
+    return [blob.name]
+
+
+def get_shared_renditions(blob: MediaBlob) -> dict:
+    """Returns the renditions another `ProductMedia` already generated for the blob, if any."""
+    for renditions in ProductMedia.objects.filter(blob=blob).values_list('renditions', flat=True):
+        if renditions.get('source') == blob.name:
+            return renditions
+    return {}
+
+
+def get_unshared_rendition_names(media: ProductMedia) -> list[str]:
+    """Returns the renditions of `media` that no other `ProductMedia` of the same blob uses."""
+    names = get_rendition_names(media.renditions)
+    if media.blob_id is None or not names:
+        return names
+    shared_names = {
+        name
+        for renditions in ProductMedia.objects.filter(blob_id=media.blob_id)
+        .exclude(id=media.id)
+        .values_list('renditions', flat=True)
+        for name in get_rendition_names(renditions)
+    }
+    return [name for name in names if name not in shared_names]
+
+
+def store_media_file(media: ProductMedia) -> None:
+    """
+    Points a `ProductMedia` with a new, not yet stored file at the blob of its content instead,
+    so a duplicate upload only adds a reference (and reuses the renditions) without writing anything.
+    What the replaced file leaves behind is released by `release_replaced_media_files` once the row is saved.
+    Returns the name of the file when it was written, which is left behind if the save is rolled back.
+    """
+    if not media.media or media.media._committed:
+        return None
+
+    blob = acquire_media_blob(media.media, media.media.storage)
+    media._replaced_blob_id = media.blob_id
+    media._replaced_rendition_names = []
+    if blob.id != media.blob_id:
+        if media.pk is not None:
+            media._replaced_rendition_names = get_unshared_rendition_names(media)
+        media.renditions = get_shared_renditions(blob)
+    media.blob = blob
+    media.media = blob.name
+    return blob.name if blob.ref_count == 1 else None
+
+
+def release_replaced_media_files(media: ProductMedia) -> list[str]:
+    """Returns the names of the files the last save of `media` left without references."""
+    replaced_blob_id = getattr(media, '_replaced_blob_id', None)
+    names = getattr(media, '_replaced_rendition_names', [])
+    media._replaced_blob_id, media._replaced_rendition_names = None, []
+    if replaced_blob_id is None:
+        return names
+    # also drops the second reference a re-upload of the same content took.
+    return [*release_media_blob(replaced_blob_id), *names]
+
+
+def release_media_files(media: ProductMedia) -> list[str]:
+    """Returns the names of the files a deleted `ProductMedia` left without references."""
+    if media.blob_id is None:
+        return [media.media.name, *get_rendition_names(media.renditions)]
+    return [*release_media_blob(media.blob_id), *get_unshared_rendition_names(media)]
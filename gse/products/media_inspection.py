@@ -0,0 +1,112 @@
+import hashlib
+import os
+
+from django.core.exceptions import ValidationError
+from django.core.files.images import get_image_dimensions
+
+from .choices import (
+    MEDIA_TYPE_IMAGE,
+    MEDIA_TYPE_VIDEO,
+    MEDIA_ALLOWED_TYPES,
+    MEDIA_IMAGE_EXTENSIONS,
+    MEDIA_VIDEO_EXTENSIONS,
+    MEDIA_MAX_SIZE,
+    MEDIA_MAX_VIDEO_DURATION
+)
+from .media_probe import get_probe_target, probe_media
+from .validators import detect_media_type
+
+INSPECTION_CACHE_ATTRIBUTE = '_media_inspection'
+CONTENT_HASH_ATTRIBUTE = 'sha256'
+
+
+class MediaInspection:
+    """
+    What validation needs to know about an uploaded media file: one magic sniff, one image header parse
+    or one ffprobe call. It is cached on the upload, so the serializer and the model share it.
+    """
+
+    def __init__(self, name: str, size: int, media_type: str | None, width=None, height=None, probe=None):
+        self.name = name
+        self.size = size
+        self.media_type = media_type
+        self.width = width
+        self.height = height
+        self.probe = probe or {}
+
+    @property
+    def extension(self) -> str:
+        return os.path.splitext(self.name)[1].lower()
+
+    @property
+    def duration(self) -> float | None:
+        return self.probe.get('duration')
+
+
+def inspect_media(file) -> MediaInspection:
+    target = get_probe_target(file)
+    cached = getattr(target, INSPECTION_CACHE_ATTRIBUTE, None)
+    if cached is not None:
+        return cached
+
+    # `MediaUploadHandler` already sniffed streamed uploads.
+    media_type = getattr(target, 'media_type', None)
+    if media_type is None:
+        head = target.read(2048)
+        target.seek(0)
+        media_type = detect_media_type(head, MEDIA_ALLOWED_TYPES)
+
+    inspection = MediaInspection(name=file.name, size=file.size, media_type=media_type)
+    if media_type == MEDIA_TYPE_IMAGE:
+        inspection.width, inspection.height = get_image_dimensions(target)
+    elif media_type == MEDIA_TYPE_VIDEO:
+        inspection.probe = probe_media(target)
+
+    setattr(target, INSPECTION_CACHE_ATTRIBUTE, inspection)
+    return inspection
+
+
+def get_content_hash(file) -> str:
+    """Returns the sha-256 of an upload, `MediaUploadHandler` computes it while the upload streams in."""
+    target = get_probe_target(file)
+    content_hash = getattr(target, CONTENT_HASH_ATTRIBUTE, None)
+    if content_hash is None:
+        digest = hashlib.sha256()
+        for chunk in target.chunks():
+            digest.update(chunk)
+        target.seek(0)
+        content_hash = digest.hexdigest()
+        setattr(target, CONTENT_HASH_ATTRIBUTE, content_hash)
+    return content_hash
+
+
+def validate_media_inspection(inspection: MediaInspection, is_primary: bool = False) -> None:
+    if inspection.media_type is None:
+        raise ValidationError({'media': 'نوع رسانه مجاز نمیباشد.'})
+
+    if inspection.media_type == MEDIA_TYPE_IMAGE and inspection.extension not in MEDIA_IMAGE_EXTENSIONS:
+        raise ValidationError('اگر نوع رسانه عکس انتخاب شده، فایل آپلود شده باید عکس باشد.')
+
+    if inspection.media_type == MEDIA_TYPE_VIDEO and inspection.extension not in MEDIA_VIDEO_EXTENSIONS:
+        raise ValidationError("اگر نوع رسانه ویدیو انتخاب شده، فایل آپلود شده باید ویدیو باشد.")
+
+    if inspection.media_type == MEDIA_TYPE_IMAGE:
+        if inspection.width is None or not 900 <= inspection.width <= 1000:
+            raise ValidationError('عرض عکس باید بین ۹۰۰ تا ۱۰۰۰ پیکسل باشد.')
+
+        if not 900 <= inspection.height <= 1000:
+            raise ValidationError('طول عکس باید بین ۹۰۰ تا ۱۰۰۰ پیکسل باشد.')
+
+    if inspection.size > MEDIA_MAX_SIZE:
+        raise ValidationError('حجم فایل باید کمتر از ۵۰۰ مگابایت باشد.')
+
+    if inspection.media_type == MEDIA_TYPE_VIDEO and is_primary:
+        raise ValidationError("ویدیو نمیتواند به عنوان رسانه اصلی استفاده شود.")
+
+    if inspection.media_type == MEDIA_TYPE_VIDEO and inspection.duration > MEDIA_MAX_VIDEO_DURATION:
+        raise ValidationError(
+            {
+                'media': f"Video duration exceeds the limit. Maximum allowed is {MEDIA_MAX_VIDEO_DURATION} seconds, "
+                         f"but got {inspection.duration:.2f} seconds."
+            }
+        )
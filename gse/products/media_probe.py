@@ -0,0 +1,109 @@
+import json
+import subprocess
+import tempfile
+
+from django.core.exceptions import ValidationError
+from django.db.models.fields.files import FieldFile
+
+FFPROBE_COMMAND = [
+    'ffprobe', '-v', 'error',
+    '-select_streams', 'v:0',
+    '-show_entries', 'format=duration:stream=codec_name,width,height',
+    '-of', 'json',
+]
+PROBE_CACHE_ATTRIBUTE = '_media_probe'
+PROBE_TIMEOUT = 60
+
+
+def parse_probe_output(output: bytes) -> dict:
+    result = json.loads(output or b'{}')
+    stream = (result.get('streams') or [{}])[0]
+    duration = result.get('format', {}).get('duration')
+    return {
+        'duration': float(duration) if duration not in (None, 'N/A') else None,
+        'codec': stream.get('codec_name'),
+        'width': stream.get('width'),
+        'height': stream.get('height'),
+    }
+
+
+def probe_source(source: str) -> dict:
+    """Probes a local path or an url (ffprobe only reads the byte ranges it needs over http)."""
+    result = subprocess.run(
+        [*FFPROBE_COMMAND, source],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        timeout=PROBE_TIMEOUT,
+    )
+    return parse_probe_output(result.stdout)
+
+
+def probe_stream(file) -> dict:
+    """
+    Pipes an in-memory `file` to ffprobe's stdin, so no temporary copy is written.
+    ffprobe may close the pipe once it has read the headers, the rest of the content is then dropped.
+    """
+    file.seek(0)
+    content = file.read()
+    file.seek(0)
+    # the timeout covers writing stdin too, a hung ffprobe is killed instead of blocking the request.
+    result = subprocess.run(
+        [*FFPROBE_COMMAND, '-i', 'pipe:0'],
+        input=content,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        timeout=PROBE_TIMEOUT,
+    )
+    return parse_probe_output(result.stdout)
+
+
+def probe_copy(file) -> dict:
+    # mp4 files with their index (moov atom) at the end can not be probed from a pipe.
+    with tempfile.NamedTemporaryFile() as temp_file:
+        for chunk in file.chunks():
+            temp_file.write(chunk)
+        temp_file.flush()
+        file.seek(0)
+        return probe_source(temp_file.name)
+
+
+def get_probe_target(file):
+    """
+    Returns the object to probe and cache the result on: the uploaded file behind a not yet saved
+    `FieldFile`, or the stored file itself.
+    """
+    if isinstance(file, FieldFile) and not file._committed:
+        return file.file
+    return file
+
+
+def probe_media(file) -> dict:
+    """
+    Returns the duration, codec and dimensions of a video, probing each upload at most once.
+    Spooled uploads are probed from their temporary path, in-memory ones through a pipe
+    and stored files from their storage path or url.
+    """
+    target = get_probe_target(file)
+    cached = getattr(target, PROBE_CACHE_ATTRIBUTE, None)
+    if cached is not None:
+        return cached
+
+    try:
+        if hasattr(target, 'temporary_file_path'):
+            probe = probe_source(target.temporary_file_path())
+        elif isinstance(target, FieldFile):
+            try:
+                probe = probe_source(target.storage.path(target.name))
+            except NotImplementedError:
+                probe = probe_source(target.storage.url(target.name))
+        else:
+            probe = probe_stream(target)
+            if probe['duration'] is None:
+                probe = probe_copy(target)
+    except (OSError, ValueError, subprocess.SubprocessError):
+        raise ValidationError('Could not process the video file.')
+
+    if probe['duration'] is None:
+        raise ValidationError('Could not process the video file.')
+    setattr(target, PROBE_CACHE_ATTRIBUTE, probe)
+    return probe
@@ -0,0 +1,133 @@
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import models
+from django.utils.encoding import filepath_to_uri
+from rest_framework import serializers
+
+MEDIA_URL_CACHE_KEY_PREFIX = 'media-url'
+MEDIA_URLS_CONTEXT_KEY = 'media_urls'
+# signed urls are dropped from the cache this long before they expire, so every url of a response is still
+# valid for this long. Responses are versioned per period of this length (see `MediaUrlsCacheMixin`).
+MEDIA_URL_EXPIRY_MARGIN = 15 * 60
+
+
+def get_media_url_cache_key(storage, name: str) -> str:
+    raw_key = f'{getattr(storage, "bucket_name", "")}:{name}'
+    return f'{MEDIA_URL_CACHE_KEY_PREFIX}:{sha1(raw_key.encode()).hexdigest()}'
+
+
+def resolve_media_urls(names, storage=default_storage) -> dict[str, str]:
+    """
+    Returns the url of each stored file name. Product media are public, so with `PRODUCT_MEDIA_PUBLIC_URL`
+    (a cdn or a public bucket) urls are built without signing. Otherwise signed urls are read from
+    and written to the cache in one round trip each, and only the missing ones are signed.
+    """
+    names = {name for name in names if name}
+    if settings.PRODUCT_MEDIA_PUBLIC_URL:
+        base_url = settings.PRODUCT_MEDIA_PUBLIC_URL.rstrip('/')
+        return {name: f'{base_url}/{filepath_to_uri(name)}' for name in names}
+
+    expire = getattr(storage, 'querystring_expire', 0)
+    if not getattr(storage, 'querystring_auth', False) or expire <= MEDIA_URL_EXPIRY_MARGIN:
+        # unsigned urls are cheap to build and never change.
+        return {name: storage.url(name) for name in names}
+
+    keys = {get_media_url_cache_key(storage, name): name for name in names}
+    urls = {keys[key]: url for key, url in cache.get_many(keys.keys()).items()}
+    signed = {key: storage.url(name) for key, name in keys.items() if name not in urls}
+    if signed:
+        cache.set_many(signed, timeout=expire - MEDIA_URL_EXPIRY_MARGIN)
+        urls.update({keys[key]: url for key, url in signed.items()})
+    return urls
+
+
+def media_urls_are_signed(storage=default_storage) -> bool:
+    """
+    Whether media urls are signed. A signed url only grants access to its own file, so files referring
+    to each other by relative names (e.g. HLS playlists and segments) can not be served.
+    """
+    return not settings.PRODUCT_MEDIA_PUBLIC_URL and getattr(storage, 'querystring_auth', False)
+
+
+def get_signed_media_url_lifetime(storage=default_storage) -> int | None:
+    """Returns how long the media urls of a response stay valid at least, None when urls are not signed."""
+    if not media_urls_are_signed(storage):
+        return None
+    return min(getattr(storage, 'querystring_expire', 0), MEDIA_URL_EXPIRY_MARGIN) or None
+
+
+class MediaUrlsCacheMixin:
+    """
+    For cached views rendering media urls. With signed urls the cached responses, `ETag` and `Last-Modified`
+    change every period the urls are valid for, so neither the cache nor a 304 hands out expired urls.
+    """
+
+    def get_versions_lifetime(self) -> int | None:
+        return get_signed_media_url_lifetime()
+
+
+class MediaUrls:
+    """
+    The media urls of one response. Names are added up front and resolved together
+    the first time any url is read.
+    """
+
+    def __init__(self, storage=default_storage):
+        self.storage = storage
+        self.pending = set()
+        self.urls = {}
+
+    def add(self, names) -> None:
+        self.pending.update(name for name in names if name and name not in self.urls)
+
+    def get(self, name: str) -> str:
+        if name not in self.urls:
+            self.pending.add(name)
+            self.urls.update(resolve_media_urls(self.pending, self.storage))
+            self.pending.clear()
+        return self.urls[name]
+
+
+def get_media_urls(context: dict) -> MediaUrls:
+    return context.setdefault(MEDIA_URLS_CONTEXT_KEY, MediaUrls())
+
+
+class MediaUrlsListSerializer(serializers.ListSerializer):
+    """
+    Adds the media names of every item before rendering the first one,
+    so the urls of a whole page are resolved in one batch.
+    """
+
+    def to_representation(self, data):
+        items = data.all() if isinstance(data, models.manager.BaseManager) else data
+        media_urls = get_media_urls(self.context)
+        for item in items:
+            media_urls.add(self.child.get_media_names(item))
+        return super().to_representation(items)
+
+
+class MediaUrlsMixin:
+    """
+    For serializers that render media urls. `get_media_names` lists the file names an object needs,
+    `get_media_url` reads them from the urls shared by the whole response.
+    """
+
+    def get_media_names(self, obj) -> list[str]:
+        return []
+
+    def get_media_url(self, name: str) -> str:
+        return get_media_urls(self.context).get(name)
+
+
+class MediaUrlField(serializers.FileField):
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = get_media_urls(self.context).get(value.name)
+        request = self.context.get('request', None)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:53
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductReview = apps.get_model('products', 'ProductReview')
+
+    aggregates = {}
+    rows = ProductReview.objects.order_by().values('product_id', 'rate').annotate(count=Count('id'))
+    for row in rows:
+        product = aggregates.setdefault(row['product_id'], Product(id=row['product_id'], rating_histogram={}))
+        product.rating_sum += row['rate'] * row['count']
+        product.rating_count += row['count']
+        product.rating_histogram[str(row['rate'])] = row['count']
+
+    Product.objects.bulk_update(
+        aggregates.values(),
+        ['rating_sum', 'rating_count', 'rating_histogram'],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_alter_productcategory_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_histogram',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
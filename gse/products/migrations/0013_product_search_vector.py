@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:30
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# copied from `gse.products.search` as they were when this migration was written, so it never changes with them.
+FTS_TABLE = 'products_product_fts'
+
+PERSIAN_NORMALIZATION_TABLE = str.maketrans({
+    'ي': 'ی',
+    'ى': 'ی',
+    'ك': 'ک',
+    '\u200c': None,
+    '\u200d': None,
+    '\u200e': None,
+    '\u200f': None,
+    '\u0640': None,
+    **{chr(0x06f0 + digit): str(digit) for digit in range(10)},
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},
+    **{chr(code): None for code in range(0x064b, 0x0660)},
+    '\u0670': None,
+})
+
+
+def normalize_text(text: str) -> str:
+    return (text or '').translate(PERSIAN_NORMALIZATION_TABLE).lower()
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS products_product_search_vector_gin '
+            'ON products_product USING gin (search_vector)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+            f"USING fts5(title, categories, description, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS products_product_search_vector_gin')
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def backfill_search_index(apps, schema_editor):
+    from django.contrib.postgres.search import SearchVector
+    from django.db.models import Value
+
+    Product = apps.get_model('products', 'Product')
+    vendor = schema_editor.connection.vendor
+
+    for product in Product.objects.prefetch_related('category').iterator(chunk_size=500):
+        title = normalize_text(product.title)
+        categories = normalize_text(' '.join(category.title for category in product.category.all()))
+        description = normalize_text(product.description)
+        if vendor == 'postgresql':
+            Product.objects.filter(id=product.id).update(
+                search_vector=(
+                        SearchVector(Value(title), weight='A', config='simple')
+                        + SearchVector(Value(categories), weight='B', config='simple')
+                        + SearchVector(Value(description), weight='C', config='simple')
+                )
+            )
+        elif vendor == 'sqlite':
+            schema_editor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, categories, description) VALUES (%s, %s, %s, %s)',
+                (product.id, title, categories, description)
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_product_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
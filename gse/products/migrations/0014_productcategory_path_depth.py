@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:10
+
+from django.db import migrations, models
+
+
+def backfill_category_paths(apps, schema_editor):
+    ProductCategory = apps.get_model('products', 'ProductCategory')
+    categories = {category.id: category for category in ProductCategory.objects.all()}
+
+    def build_path(category, seen=()):
+        if category.path:
+            return category.path
+        parent = categories.get(category.sub_category_id)
+        if parent is None or parent.id in seen:
+            category.path = f'/{category.id}/'
+        else:
+            category.path = f'{build_path(parent, seen + (category.id,))}{category.id}/'
+        category.depth = category.path.count('/') - 2
+        return category.path
+
+    for category in categories.values():
+        build_path(category)
+    ProductCategory.objects.bulk_update(categories.values(), ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productcategory',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='productcategory',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_category_paths, migrations.RunPython.noop),
+    ]
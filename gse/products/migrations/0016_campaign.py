@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:31
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0015_product_sku'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='campaign_discount_percent',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='Campaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('discount_percent', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(100)])),
+                ('starts_at', models.DateTimeField(db_index=True)),
+                ('ends_at', models.DateTimeField(db_index=True)),
+                ('is_active', models.BooleanField(default=False, editable=False)),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('updated_date', models.DateTimeField(auto_now=True)),
+                ('categories', models.ManyToManyField(blank=True, related_name='campaigns', to='products.productcategory')),
+                ('products', models.ManyToManyField(blank=True, related_name='campaigns', to='products.product')),
+            ],
+            options={
+                'ordering': ('-starts_at',),
+            },
+        ),
+    ]
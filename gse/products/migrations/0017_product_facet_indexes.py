@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0016_campaign'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['final_price'], name='product_final_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productdetail',
+            index=models.Index(fields=['attribute', 'value', 'product'], name='product_detail_spec_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:20
+
+from django.db import migrations, models
+
+
+def create_specs_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS products_product_specs_gin '
+            'ON products_product USING gin (specs jsonb_path_ops)'
+        )
+
+
+def drop_specs_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS products_product_specs_gin')
+
+
+def backfill_specs(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ProductDetail = apps.get_model('products', 'ProductDetail')
+
+    specs = {}
+    details = ProductDetail.objects.order_by('id').values_list('product_id', 'attribute', 'value')
+    for product_id, attribute, value in details.iterator(chunk_size=2000):
+        values = specs.setdefault(product_id, {}).setdefault(attribute, [])
+        if value not in values:
+            values.append(value)
+    products = [Product(id=product_id, specs=product_specs) for product_id, product_specs in specs.items()]
+    Product.objects.bulk_update(products, ['specs'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0017_product_facet_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='specs',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(create_specs_index, drop_specs_index),
+        migrations.RunPython(backfill_specs, migrations.RunPython.noop),
+    ]
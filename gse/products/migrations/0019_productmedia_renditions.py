@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0018_product_specs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productmedia',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
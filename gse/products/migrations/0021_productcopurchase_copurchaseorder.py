@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0015_alter_coupon_options_alter_orderitem_options'),
+        ('products', '0020_mediablob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCoPurchase',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveIntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='co_purchases', to='products.product')),
+                ('related_product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='co_purchased_with', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', '-score', 'related_product'], name='product_co_purchase_score_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'related_product'), name='unique_product_co_purchase')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CoPurchaseOrder',
+            fields=[
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='co_purchase', serialize=False, to='orders.order')),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:25
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.utils import timezone
+
+
+def backfill_rankings(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+
+    products = {}
+    for product in Product.objects.order_by().filter(rating_count__gt=0).only('rating_sum', 'rating_count'):
+        product.popularity_score = round((product.rating_sum + 3 * 5) / (product.rating_count + 5), 4)
+        products[product.id] = product
+
+    sales = OrderItem.objects.order_by() \
+        .filter(order__status='success', order__paid_at__gte=timezone.now() - timedelta(days=30)) \
+        .values('product_id') \
+        .annotate(sales=Sum('quantity')) \
+        .values_list('product_id', 'sales')
+    for product_id, sales_count in sales:
+        product = products.setdefault(product_id, Product(id=product_id))
+        product.sales_count_30d = sales_count
+
+    Product.objects.bulk_update(products.values(), ['sales_count_30d', 'popularity_score'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0017_order_paid_at'),
+        ('products', '0021_productcopurchase_copurchaseorder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='popularity_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='sales_count_30d',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_final_price_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['final_price', 'id'], name='product_final_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_date', '-id'], name='product_newest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-sales_count_30d', '-id'], name='product_bestseller_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-popularity_score', '-id'], name='product_popularity_idx'),
+        ),
+        migrations.RunPython(backfill_rankings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:10
+
+from django.db import migrations
+from django.db.models import F
+from django.db.models.functions import Floor, Greatest
+
+
+def recompute_final_prices(apps, schema_editor):
+    """Rewrites every stored `final_price` with the half up rounding of `Product.get_price`."""
+    Product = apps.get_model('products', 'Product')
+    effective_discount = Greatest(F('discount_percent'), F('campaign_discount_percent'))
+    Product.objects.update(final_price=Floor((F('unit_price') * (100 - effective_discount) + 50) / 100))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0022_product_rankings'),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute_final_prices, migrations.RunPython.noop),
+    ]
@@ -1,16 +1,24 @@
+import os
 from decimal import Decimal
 
 from django.core.exceptions import ValidationError
-from django.core.files.images import get_image_dimensions
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import FileExtensionValidator
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
-from django.db.models import Avg
+from django.db import models, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Concat, Floor, Greatest, Substr
 from django.utils.text import slugify
 
 from gse.users.models import User
-from .choices import MEDIA_TYPE_CHOICES, MEDIA_TYPE_IMAGE, MEDIA_TYPE_VIDEO
-from .validators import VideoDurationValidator
+from .choices import (
+    MEDIA_TYPE_CHOICES,
+    MEDIA_TYPE_IMAGE,
+    MEDIA_TYPE_VIDEO,
+    MEDIA_IMAGE_EXTENSIONS,
+    MEDIA_VIDEO_EXTENSIONS
+)
+from .media_inspection import inspect_media, validate_media_inspection
 
 
 class ProductCategory(models.Model):
@@ -25,20 +33,67 @@ class ProductCategory(models.Model):
         null=True,
         db_index=True
     )
+    path = models.CharField(max_length=255, default='', db_index=True, editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
     created_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
         self.slug = slugify(self.title, allow_unicode=True)
-        super().save(*args, **kwargs)
+        if self.pk is not None:
+            self.path, self.depth = ProductCategory.objects.filter(id=self.pk) \
+                .values_list('path', 'depth') \
+                .first() or ('', 0)
+        parent_path = self.get_parent_path()
+        if self.path and parent_path.startswith(self.path):
+            raise ValidationError('یک دسته بندی نمیتواند زیرمجموعه خودش یا زیرمجموعه هایش باشد.')
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.update_path(parent_path)
+
+    def get_parent_path(self) -> str:
+        if self.sub_category_id is None:
+            return '/'
+        return ProductCategory.objects.filter(id=self.sub_category_id).values_list('path', flat=True).first() or '/'
+
+    def update_path(self, parent_path: str):
+        """
+        Keeps the materialized path (`/<root id>/.../<own id>/`) of this category and its descendants in sync.
+        """
+        new_path = f'{parent_path}{self.id}/'
+        if new_path == self.path:
+            return
+
+        old_path, old_depth = self.path, self.depth
+        self.path, self.depth = new_path, new_path.count('/') - 2
+        if old_path:
+            ProductCategory.objects.filter(path__startswith=old_path).update(
+                path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + (self.depth - old_depth),
+            )
+        else:
+            ProductCategory.objects.filter(id=self.id).update(path=self.path, depth=self.depth)
 
     class Meta:
         verbose_name_plural = 'categories'
         ordering = ('-created_date',)
 
 
+def final_price_expression(
+        unit_price=F('unit_price'),
+        discount_percent=F('discount_percent'),
+        campaign_discount_percent=F('campaign_discount_percent'),
+):
+    """
+    SQL version of `Product.get_price`, so prices can be recomputed by a single `UPDATE`.
+    """
+    effective_discount = Greatest(discount_percent, campaign_discount_percent)
+    return Floor((unit_price * (100 - effective_discount) + 50) / 100)
+
+
 class Product(models.Model):
     category = models.ManyToManyField(ProductCategory, related_name='products', blank=True, db_index=True)
+    sku = models.CharField(max_length=64, unique=True, blank=True, null=True)
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=250, allow_unicode=True)
     quantity = models.PositiveSmallIntegerField(validators=[MaxValueValidator(1000)])
@@ -50,37 +105,92 @@ class Product(models.Model):
         decimal_places=0,
     )
     discount_percent = models.PositiveSmallIntegerField(validators=[MaxValueValidator(100)], default=0)
+    campaign_discount_percent = models.PositiveSmallIntegerField(default=0, editable=False)
     final_price = models.DecimalField(
         validators=[MinValueValidator(Decimal(0))],
         max_digits=15,
         decimal_places=0,
         default=0,
     )
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_histogram = models.JSONField(default=dict, blank=True, editable=False)
+    specs = models.JSONField(default=dict, blank=True, editable=False)
+    # refreshed from order and review events by a periodic job (see `rankings.refresh_product_rankings`).
+    sales_count_30d = models.PositiveIntegerField(default=0, editable=False)
+    popularity_score = models.FloatField(default=0, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
     created_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
+        self.populate_computed_fields()
+        super().save(*args, **kwargs)
+
+    def populate_computed_fields(self):
+        """Fills the fields derived from the others, also used before `bulk_create`/`bulk_update`."""
         self.slug = slugify(self.title, allow_unicode=True)
         self.final_price = self.get_price()
         if self.quantity == 0:
             self.available = False
-        super().save(*args, **kwargs)
 
     @property
     def overall_rate(self):
-        avg_rate = self.reviews.aggregate(avg=Avg('rate'))['avg']
-        return round(avg_rate, 1) if avg_rate is not None else 0
+        if self.rating_count == 0:
+            return 0
+        return round(self.rating_sum / self.rating_count, 1)
+
+    @property
+    def effective_discount_percent(self) -> int:
+        return max(self.discount_percent, self.campaign_discount_percent)
 
     def get_price(self):
-        if self.discount_percent > 0:
-            discount_amount = self.unit_price * Decimal(self.discount_percent / 100)
-            discounted_amount = self.unit_price - discount_amount
-            return round(discounted_amount)
-        else:
-            return round(self.unit_price)
+        # exact integer arithmetic rounding halves up, mirrored in SQL by `final_price_expression`.
+        return (self.unit_price * (100 - self.effective_discount_percent) + 50) // 100
 
     class Meta:
         ordering = ('-created_date',)
+        # one per ordering of `filters.PRODUCT_ORDERINGS`.
+        indexes = [
+            models.Index(fields=['final_price', 'id'], name='product_final_price_idx'),
+            models.Index(fields=['-created_date', '-id'], name='product_newest_idx'),
+            models.Index(fields=['-sales_count_30d', '-id'], name='product_bestseller_idx'),
+            models.Index(fields=['-popularity_score', '-id'], name='product_popularity_idx'),
+        ]
+
+
+class Campaign(models.Model):
+    """
+    A time-boxed discount on some products and/or categories (including their sub categories).
+    Running campaigns are applied to `Product.campaign_discount_percent` and `Product.final_price`
+    by a periodic job, the highest discount wins.
+    """
+    title = models.CharField(max_length=200)
+    discount_percent = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(100)])
+    products = models.ManyToManyField(Product, related_name='campaigns', blank=True)
+    categories = models.ManyToManyField(ProductCategory, related_name='campaigns', blank=True)
+    starts_at = models.DateTimeField(db_index=True)
+    ends_at = models.DateTimeField(db_index=True)
+    is_active = models.BooleanField(default=False, editable=False)
+    created_date = models.DateTimeField(auto_now_add=True)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    def clean(self):
+        if self.starts_at and self.ends_at and self.starts_at >= self.ends_at:
+            raise ValidationError('زمان پایان کمپین باید بعد از زمان شروع آن باشد.')
+        super().clean()
+
+    def get_products(self) -> models.QuerySet:
+        category_paths = Q()
+        for path in self.categories.values_list('path', flat=True):
+            category_paths |= Q(productcategory__path__startswith=path)
+        products = Q(id__in=self.products.values('id'))
+        if category_paths:
+            products |= Q(id__in=Product.category.through.objects.filter(category_paths).values('product_id'))
+        return Product.objects.filter(products)
+
+    class Meta:
+        ordering = ('-starts_at',)
 
 
 class ProductDetail(models.Model):
@@ -90,10 +200,59 @@ class ProductDetail(models.Model):
 
     class Meta:
         ordering = ('-product',)
+        indexes = [
+            models.Index(fields=['attribute', 'value', 'product'], name='product_detail_spec_idx'),
+        ]
+
+
+class ProductCoPurchase(models.Model):
+    """
+    The number of successful orders that contained both products, counted by a periodic job
+    (see `co_purchases.build_co_purchases`). Every pair is stored in both directions.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='co_purchases')
+    related_product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='co_purchased_with')
+    score = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'related_product'], name='unique_product_co_purchase'),
+        ]
+        indexes = [
+            # the top related products of a product are the first rows of its range.
+            models.Index(fields=['product', '-score', 'related_product'], name='product_co_purchase_score_idx'),
+        ]
+
+
+class CoPurchaseOrder(models.Model):
+    """An order whose products were already added to `ProductCoPurchase`, so it is never counted twice."""
+    order = models.OneToOneField('orders.Order', on_delete=models.CASCADE, primary_key=True, related_name='co_purchase')
+    created_date = models.DateTimeField(auto_now_add=True)
+
+
+class MediaBlob(models.Model):
+    """
+    A stored media file, keyed by the sha-256 of its content. `ref_count` is the number of `ProductMedia`
+    using it, the file is deleted with the last one.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_date = models.DateTimeField(auto_now_add=True)
 
 
 class ProductMedia(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='media', db_index=True)
+    # empty for files stored before deduplication and for direct uploads.
+    blob = models.ForeignKey(
+        MediaBlob,
+        on_delete=models.PROTECT,
+        related_name='media',
+        null=True,
+        blank=True,
+        editable=False
+    )
     media_type = models.CharField(
         choices=MEDIA_TYPE_CHOICES,
         verbose_name='نوع رسانه',
@@ -102,37 +261,42 @@ class ProductMedia(models.Model):
     )
     media = models.FileField(validators=[FileExtensionValidator(['png', 'jpg', 'jpeg', 'mp4', 'gif'])])
     is_primary = models.BooleanField(default=False, db_index=True)
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     created_date = models.DateTimeField(auto_now_add=True)
     updated_date = models.DateTimeField(auto_now=True)
 
     def clean(self):
-        if self.media_type == MEDIA_TYPE_IMAGE and not self.media.name.lower().endswith(
-                ('png', 'jpg', 'jpeg')):
+        if self.media and not self.media._committed:
+            # a new file: shares the inspection `ProductMediaSerializer` already attached to the upload.
+            inspection = inspect_media(self.media)
+            validate_media_inspection(inspection, is_primary=self.is_primary)
+            if not self.media_type:
+                self.media_type = inspection.media_type
+        else:
+            # a stored file was inspected when it was uploaded, only the name is checked.
+            inspection = None
+
+        extension = os.path.splitext(self.media.name)[1].lower()
+        if self.media_type == MEDIA_TYPE_IMAGE and (
+                extension not in MEDIA_IMAGE_EXTENSIONS or inspection and inspection.media_type != MEDIA_TYPE_IMAGE):
             raise ValidationError('اگر نوع رسانه عکس انتخاب شده، فایل آپلود شده باید عکس باشد.')
 
-        if self.media_type == MEDIA_TYPE_VIDEO and not self.media.name.lower().endswith(('.mp4', '.mov', '.avi')):
+        if self.media_type == MEDIA_TYPE_VIDEO and (
+                extension not in MEDIA_VIDEO_EXTENSIONS or inspection and inspection.media_type != MEDIA_TYPE_VIDEO):
             raise ValidationError("اگر نوع رسانه ویدیو انتخاب شده، فایل آپلود شده باید ویدیو باشد.")
 
         if self.media_type == MEDIA_TYPE_VIDEO and self.is_primary:
             raise ValidationError("ویدیو نمیتواند به عنوان رسانه اصلی استفاده شود.")
 
-        if self.media_type == MEDIA_TYPE_IMAGE:
-            h, w = get_image_dimensions(self.media)
-            if not 900 <= w <= 1000:
-                raise ValidationError('عرض عکس باید بین ۹۰۰ تا ۱۰۰۰ پیکسل باشد.')
-
-            if not 900 <= h <= 1000:
-                raise ValidationError('طول عکس باید بین ۹۰۰ تا ۱۰۰۰ پیکسل باشد.')
-
-        if self.media_type == MEDIA_TYPE_VIDEO:
-            validator = VideoDurationValidator(max_duration=600)
-            validator(self.media)
-
         super().clean()
 
-    def save(self, *args, **kwargs):
-        self.clean()
-        super().save(*args, **kwargs)
+    def save(self, *args, skip_clean=False, **kwargs):
+        # `skip_clean` is for files that were already validated where they are stored (e.g. direct uploads).
+        if not skip_clean:
+            self.clean()
+        # the `pre_save` signal takes a reference on the file's blob, which has to go with this row.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     class Meta:
         ordering = ('-created_date',)
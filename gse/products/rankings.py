@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from gse.orders.choices import ORDER_STATUS_SUCCESS
+from gse.orders.models import OrderItem
+from gse.utils.caching import bump_cache_version, CACHE_NAMESPACE_PRODUCTS
+from gse.utils.redis_client import get_redis_client
+from .models import Product
+
+RANKING_REFRESH_QUEUE_KEY = 'products:ranking-refresh'
+RANKING_REFRESH_SCHEDULED_KEY = 'products:ranking-refresh:scheduled'
+# order and review events of a minute are refreshed together.
+RANKING_REFRESH_DELAY = 60
+RANKING_REFRESH_BATCH_SIZE = 500
+SALES_WINDOW = timedelta(days=30)
+# with few reviews the average is pulled towards `POPULARITY_PRIOR_RATE` as if it had this many more reviews.
+POPULARITY_PRIOR_RATE = 3
+POPULARITY_PRIOR_COUNT = 5
+
+
+def queue_ranking_refresh(product_ids) -> bool:
+    """
+    Adds products whose orders or reviews changed to the refresh queue.
+    Returns True when no refresh is scheduled yet and the caller has to schedule one.
+    """
+    product_ids = [product_id for product_id in product_ids if product_id]
+    if not product_ids:
+        return False
+    pipeline = get_redis_client().pipeline()
+    pipeline.sadd(RANKING_REFRESH_QUEUE_KEY, *product_ids)
+    pipeline.set(RANKING_REFRESH_SCHEDULED_KEY, 1, nx=True, ex=RANKING_REFRESH_DELAY * 10)
+    _, scheduled = pipeline.execute()
+    return bool(scheduled)
+
+
+def compute_popularity_score(rating_sum: int, rating_count: int) -> float:
+    """The bayesian average of the rates, products without reviews come last."""
+    if rating_count == 0:
+        return 0
+    score = (rating_sum + POPULARITY_PRIOR_RATE * POPULARITY_PRIOR_COUNT) / (rating_count + POPULARITY_PRIOR_COUNT)
+    return round(score, 4)
+
+
+def get_sales_counts(product_ids=None) -> dict[int, int]:
+    """
+    Returns the units sold by successful orders paid within the last `SALES_WINDOW`, per product.
+    """
+    items = OrderItem.objects.order_by().filter(
+        order__status=ORDER_STATUS_SUCCESS,
+        order__paid_at__gte=timezone.now() - SALES_WINDOW,
+    )
+    if product_ids is not None:
+        items = items.filter(product_id__in=product_ids)
+    return dict(items.values('product_id').annotate(sales=Sum('quantity')).values_list('product_id', 'sales'))
+
+
+def refresh_product_rankings(product_ids=None) -> int:
+    """
+    Recomputes `sales_count_30d` and `popularity_score` of the given products. Without `product_ids`,
+    the products sold within the window and the ones that still have sales are refreshed, so sales
+    that left the window are dropped. Returns the number of products that changed.
+    """
+    sales_counts = get_sales_counts(product_ids)
+    if product_ids is None:
+        product_ids = {*sales_counts, *Product.objects.filter(sales_count_30d__gt=0).values_list('id', flat=True)}
+    products = Product.objects.order_by() \
+        .filter(id__in=product_ids) \
+        .only('sales_count_30d', 'popularity_score', 'rating_sum', 'rating_count')
+
+    changed_products = []
+    for product in products:
+        sales_count = sales_counts.get(product.id, 0)
+        popularity_score = compute_popularity_score(product.rating_sum, product.rating_count)
+        if (product.sales_count_30d, product.popularity_score) == (sales_count, popularity_score):
+            continue
+        product.sales_count_30d = sales_count
+        product.popularity_score = popularity_score
+        changed_products.append(product)
+
+    if changed_products:
+        Product.objects.bulk_update(
+            changed_products,
+            ['sales_count_30d', 'popularity_score'],
+            batch_size=RANKING_REFRESH_BATCH_SIZE
+        )
+        bump_cache_version(CACHE_NAMESPACE_PRODUCTS)
+    return len(changed_products)
+
+
+def refresh_queued_rankings(batch_size: int = RANKING_REFRESH_BATCH_SIZE) -> int:
+    """Refreshes the products in the queue, `batch_size` at a time. Returns the number of products that changed."""
+    client = get_redis_client()
+    # cleared first, so products queued from now on schedule another refresh instead of being missed by this one.
+    client.delete(RANKING_REFRESH_SCHEDULED_KEY)
+    changed_count = 0
+    while product_ids := client.spop(RANKING_REFRESH_QUEUE_KEY, batch_size):
+        changed_count += refresh_product_rankings([int(product_id) for product_id in product_ids])
+    return changed_count
@@ -0,0 +1,88 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .models import ProductMedia
+
+# longest side of each rendition, smallest first.
+IMAGE_RENDITION_SIZES = {
+    'thumbnail': 240,
+    'medium': 640,
+}
+
+IMAGE_RENDITION_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+
+def build_rendition_name(name: str, size_name: str, extension: str) -> str:
+    root, _ = os.path.splitext(name)
+    return f'{root}_{size_name}.{extension}'
+
+
+def get_image_rendition_names(renditions: dict) -> list[str]:
+    return [
+        renditions[size_name][extension]
+        for size_name in IMAGE_RENDITION_SIZES
+        if size_name in renditions
+        for extension in IMAGE_RENDITION_FORMATS
+        if extension in renditions[size_name]
+    ]
+
+
+def get_rendition_names(renditions: dict) -> list[str]:
+    """Returns every stored file of `renditions`, the image sizes or the playlists, segments and poster of a video."""
+    return [*get_image_rendition_names(renditions), *renditions.get('hls', {}).get('files', [])]
+
+
+def open_image(media: ProductMedia) -> Image.Image:
+    with media.media.storage.open(media.media.name, 'rb') as file:
+        image = Image.open(file)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # flattens transparency on white, jpeg has no alpha channel.
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def generate_renditions(media: ProductMedia) -> dict:
+    """
+    Renders every size of `IMAGE_RENDITION_SIZES` in every format of `IMAGE_RENDITION_FORMATS` and stores them
+    next to the original, e.g. `photo.jpg` -> `photo_thumbnail.webp`. The original is decoded once.
+    """
+    storage = media.media.storage
+    image = open_image(media)
+    renditions = {'source': media.media.name}
+    for size_name, max_size in IMAGE_RENDITION_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+        rendition = {'width': resized.width, 'height': resized.height}
+        for extension, (image_format, options) in IMAGE_RENDITION_FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, image_format, **options)
+            name = build_rendition_name(media.media.name, size_name, extension)
+            rendition[extension] = storage.save(name, ContentFile(buffer.getvalue()))
+        renditions[size_name] = rendition
+    return renditions
+
+
+def get_smallest_rendition(media: ProductMedia, min_size: int = 0) -> dict | None:
+    """
+    Returns the smallest rendition whose longest side is at least `min_size`, or the largest one.
+    None when the renditions of the current file are not generated yet.
+    """
+    renditions = media.renditions or {}
+    if renditions.get('source') != media.media.name:
+        return None
+    available = [renditions[size_name] for size_name in IMAGE_RENDITION_SIZES if size_name in renditions]
+    for rendition in available:
+        if max(rendition['width'], rendition['height']) >= min_size:
+            return rendition
+    return available[-1] if available else None
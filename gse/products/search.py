@@ -0,0 +1,183 @@
+import re
+import threading
+from typing import Iterable
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField
+from django.db import connection, transaction
+from django.db.models import Case, F, Value, QuerySet, When
+from django.db.models.expressions import RawSQL
+
+from .models import Product
+
+FTS_TABLE = 'products_product_fts'
+
+PERSIAN_NORMALIZATION_TABLE = str.maketrans({
+    # arabic ye and alef maksura to persian ye, arabic kaf to persian kaf
+    'ي': 'ی',
+    'ى': 'ی',
+    'ك': 'ک',
+    # zero width non-joiner, zero width joiner and bidi marks
+    '\u200c': None,
+    '\u200d': None,
+    '\u200e': None,
+    '\u200f': None,
+    # tatweel
+    '\u0640': None,
+    # persian and arabic-indic digits
+    **{chr(0x06f0 + digit): str(digit) for digit in range(10)},
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},
+    # arabic diacritics
+    **{chr(code): None for code in range(0x064b, 0x0660)},
+    '\u0670': None,
+})
+
+SEARCH_TERM_PATTERN = re.compile(r'\w+')
+
+
+def normalize_text(text: str) -> str:
+    """Unifies arabic/persian letters, zero width characters and digits so that spellings match each other."""
+    return (text or '').translate(PERSIAN_NORMALIZATION_TABLE).lower()
+
+
+def get_search_terms(query: str) -> list[str]:
+    return SEARCH_TERM_PATTERN.findall(normalize_text(query))
+
+
+class PostgresSearchBackend:
+    """
+    Ranked search over the weighted `Product.search_vector` tsvector column, backed by a GIN index.
+    """
+    config = 'simple'
+
+    def build_vector(self, title: str, categories: str, description: str) -> SearchVector:
+        return (
+                SearchVector(Value(title), weight='A', config=self.config)
+                + SearchVector(Value(categories), weight='B', config=self.config)
+                + SearchVector(Value(description), weight='C', config=self.config)
+        )
+
+    def index(self, documents: Iterable[tuple[int, str, str, str]]) -> None:
+        documents = list(documents)
+        if not documents:
+            return
+        # a single `UPDATE` for the whole batch, each row picks its own vector.
+        Product.objects.filter(id__in=[document[0] for document in documents]).update(
+            search_vector=Case(
+                *[
+                    When(id=product_id, then=self.build_vector(title, categories, description))
+                    for product_id, title, categories, description in documents
+                ],
+                output_field=SearchVectorField(),
+            )
+        )
+
+    def remove(self, product_ids: Iterable[int]) -> None:
+        # the vector lives on the product row itself.
+        pass
+
+    def search(self, queryset: QuerySet, terms: list[str]) -> QuerySet:
+        search_query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms),
+            search_type='raw',
+            config=self.config
+        )
+        return queryset.filter(search_vector=search_query) \
+            .annotate(search_rank=SearchRank(F('search_vector'), search_query)) \
+            .order_by('-search_rank', '-created_date')
+
+
+class SQLiteSearchBackend:
+    """
+    Ranked search over an FTS5 virtual table, used for local development.
+    """
+
+    def index(self, documents: Iterable[tuple[int, str, str, str]]) -> None:
+        documents = list(documents)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(document[0],) for document in documents]
+            )
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, categories, description) VALUES (%s, %s, %s, %s)',
+                documents
+            )
+
+    def remove(self, product_ids: Iterable[int]) -> None:
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk in product_ids])
+
+    def search(self, queryset: QuerySet, terms: list[str]) -> QuerySet:
+        match = ' '.join(f'"{term}"*' for term in terms)
+        table = queryset.model._meta.db_table
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+        ).annotate(
+            search_rank=RawSQL(
+                f'SELECT bm25({FTS_TABLE}, 10.0, 5.0, 1.0) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {table}.id',
+                (match,)
+            )
+        ).order_by('search_rank', '-created_date')
+
+
+def get_search_backend() -> PostgresSearchBackend | SQLiteSearchBackend:
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend()
+    return SQLiteSearchBackend()
+
+
+def build_search_document(product) -> tuple[int, str, str, str]:
+    categories = ' '.join(category.title for category in product.category.all())
+    return (
+        product.id,
+        normalize_text(product.title),
+        normalize_text(categories),
+        normalize_text(product.description),
+    )
+
+
+def index_products(product_ids: Iterable[int]) -> None:
+    products = Product.objects.filter(id__in=list(product_ids)) \
+        .only('id', 'title', 'description') \
+        .prefetch_related('category')
+    get_search_backend().index(build_search_document(product) for product in products)
+
+
+_pending = threading.local()
+
+
+def get_pending_product_ids() -> set[int]:
+    """The products the transactions of this thread asked to index and that were not indexed yet."""
+    if not hasattr(_pending, 'product_ids'):
+        _pending.product_ids = set()
+    return _pending.product_ids
+
+
+def index_pending_products() -> None:
+    product_ids = get_pending_product_ids()
+    if product_ids:
+        pending_ids = list(product_ids)
+        product_ids.clear()
+        index_products(pending_ids)
+
+
+def index_products_on_commit(product_ids: Iterable[int]) -> None:
+    """
+    Indexes the products once the current transaction commits. Every product is indexed once, however many
+    saves and category changes of the transaction (e.g. an admin form with its categories) asked for it:
+    the first callback indexes all of them and the others find nothing left.
+    """
+    get_pending_product_ids().update(product_ids)
+    transaction.on_commit(index_pending_products)
+
+
+def remove_products_from_index(product_ids: Iterable[int]) -> None:
+    get_search_backend().remove(list(product_ids))
+
+
+def search_products(queryset: QuerySet, query: str) -> QuerySet:
+    terms = get_search_terms(query)
+    if not terms:
+        return queryset
+    return get_search_backend().search(queryset, terms)
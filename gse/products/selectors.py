@@ -1,5 +1,14 @@
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import CharField, Count, F, Max, Min, Prefetch, Q, QuerySet, Value
+from django.db.models.functions import Cast
+
 from .choices import MEDIA_TYPE_IMAGE
-from .models import Product, ProductMedia, ProductDetail, ProductCategory, ProductReview
+from .models import MediaBlob, Product, ProductMedia, ProductDetail, ProductCategory, ProductReview
+
+CATEGORY_TREE_CACHE_KEY = 'products:category-tree'
+CATEGORY_TREE_CACHE_TIMEOUT = 60 * 60
+RELATED_PRODUCTS_LIMIT = 12
 
 
 def get_sub_categories(parent_id: int) -> list[ProductCategory]:
@@ -10,19 +19,154 @@ def get_parent_categories() -> list[ProductCategory]:
     return ProductCategory.objects.filter(is_sub=False)
 
 
+def get_parent_categories_with_sub_categories() -> list[ProductCategory]:
+    return get_parent_categories().prefetch_related(
+        Prefetch('s_category', queryset=ProductCategory.objects.filter(is_sub=True), to_attr='prefetched_sub_categories')
+    )
+
+
+def filter_products_by_category_tree(queryset: QuerySet, category: ProductCategory) -> QuerySet:
+    """
+    Filters products that belong to `category` or any of its descendants, using the indexed materialized path.
+    """
+    product_ids = Product.category.through.objects \
+        .filter(productcategory__path__startswith=category.path) \
+        .values('product_id')
+    return queryset.filter(id__in=product_ids)
+
+
+def filter_products_by_specs(queryset: QuerySet, specs: dict[str, list[str]]) -> QuerySet:
+    """
+    Filters products having, for every attribute of `specs`, one of its values.
+    On PostgreSQL these are containment queries on the GIN indexed `Product.specs`, elsewhere
+    each attribute is a subquery served by the `(attribute, value, product)` index.
+    """
+    if connection.vendor == 'postgresql':
+        for attribute, values in specs.items():
+            contains_any = Q()
+            for value in values:
+                contains_any |= Q(specs__contains={attribute: [value]})
+            queryset = queryset.filter(contains_any)
+        return queryset
+
+    for attribute, values in specs.items():
+        product_ids = ProductDetail.objects.order_by() \
+            .filter(attribute=attribute, value__in=values) \
+            .values('product_id')
+        queryset = queryset.filter(id__in=product_ids)
+    return queryset
+
+
+def get_product_facets(queryset: QuerySet) -> dict:
+    """
+    Returns the price range and the category/spec value counts of the products in `queryset`.
+    The counts of both facets come from one grouped `UNION` query.
+    """
+    product_ids = queryset.order_by().values('id')
+    spec_counts = ProductDetail.objects.order_by() \
+        .filter(product_id__in=product_ids) \
+        .values(facet=Value('spec'), key=F('attribute'), label=F('value')) \
+        .annotate(count=Count('product_id', distinct=True))
+    category_counts = Product.category.through.objects.order_by() \
+        .filter(product_id__in=product_ids) \
+        .values(
+            facet=Value('category'),
+            key=Cast('productcategory_id', output_field=CharField()),
+            label=F('productcategory__title')
+        ) \
+        .annotate(count=Count('product_id', distinct=True))
+
+    facets = {'price': queryset.order_by().aggregate(min=Min('final_price'), max=Max('final_price'))}
+    categories, specs = [], {}
+    for row in spec_counts.union(category_counts, all=True).order_by('facet', 'key', '-count'):
+        if row['facet'] == 'category':
+            categories.append({'id': int(row['key']), 'title': row['label'], 'count': row['count']})
+        else:
+            specs.setdefault(row['key'], []).append({'value': row['label'], 'count': row['count']})
+    facets['categories'] = categories
+    facets['specs'] = [{'attribute': attribute, 'values': values} for attribute, values in specs.items()]
+    return facets
+
+
+def build_category_tree() -> list[dict]:
+    categories = list(
+        ProductCategory.objects.order_by('depth', 'title').values('id', 'title', 'slug', 'path', 'sub_category_id')
+    )
+    nodes = {category['id']: {**category, 'products': set(), 'children': []} for category in categories}
+
+    memberships = Product.category.through.objects.values_list('productcategory__path', 'product_id')
+    for path, product_id in memberships.iterator():
+        for ancestor_id in filter(None, path.split('/')):
+            node = nodes.get(int(ancestor_id))
+            if node is not None:
+                node['products'].add(product_id)
+
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node['sub_category_id'])
+        (parent['children'] if parent else roots).append(node)
+
+    def serialize(node: dict) -> dict:
+        return {
+            'id': node['id'],
+            'title': node['title'],
+            'slug': node['slug'],
+            'products_count': len(node['products']),
+            'children': [serialize(child) for child in node['children']],
+        }
+
+    return [serialize(root) for root in roots]
+
+
+def get_category_tree() -> list[dict]:
+    return cache.get_or_set(CATEGORY_TREE_CACHE_KEY, build_category_tree, CATEGORY_TREE_CACHE_TIMEOUT)
+
+
 def get_all_categories() -> list[ProductCategory]:
     return ProductCategory.objects.all()
 
 
-def get_primary_image(product: Product) -> ProductMedia:
-    media: ProductMedia | None = product.media.filter(is_primary=True, media_type=MEDIA_TYPE_IMAGE).first()
-    if media is None:
-        return product.media.filter(media_type=MEDIA_TYPE_IMAGE).first()
-    return media
+def primary_image_prefetch(lookup: str = 'media') -> Prefetch:
+    """
+    Prefetches the images of the products reached by `lookup`, primary image first,
+    so `get_primary_image` can resolve a whole page of products with a single query.
+    """
+    return Prefetch(
+        lookup,
+        queryset=ProductMedia.objects.filter(media_type=MEDIA_TYPE_IMAGE).order_by('-is_primary', '-created_date'),
+        to_attr='prefetched_images'
+    )
+
+
+def get_primary_image(product: Product) -> ProductMedia | None:
+    if hasattr(product, 'prefetched_images'):
+        return product.prefetched_images[0] if product.prefetched_images else None
+
+    # kept on the product, serializers ask for it more than once.
+    if not hasattr(product, '_primary_image'):
+        media: ProductMedia | None = product.media.filter(is_primary=True, media_type=MEDIA_TYPE_IMAGE).first()
+        if media is None:
+            media = product.media.filter(media_type=MEDIA_TYPE_IMAGE).first()
+        product._primary_image = media
+    return product._primary_image
 
 
 def get_all_products() -> list[Product]:
-    return Product.objects.prefetch_related('media', 'details', 'category').all()
+    return Product.objects.prefetch_related('media', 'category', primary_image_prefetch()).all()
+
+
+def get_all_products_with_details() -> list[Product]:
+    return get_all_products().prefetch_related('details')
+
+
+def get_related_products(product_id: int, limit: int = RELATED_PRODUCTS_LIMIT) -> QuerySet:
+    """
+    Returns the products most often bought together with a product, best first.
+    They are read from the start of the product's range of `product_co_purchase_score_idx`.
+    """
+    return Product.objects.prefetch_related('category', primary_image_prefetch()) \
+        .filter(co_purchased_with__product_id=product_id) \
+        .order_by('-co_purchased_with__score', 'co_purchased_with__related_product_id')[:limit]
 
 
 def get_product_by_id(product_id: int) -> list[Product]:
@@ -33,6 +177,10 @@ def get_products_for_update_by_ids(product_ids: list[int]) -> dict[int, Product]
     return Product.objects.filter(id__in=product_ids).select_for_update().in_bulk()
 
 
+def get_product_details(product_id: int) -> list[ProductDetail]:
+    return ProductDetail.objects.filter(product_id=product_id).order_by('id')
+
+
 def get_all_details() -> list[ProductDetail]:
     return ProductDetail.objects.select_related('product').all()
 
@@ -51,3 +199,8 @@ def get_all_reviews() -> list[ProductReview]:
 
 def get_review_by_id(review_id: int) -> ProductReview:
     return ProductReview.objects.filter(id=review_id).first()
+
+
+def get_referenced_blob_names(names: list[str]) -> set[str]:
+    """Returns the names that belong to a blob, e.g. content uploaded again after its last reference was deleted."""
+    return set(MediaBlob.objects.filter(name__in=names).values_list('name', flat=True))
@@ -1,11 +1,27 @@
-from django.core.files.images import get_image_dimensions
+from django.db import models
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
-from .choices import MEDIA_TYPE_IMAGE, MEDIA_TYPE_VIDEO
+from .choices import (
+    MEDIA_TYPE_IMAGE,
+    MEDIA_TYPE_VIDEO,
+    MEDIA_ALLOWED_TYPES,
+    MEDIA_IMAGE_EXTENSIONS,
+    MEDIA_VIDEO_EXTENSIONS,
+    MEDIA_MAX_SIZE,
+    IMPORT_FORMAT_CHOICES
+)
+from .filters import ProductFilter
+from .media_inspection import inspect_media, validate_media_inspection
+from .media_urls import MediaUrlField, MediaUrlsListSerializer, MediaUrlsMixin, media_urls_are_signed
 from .models import Product, ProductMedia, ProductCategory, ProductDetail, ProductReview
-from .selectors import get_primary_image, get_parent_categories, get_sub_categories
-from .validators import VideoDurationValidator, validate_file_type
+from .renditions import IMAGE_RENDITION_FORMATS, IMAGE_RENDITION_SIZES, get_image_rendition_names, get_smallest_rendition
+from .selectors import (
+    get_primary_image,
+    get_parent_categories,
+    get_sub_categories
+)
+from .uploads import MEDIA_UPLOAD_MAX_PARTS, load_media_upload
 
 
 class ProductReviewSerializer(serializers.ModelSerializer):
@@ -36,6 +52,10 @@ class ProductCategoryWriteSerializer(serializers.ModelSerializer):
         sub_category = attrs.get('sub_category')
         if is_sub and not sub_category:
             raise serializers.ValidationError({'sub_category': 'این فیلد الزامی است.'})
+        if sub_category and self.instance and sub_category.path.startswith(self.instance.path):
+            raise serializers.ValidationError(
+                {'sub_category': 'یک دسته بندی نمیتواند زیرمجموعه خودش یا زیرمجموعه هایش باشد.'}
+            )
         return super().validate(attrs)
 
 
@@ -44,7 +64,10 @@ class ProductCategoryReadSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(ProductCategoryWriteSerializer(many=True))
     def get_sub_categories(self, obj):
-        sub_categories = get_sub_categories(obj.id)
+        if hasattr(obj, 'prefetched_sub_categories'):
+            sub_categories = obj.prefetched_sub_categories
+        else:
+            sub_categories = get_sub_categories(obj.id)
         return ProductCategoryWriteSerializer(sub_categories, many=True).data
 
     class Meta:
@@ -52,50 +75,130 @@ class ProductCategoryReadSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class ProductMediaSerializer(serializers.ModelSerializer):
+class CategoryTreeNodeSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    slug = serializers.CharField()
+    products_count = serializers.IntegerField()
+    children = serializers.ListField(child=serializers.DictField())
+
+
+class CategoryTreeSerializer(serializers.Serializer):
+    data = CategoryTreeNodeSerializer(many=True)
+
+
+class ProductMediaSerializer(MediaUrlsMixin, serializers.ModelSerializer):
+    serializer_field_mapping = {**serializers.ModelSerializer.serializer_field_mapping, models.FileField: MediaUrlField}
+    renditions = serializers.SerializerMethodField(read_only=True)
+    stream = serializers.SerializerMethodField(read_only=True)
+
+    def get_media_names(self, obj) -> list[str]:
+        if obj is None:
+            return []
+        renditions = obj.renditions or {}
+        if renditions.get('source') != obj.media.name:
+            return [obj.media.name]
+        names = [obj.media.name, *get_image_rendition_names(renditions)]
+        if 'hls' in renditions and not media_urls_are_signed():
+            names += [renditions['hls']['manifest'], renditions['hls']['poster']]
+        return names
+
+    def get_renditions(self, obj) -> dict:
+        renditions = obj.renditions or {}
+        if renditions.get('source') != obj.media.name:
+            return {}
+        return {
+            size_name: {
+                'width': renditions[size_name]['width'],
+                'height': renditions[size_name]['height'],
+                **{
+                    extension: self.get_media_url(renditions[size_name][extension])
+                    for extension in IMAGE_RENDITION_FORMATS
+                },
+            }
+            for size_name in IMAGE_RENDITION_SIZES
+            if size_name in renditions
+        }
+
+    def get_stream(self, obj) -> dict | None:
+        renditions = obj.renditions or {}
+        if renditions.get('source') != obj.media.name or 'hls' not in renditions or media_urls_are_signed():
+            return None
+        return {
+            'manifest': self.get_media_url(renditions['hls']['manifest']),
+            'poster': self.get_media_url(renditions['hls']['poster']),
+        }
+
     class Meta:
         model = ProductMedia
         exclude = ('product',)
+        list_serializer_class = MediaUrlsListSerializer
         read_only_fields = ('media_type',)
 
     def validate(self, attrs):
-        allowed_types = {
-            'images': ['image/jpeg', 'image/png', 'image/jpg', 'image/gif'],
-            'videos': ['video/mp4']
-        }
         is_primary = attrs.get('is_primary')
         media = attrs.get('media')
-        max_media_size = 500 * 1024 * 1024
-        media_type = validate_file_type(media, allowed_types)
+        if media is None and self.instance is not None:
+            # the file is not replaced, it was inspected when it was uploaded.
+            if self.instance.media_type == MEDIA_TYPE_VIDEO and is_primary:
+                raise serializers.ValidationError("ویدیو نمیتواند به عنوان رسانه اصلی استفاده شود.")
+            return attrs
 
-        if media_type is None:
-            raise serializers.ValidationError({'media': 'نوع رسانه مجاز نمیباشد.'})
+        # computed once and attached to the upload, `ProductMedia.clean()` reuses it on save.
+        inspection = inspect_media(media)
+        validate_media_inspection(inspection, is_primary=is_primary)
 
-        if media_type == MEDIA_TYPE_IMAGE and not media.name.lower().endswith(('.png', '.jpg', '.jpeg', '.gif')):
-            raise serializers.ValidationError('اگر نوع رسانه عکس انتخاب شده، فایل آپلود شده باید عکس باشد.')
+        attrs['media_type'] = inspection.media_type
+        return attrs
 
-        if media_type == MEDIA_TYPE_VIDEO and not media.name.lower().endswith(('.mp4',)):
-            raise serializers.ValidationError("اگر نوع رسانه ویدیو انتخاب شده، فایل آپلود شده باید ویدیو باشد.")
 
-        if media_type == MEDIA_TYPE_IMAGE:
-            h, w = get_image_dimensions(media)
-            if not 900 <= w <= 1000:
-                raise serializers.ValidationError('عرض عکس باید بین ۹۰۰ تا ۱۰۰۰ پیکسل باشد.')
+class MediaUploadInitiateSerializer(serializers.Serializer):
+    file_name = serializers.CharField(max_length=200)
+    content_type = serializers.ChoiceField(choices=MEDIA_ALLOWED_TYPES['images'] + MEDIA_ALLOWED_TYPES['videos'])
+    size = serializers.IntegerField(min_value=1, max_value=MEDIA_MAX_SIZE)
 
-            if not 900 <= h <= 1000:
-                raise serializers.ValidationError('طول عکس باید بین ۹۰۰ تا ۱۰۰۰ پیکسل باشد.')
+    def validate(self, attrs):
+        file_name = attrs['file_name'].lower()
+        if attrs['content_type'] in MEDIA_ALLOWED_TYPES['images']:
+            media_type, extensions = MEDIA_TYPE_IMAGE, MEDIA_IMAGE_EXTENSIONS
+        else:
+            media_type, extensions = MEDIA_TYPE_VIDEO, MEDIA_VIDEO_EXTENSIONS
+        if not file_name.endswith(extensions):
+            raise serializers.ValidationError({'file_name': 'پسوند فایل با نوع رسانه مطابقت ندارد.'})
+        attrs['media_type'] = media_type
+        return attrs
 
-        if media.size > max_media_size:
-            raise serializers.ValidationError('حجم فایل باید کمتر از ۵۰۰ مگابایت باشد.')
 
-        if media_type == MEDIA_TYPE_VIDEO and is_primary:
-            raise serializers.ValidationError("ویدیو نمیتواند به عنوان رسانه اصلی استفاده شود.")
+class MediaUploadTokenSerializer(serializers.Serializer):
+    upload_token = serializers.CharField()
 
-        if media_type == MEDIA_TYPE_VIDEO:
-            validator = VideoDurationValidator(max_duration=600)
-            validator(media)
+    def validate_upload_token(self, value):
+        upload = load_media_upload(value, self.context['product'].id)
+        if upload is None:
+            raise serializers.ValidationError('توکن آپلود نامعتبر یا منقضی شده است.')
+        return upload
 
-        attrs['media_type'] = media_type
+
+class MediaUploadPartsSerializer(MediaUploadTokenSerializer):
+    part_numbers = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=MEDIA_UPLOAD_MAX_PARTS),
+        allow_empty=False,
+        max_length=100
+    )
+
+
+class MediaUploadPartSerializer(serializers.Serializer):
+    part_number = serializers.IntegerField(min_value=1, max_value=MEDIA_UPLOAD_MAX_PARTS)
+    etag = serializers.CharField(max_length=100)
+
+
+class MediaUploadCompleteSerializer(MediaUploadTokenSerializer):
+    parts = MediaUploadPartSerializer(many=True, allow_empty=False)
+    is_primary = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if attrs['upload_token']['media_type'] == MEDIA_TYPE_VIDEO and attrs['is_primary']:
+            raise serializers.ValidationError("ویدیو نمیتواند به عنوان رسانه اصلی استفاده شود.")
         return attrs
 
 
@@ -121,10 +224,10 @@ class ProductDetailsSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
-        fields = '__all__'
+        exclude = ('search_vector',)
 
 
-class ProductListSerializer(serializers.ModelSerializer):
+class ProductListSerializer(MediaUrlsMixin, serializers.ModelSerializer):
     media = serializers.SerializerMethodField(read_only=True)
     overall_rate = serializers.SerializerMethodField(read_only=True)
     category = serializers.SlugRelatedField(
@@ -136,13 +239,24 @@ class ProductListSerializer(serializers.ModelSerializer):
     def get_overall_rate(self, obj) -> float:
         return obj.overall_rate
 
+    def get_media_names(self, obj) -> list[str]:
+        return ProductMediaSerializer().get_media_names(get_primary_image(obj))
+
     def get_media(self, obj) -> ProductMediaSerializer:
         image = get_primary_image(obj)
-        return ProductMediaSerializer(instance=image).data
+        data = ProductMediaSerializer(instance=image, context=self.context).data
+        data['media_webp'] = None
+        rendition = get_smallest_rendition(image) if image is not None else None
+        if rendition is not None:
+            # list payloads only need a thumbnail instead of the full size original.
+            data['media'] = self.get_media_url(rendition['jpeg'])
+            data['media_webp'] = self.get_media_url(rendition['webp'])
+        return data
 
     class Meta:
         model = Product
-        fields = '__all__'
+        exclude = ('search_vector',)
+        list_serializer_class = MediaUrlsListSerializer
 
 
 class ProductOperationsSerializer(serializers.ModelSerializer):
@@ -163,5 +277,64 @@ class ProductOperationsSerializer(serializers.ModelSerializer):
 class ProductUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
-        fields = '__all__'
+        exclude = ('search_vector',)
         read_only_fields = ('final_price',)
+
+
+class ProductImportRowSerializer(serializers.ModelSerializer):
+    details = ProductDetailSerializer(many=True, required=False)
+    categories = serializers.ListField(child=serializers.CharField(max_length=200), required=False)
+
+    class Meta:
+        model = Product
+        fields = (
+            'sku', 'title', 'quantity', 'description', 'available', 'unit_price', 'discount_percent', 'categories',
+            'details'
+        )
+        # rows are upserted by sku, so an existing sku is not an error.
+        extra_kwargs = {'sku': {'validators': []}}
+
+
+class ProductImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=IMPORT_FORMAT_CHOICES, required=False)
+
+    def validate(self, attrs):
+        if 'format' not in attrs:
+            extension = attrs['file'].name.rsplit('.', 1)[-1].lower()
+            if extension not in dict(IMPORT_FORMAT_CHOICES):
+                raise serializers.ValidationError({'format': 'فرمت فایل قابل تشخیص نیست، آن را مشخص کنید.'})
+            attrs['format'] = extension
+        return attrs
+
+
+# keeps a changed price well within the 15 digits of the price columns.
+PRICE_CHANGE_AMOUNT_LIMIT = 10 ** 12
+
+
+class ProductBulkPriceUpdateSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    category = serializers.PrimaryKeyRelatedField(queryset=ProductCategory.objects.all(), required=False)
+    filters = serializers.DictField(required=False, help_text='Same filters as the products list.')
+    price_change_percent = serializers.IntegerField(min_value=-100, max_value=1000, required=False)
+    price_change_amount = serializers.IntegerField(
+        min_value=-PRICE_CHANGE_AMOUNT_LIMIT,
+        max_value=PRICE_CHANGE_AMOUNT_LIMIT,
+        required=False
+    )
+    discount_percent = serializers.IntegerField(min_value=0, max_value=100, required=False)
+
+    def validate_filters(self, value):
+        filterset = ProductFilter(data=value, queryset=Product.objects.none())
+        if not filterset.is_valid():
+            raise serializers.ValidationError(filterset.errors)
+        return value
+
+    def validate(self, attrs):
+        if not attrs.keys() & {'ids', 'category', 'filters'}:
+            raise serializers.ValidationError('محصولات مورد نظر را با شناسه، دسته بندی یا فیلتر مشخص کنید.')
+        if not attrs.keys() & {'price_change_percent', 'price_change_amount', 'discount_percent'}:
+            raise serializers.ValidationError('هیچ تغییری در قیمت یا تخفیف ارسال نشده.')
+        if {'price_change_percent', 'price_change_amount'} <= attrs.keys():
+            raise serializers.ValidationError('تغییر درصدی و مقداری قیمت را همزمان نمیتوان اعمال کرد.')
+        return attrs
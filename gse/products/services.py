@@ -1,26 +1,82 @@
-import boto3
+from decimal import Decimal
+
 from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models import Count, F, Max, Q, QuerySet, Value
+from django.db.models.functions import Floor, Greatest
+from django.utils import timezone
 
 from gse.utils import Singleton
-from .models import Product, ProductCategory, ProductDetail
+from gse.utils.caching import bump_cache_version, CACHE_NAMESPACE_PRODUCTS
+from gse.utils.storages import get_s3_client
+from .filters import ProductFilter
+from .models import Campaign, Product, ProductCategory, ProductDetail, ProductReview, final_price_expression
+from .selectors import CATEGORY_TREE_CACHE_KEY, filter_products_by_category_tree
 
 
 class Bucket(metaclass=Singleton):
+    """
+    Operations the storage api lacks. Nothing is connected until the first call,
+    which builds the process wide client shared with the default storage.
+    """
+
     def __init__(self):
-        session = boto3.session.Session()
-        self.connection = session.client(
-            service_name=settings.AWS_SERVICE_NAME,
-            aws_access_key_id=settings.AWS_S3_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-        )
         self.bucket_name = settings.AWS_STORAGE_BUCKET_NAME
 
+    @property
+    def connection(self):
+        return get_s3_client()
+
     def delete_file_object(self, key):
         self.connection.delete_object(Bucket=self.bucket_name, Key=key)
         return True
 
+    def delete_file_objects(self, keys: list[str]) -> list[str]:
+        """Deletes up to 1000 keys in one request and returns the keys that could not be deleted."""
+        response = self.connection.delete_objects(
+            Bucket=self.bucket_name,
+            Delete={'Objects': [{'Key': key} for key in keys], 'Quiet': True}
+        )
+        return [error['Key'] for error in response.get('Errors', [])]
+
+    def head_file_object(self, key) -> dict:
+        return self.connection.head_object(Bucket=self.bucket_name, Key=key)
+
+    def read_file_object(self, key, start: int, end: int) -> bytes:
+        response = self.connection.get_object(Bucket=self.bucket_name, Key=key, Range=f'bytes={start}-{end}')
+        return response['Body'].read()
+
+    def generate_download_url(self, key, expires_in: int = 600) -> str:
+        return self.connection.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.bucket_name, 'Key': key},
+            ExpiresIn=expires_in
+        )
+
+    def create_multipart_upload(self, key, content_type: str) -> str:
+        response = self.connection.create_multipart_upload(Bucket=self.bucket_name, Key=key, ContentType=content_type)
+        return response['UploadId']
+
+    def generate_upload_part_url(self, key, upload_id: str, part_number: int, expires_in: int = 3600) -> str:
+        return self.connection.generate_presigned_url(
+            'upload_part',
+            Params={'Bucket': self.bucket_name, 'Key': key, 'UploadId': upload_id, 'PartNumber': part_number},
+            ExpiresIn=expires_in
+        )
+
+    def complete_multipart_upload(self, key, upload_id: str, parts: list[dict]):
+        self.connection.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={'Parts': [{'PartNumber': part['part_number'], 'ETag': part['etag']} for part in parts]}
+        )
+
+    def abort_multipart_upload(self, key, upload_id: str):
+        self.connection.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+
 
 @transaction.atomic
 def create_product(
@@ -42,8 +98,218 @@ def create_product(
         available=available,
     )
 
-    for category in categories:
-        product.category.add(category)
+    product.category.add(*categories)
 
     product_details = [ProductDetail(**detail, product=product) for detail in details]
     ProductDetail.objects.bulk_create(product_details)
+    refresh_product_specs([product.id])
+
+
+def build_product_specs(product_ids: list[int]) -> dict[int, dict[str, list[str]]]:
+    specs = {product_id: {} for product_id in product_ids}
+    details = ProductDetail.objects.order_by('id') \
+        .filter(product_id__in=product_ids) \
+        .values_list('product_id', 'attribute', 'value')
+    for product_id, attribute, value in details:
+        values = specs[product_id].setdefault(attribute, [])
+        if value not in values:
+            values.append(value)
+    return specs
+
+
+def refresh_product_specs(product_ids: list[int]) -> None:
+    """
+    Rebuilds the `specs` document (`{attribute: [values]}`) of products from their `ProductDetail` rows.
+    """
+    products = [Product(id=product_id, specs=specs) for product_id, specs in build_product_specs(product_ids).items()]
+    Product.objects.bulk_update(products, ['specs'], batch_size=500)
+
+
+@transaction.atomic
+def apply_rating_change(product_id: int, added_rate: int | None = None, removed_rate: int | None = None) -> None:
+    """
+    Applies a single review change to the denormalized rating columns of a product.
+    The product row is locked so concurrent reviews can not lose updates.
+    """
+    product: Product | None = Product.objects.select_for_update() \
+        .only('rating_sum', 'rating_count', 'rating_histogram') \
+        .filter(id=product_id) \
+        .first()
+    if product is None:
+        return
+
+    histogram = dict(product.rating_histogram)
+    if removed_rate is not None:
+        product.rating_sum -= removed_rate
+        product.rating_count -= 1
+        histogram[str(removed_rate)] = histogram.get(str(removed_rate), 0) - 1
+    if added_rate is not None:
+        product.rating_sum += added_rate
+        product.rating_count += 1
+        histogram[str(added_rate)] = histogram.get(str(added_rate), 0) + 1
+
+    Product.objects.filter(id=product_id).update(
+        rating_sum=product.rating_sum,
+        rating_count=product.rating_count,
+        rating_histogram={rate: count for rate, count in histogram.items() if count > 0},
+    )
+
+
+def compute_rating_aggregates() -> dict[int, dict]:
+    aggregates: dict[int, dict] = {}
+    rows = ProductReview.objects.order_by().values('product_id', 'rate').annotate(count=Count('id'))
+    for row in rows:
+        aggregate = aggregates.setdefault(
+            row['product_id'],
+            {'rating_sum': 0, 'rating_count': 0, 'rating_histogram': {}}
+        )
+        aggregate['rating_sum'] += row['rate'] * row['count']
+        aggregate['rating_count'] += row['count']
+        aggregate['rating_histogram'][str(row['rate'])] = row['count']
+    return aggregates
+
+
+def reconcile_product_ratings(batch_size: int = 500, dry_run: bool = False) -> int:
+    """
+    Recomputes the rating columns of every product from its reviews and fixes the ones that drifted.
+    Returns the number of products that were out of sync.
+    """
+    empty = {'rating_sum': 0, 'rating_count': 0, 'rating_histogram': {}}
+    aggregates = compute_rating_aggregates()
+    fields = ['rating_sum', 'rating_count', 'rating_histogram']
+
+    stale_products = []
+    products = Product.objects.order_by().only(*fields)
+    for product in products.iterator(chunk_size=batch_size):
+        expected = aggregates.get(product.id, empty)
+        if all(getattr(product, field) == expected[field] for field in fields):
+            continue
+        for field in fields:
+            setattr(product, field, expected[field])
+        stale_products.append(product)
+
+    if not dry_run:
+        Product.objects.bulk_update(stale_products, fields, batch_size=batch_size)
+    return len(stale_products)
+
+
+def invalidate_category_tree() -> None:
+    transaction.on_commit(lambda: cache.delete(CATEGORY_TREE_CACHE_KEY))
+
+
+def get_bulk_update_products(
+        ids: list[int] | None = None,
+        category: ProductCategory | None = None,
+        filters: dict | None = None,
+) -> QuerySet:
+    """Returns the products matching all the given selections, `filters` are those of the products list."""
+    products = Product.objects.all()
+    if ids is not None:
+        products = products.filter(id__in=ids)
+    if category is not None:
+        products = filter_products_by_category_tree(products, category)
+    if filters is not None:
+        products = ProductFilter(data=filters, queryset=products).qs
+    return products
+
+
+# the largest value that fits in the price columns.
+MAX_PRICE = 10 ** Product._meta.get_field('unit_price').max_digits - 1
+
+
+@transaction.atomic
+def bulk_update_prices(
+        ids: list[int] | None = None,
+        category: ProductCategory | None = None,
+        filters: dict | None = None,
+        price_change_percent: int | None = None,
+        price_change_amount: int | None = None,
+        discount_percent: int | None = None,
+) -> int:
+    """
+    Changes the unit price (by a percentage or a fixed amount) and/or sets the discount of every product
+    selected by `ids`, `category` and `filters`, recomputing `final_price` in the same single `UPDATE`.
+    Returns the number of updated products, raises `ValidationError` if a changed price would not fit in its column.
+    """
+    products = get_bulk_update_products(ids, category, filters)
+    if (price_change_percent or 0) > 0 or (price_change_amount or 0) > 0:
+        highest_price = products.aggregate(highest=Max('unit_price'))['highest'] or 0
+        if price_change_percent is not None:
+            highest_price = (highest_price * (100 + price_change_percent) + 50) // 100
+        else:
+            highest_price += price_change_amount
+        if highest_price > MAX_PRICE:
+            raise ValidationError('قیمت جدید برخی از محصولات از حداکثر قیمت مجاز بیشتر می شود.')
+    unit_price = F('unit_price')
+    if price_change_percent is not None:
+        unit_price = Greatest(Floor((unit_price * (100 + price_change_percent) + 50) / 100), Value(Decimal(0)))
+    elif price_change_amount is not None:
+        unit_price = Greatest(unit_price + price_change_amount, Value(Decimal(0)))
+    discount = F('discount_percent') if discount_percent is None else Value(discount_percent)
+
+    updated_count = products.order_by().update(
+        unit_price=unit_price,
+        discount_percent=discount,
+        final_price=final_price_expression(unit_price, discount),
+        updated_date=timezone.now(),
+    )
+    bump_cache_version(CACHE_NAMESPACE_PRODUCTS)
+    return updated_count
+
+
+def sync_campaign_prices(force: bool = False) -> dict[str, int]:
+    """
+    Activates the campaigns that started and deactivates the ones that ended, then rewrites the campaign discount
+    and `final_price` of the products they touch with one `UPDATE` per running campaign.
+    Nothing is written unless a campaign changed state or `force` is set (e.g. after a campaign was edited).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        campaigns = list(Campaign.objects.select_for_update().order_by('id'))
+        running = [campaign for campaign in campaigns if campaign.starts_at <= now < campaign.ends_at]
+        activated = [campaign.id for campaign in running if not campaign.is_active]
+        deactivated = [campaign.id for campaign in campaigns if campaign.is_active and campaign not in running]
+        if not (activated or deactivated or force):
+            return {'activated': 0, 'deactivated': 0}
+
+        # products of ended campaigns are the ones currently discounted, so resetting those and
+        # the targets of the running campaigns covers every product whose price may change.
+        reset_products = Q(campaign_discount_percent__gt=0)
+        for campaign in running:
+            reset_products |= Q(id__in=campaign.get_products().values('id'))
+        Product.objects.filter(reset_products).update(
+            campaign_discount_percent=0,
+            final_price=final_price_expression(campaign_discount_percent=Value(0)),
+        )
+
+        for campaign in running:
+            campaign_discount = Greatest(F('campaign_discount_percent'), Value(campaign.discount_percent))
+            campaign.get_products().update(
+                campaign_discount_percent=campaign_discount,
+                final_price=final_price_expression(campaign_discount_percent=campaign_discount),
+            )
+
+        Campaign.objects.filter(id__in=activated).update(is_active=True)
+        Campaign.objects.filter(id__in=deactivated).update(is_active=False)
+        bump_cache_version(CACHE_NAMESPACE_PRODUCTS)
+    return {'activated': len(activated), 'deactivated': len(deactivated)}
+
+
+def sync_product_campaign_prices(product_ids) -> None:
+    """
+    Rewrites the campaign discount and `final_price` of the given products from the active campaigns,
+    e.g. after the products were moved into or out of a campaign category.
+    """
+    with transaction.atomic():
+        products = Product.objects.filter(id__in=product_ids)
+        products.filter(campaign_discount_percent__gt=0).update(
+            campaign_discount_percent=0,
+            final_price=final_price_expression(campaign_discount_percent=Value(0)),
+        )
+        for campaign in Campaign.objects.filter(is_active=True).order_by('id'):
+            campaign_discount = Greatest(F('campaign_discount_percent'), Value(campaign.discount_percent))
+            campaign.get_products().filter(id__in=product_ids).update(
+                campaign_discount_percent=campaign_discount,
+                final_price=final_price_expression(campaign_discount_percent=campaign_discount),
+            )
+        bump_cache_version(CACHE_NAMESPACE_PRODUCTS)
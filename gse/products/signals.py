@@ -1,11 +1,197 @@
-from django.db.models.signals import pre_delete
+from django.db import transaction
+from django.db.models.signals import pre_delete, pre_save, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 
-from gse.products.models import ProductMedia
-from .tasks import delete_product_picture
+from gse.products.models import Campaign, Product, ProductCategory, ProductDetail, ProductMedia, ProductReview
+from gse.utils.caching import (
+    bump_cache_version,
+    CACHE_NAMESPACE_PRODUCTS,
+    CACHE_NAMESPACE_CATEGORIES,
+    CACHE_NAMESPACE_REVIEWS
+)
+from .media_blobs import release_media_files, release_replaced_media_files, store_media_file
+from .search import index_products_on_commit, remove_products_from_index
+from .services import apply_rating_change, invalidate_category_tree, refresh_product_specs
+from .tasks import (
+    generate_media_renditions,
+    schedule_media_deletions,
+    schedule_orphaned_blob_check,
+    schedule_ranking_refresh,
+    sync_campaigns,
+    sync_product_campaigns
+)
 
 
-@receiver(pre_delete, sender=ProductMedia)
+@receiver(pre_save, sender=ProductMedia)
+def store_media_blob(sender, instance, raw=False, **kwargs):
+    if not raw:
+        stored_name = store_media_file(instance)
+        if stored_name:
+            # there is no rollback hook, the file is deleted later if its blob row was not committed.
+            schedule_orphaned_blob_check(stored_name)
+
+
+@receiver(post_save, sender=ProductMedia)
+def delete_replaced_media_files(sender, instance, **kwargs):
+    names = release_replaced_media_files(instance)
+    if names:
+        transaction.on_commit(lambda: schedule_media_deletions(names))
+
+
+@receiver(post_delete, sender=ProductMedia)
 def delete_media_files(sender, instance, **kwargs):
-    if instance.media:
-        delete_product_picture.delay(instance.media.name)
+    # the blob can only be released once no row references it.
+    names = release_media_files(instance)
+    # files of rolled back deletions are kept.
+    transaction.on_commit(lambda: schedule_media_deletions(names))
+
+
+@receiver(post_save, sender=ProductMedia)
+def schedule_media_renditions(sender, instance, **kwargs):
+    if instance.media and instance.renditions.get('source') != instance.media.name:
+        transaction.on_commit(lambda: generate_media_renditions.delay(instance.id))
+
+
+@receiver(pre_save, sender=ProductReview)
+def remember_previous_rate(sender, instance, **kwargs):
+    instance._previous_rating = None
+    if instance.pk is not None:
+        instance._previous_rating = ProductReview.objects.filter(pk=instance.pk) \
+            .values_list('product_id', 'rate') \
+            .first()
+
+
+@receiver(post_save, sender=ProductReview)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_rating', None)
+    with transaction.atomic():
+        if previous is None:
+            apply_rating_change(instance.product_id, added_rate=instance.rate)
+        elif previous[0] != instance.product_id:
+            apply_rating_change(previous[0], removed_rate=previous[1])
+            apply_rating_change(instance.product_id, added_rate=instance.rate)
+        elif previous[1] != instance.rate:
+            apply_rating_change(instance.product_id, added_rate=instance.rate, removed_rate=previous[1])
+
+
+@receiver(post_delete, sender=ProductReview)
+def update_rating_on_delete(sender, instance, **kwargs):
+    apply_rating_change(instance.product_id, removed_rate=instance.rate)
+
+
+@receiver([post_save, post_delete], sender=ProductReview)
+def refresh_review_rankings(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_rating', None)
+    product_ids = {instance.product_id, previous[0] if previous else None}
+    transaction.on_commit(lambda: schedule_ranking_refresh(product_ids))
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'title', 'description'} & set(update_fields):
+        return
+    index_products_on_commit([instance.id])
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_index(sender, instance, **kwargs):
+    remove_products_from_index([instance.id])
+    invalidate_category_tree()
+
+
+def resync_product_campaigns(product_ids: list[int]) -> None:
+    """Reapplies the running campaigns to products whose categories changed, once the transaction has committed."""
+    if product_ids and Campaign.objects.filter(is_active=True).exists():
+        transaction.on_commit(lambda: sync_product_campaigns.delay(product_ids))
+
+
+@receiver(m2m_changed, sender=Product.category.through)
+def sync_product_categories(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._cleared_product_ids = list(instance.products.values_list('id', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    invalidate_category_tree()
+    if not reverse:
+        product_ids = [instance.id]
+    elif action == 'post_clear':
+        product_ids = getattr(instance, '_cleared_product_ids', [])
+    else:
+        product_ids = list(pk_set)
+    index_products_on_commit(product_ids)
+    resync_product_campaigns(product_ids)
+
+
+@receiver(pre_save, sender=ProductCategory)
+def remember_previous_title(sender, instance, **kwargs):
+    instance._previous_title = None
+    if instance.pk is not None:
+        instance._previous_title = ProductCategory.objects.filter(pk=instance.pk) \
+            .values_list('title', flat=True) \
+            .first()
+
+
+@receiver(post_save, sender=ProductCategory)
+def index_category_products(sender, instance, created, **kwargs):
+    invalidate_category_tree()
+    if not created and getattr(instance, '_previous_title', None) != instance.title:
+        index_products_on_commit(instance.products.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=ProductCategory)
+def resync_moved_category_campaigns(sender, instance, created, raw=False, **kwargs):
+    # sent before `update_path`, so `path` is still the one stored before the move.
+    if created or raw or not Campaign.objects.filter(is_active=True).exists():
+        return
+    if instance.path != f'{instance.get_parent_path()}{instance.id}/':
+        resync_product_campaigns(list(
+            Product.objects.filter(category__path__startswith=instance.path).values_list('id', flat=True).distinct()
+        ))
+
+
+@receiver(pre_delete, sender=ProductCategory)
+def remember_category_products(sender, instance, **kwargs):
+    instance._product_ids = list(instance.products.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=ProductCategory)
+def index_deleted_category_products(sender, instance, **kwargs):
+    invalidate_category_tree()
+    index_products_on_commit(getattr(instance, '_product_ids', []))
+    resync_product_campaigns(getattr(instance, '_product_ids', []))
+
+
+@receiver([post_save, post_delete], sender=ProductDetail)
+def sync_product_specs(sender, instance, **kwargs):
+    refresh_product_specs([instance.product_id])
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=ProductMedia)
+@receiver([post_save, post_delete], sender=ProductDetail)
+def bump_products_cache_version(sender, **kwargs):
+    bump_cache_version(CACHE_NAMESPACE_PRODUCTS)
+
+
+@receiver([post_save, post_delete], sender=ProductReview)
+def bump_reviews_cache_version(sender, **kwargs):
+    bump_cache_version(CACHE_NAMESPACE_REVIEWS)
+
+
+@receiver([post_save, post_delete], sender=ProductCategory)
+@receiver(m2m_changed, sender=Product.category.through)
+def bump_categories_cache_version(sender, **kwargs):
+    bump_cache_version(CACHE_NAMESPACE_CATEGORIES)
+
+
+@receiver([post_save, post_delete], sender=Campaign)
+def resync_campaigns(sender, **kwargs):
+    transaction.on_commit(lambda: sync_campaigns.delay(force=True))
+
+
+@receiver(m2m_changed, sender=Campaign.products.through)
+@receiver(m2m_changed, sender=Campaign.categories.through)
+def resync_campaigns_on_targets_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(lambda: sync_campaigns.delay(force=True))
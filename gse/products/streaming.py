@@ -0,0 +1,133 @@
+import mimetypes
+import os
+import subprocess
+import tempfile
+from uuid import uuid4
+
+from django.core.files import File
+
+from .media_probe import probe_source
+from .models import ProductMedia
+
+# smallest first, variants taller than the source are skipped (the smallest one is always kept).
+HLS_LADDER = (
+    {'name': '360p', 'height': 360, 'video_bitrate': 800, 'audio_bitrate': 96},
+    {'name': '720p', 'height': 720, 'video_bitrate': 2800, 'audio_bitrate': 128},
+    {'name': '1080p', 'height': 1080, 'video_bitrate': 5000, 'audio_bitrate': 128},
+)
+HLS_SEGMENT_DURATION = 6
+# a keyframe every 2 seconds in every variant, so players can switch at any segment boundary.
+HLS_KEYFRAME_INTERVAL = 2
+HLS_MANIFEST_NAME = 'master.m3u8'
+HLS_POSTER_NAME = 'poster.jpg'
+HLS_POSTER_HEIGHT = 720
+HLS_TRANSCODE_TIMEOUT = 60 * 60
+
+mimetypes.add_type('application/vnd.apple.mpegurl', '.m3u8')
+mimetypes.add_type('video/mp2t', '.ts')
+
+
+def get_ladder(height: int | None) -> list[dict]:
+    ladder = [variant for variant in HLS_LADDER if height is None or variant['height'] <= height]
+    return ladder or [HLS_LADDER[0]]
+
+
+def get_variant_width(variant: dict, width: int | None, height: int | None) -> int:
+    if not width or not height:
+        return round(variant['height'] * 16 / 9 / 2) * 2
+    return round(width * variant['height'] / height / 2) * 2
+
+
+def get_source(media: ProductMedia) -> str:
+    """Returns a local path of the stored video or an url ffmpeg can read it from."""
+    try:
+        return media.media.storage.path(media.media.name)
+    except NotImplementedError:
+        return media.media.storage.url(media.media.name)
+
+
+def build_transcode_command(source: str, output_dir: str, ladder: list[dict], poster_at: float) -> list[str]:
+    """
+    Builds a single ffmpeg run that decodes the source once and encodes every variant of `ladder`
+    as a vod HLS playlist, plus a poster frame taken at `poster_at` seconds.
+    """
+    command = ['ffmpeg', '-v', 'error', '-y', '-i', source]
+    for variant in ladder:
+        video_bitrate = variant['video_bitrate']
+        command += [
+            '-map', '0:v:0', '-map', '0:a:0?',
+            '-vf', f'scale=-2:{variant["height"]}',
+            # 8 bit 4:2:0 is what every hls player decodes, sources may be 4:4:4 or 10 bit.
+            '-c:v', 'libx264', '-preset', 'veryfast', '-profile:v', 'main', '-pix_fmt', 'yuv420p',
+            '-b:v', f'{video_bitrate}k',
+            '-maxrate', f'{round(video_bitrate * 1.07)}k',
+            '-bufsize', f'{round(video_bitrate * 1.5)}k',
+            '-force_key_frames', f'expr:gte(t,n_forced*{HLS_KEYFRAME_INTERVAL})',
+            '-c:a', 'aac', '-ac', '2', '-b:a', f'{variant["audio_bitrate"]}k',
+            '-f', 'hls',
+            '-hls_time', str(HLS_SEGMENT_DURATION),
+            '-hls_playlist_type', 'vod',
+            '-hls_segment_filename', os.path.join(output_dir, f'{variant["name"]}_%03d.ts'),
+            os.path.join(output_dir, f'{variant["name"]}.m3u8'),
+        ]
+    command += [
+        '-map', '0:v:0',
+        '-ss', f'{poster_at:.2f}',
+        '-frames:v', '1',
+        '-vf', f'scale=-2:{HLS_POSTER_HEIGHT}',
+        '-q:v', '3',
+        os.path.join(output_dir, HLS_POSTER_NAME),
+    ]
+    return command
+
+
+def build_master_playlist(ladder: list[dict], width: int | None, height: int | None) -> str:
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3']
+    for variant in ladder:
+        # peak bandwidth in bits per second, with some room for the container overhead.
+        bandwidth = round((variant['video_bitrate'] * 1.07 + variant['audio_bitrate']) * 1000 * 1.1)
+        resolution = f'{get_variant_width(variant, width, height)}x{variant["height"]}'
+        lines += [f'#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={resolution}', f'{variant["name"]}.m3u8']
+    return '\n'.join(lines) + '\n'
+
+
+def generate_streams(media: ProductMedia) -> dict:
+    """
+    Transcodes a video into the HLS variants of `HLS_LADDER` with a poster frame, and stores every file under
+    a folder next to the original, e.g. `clip.mp4` -> `clip_hls_<id>/master.m3u8`. Playlists refer to each
+    other by relative names, so the files are served from one unsigned base url (see `media_urls_are_signed`).
+    """
+    source = get_source(media)
+    probe = probe_source(source)
+    ladder = get_ladder(probe['height'])
+    poster_at = min(1.0, (probe['duration'] or 0) / 2)
+
+    storage = media.media.storage
+    root, _ = os.path.splitext(media.media.name)
+    # unique per run, so stored names are never changed to available ones and the playlists stay valid.
+    prefix = f'{root}_hls_{uuid4().hex[:8]}'
+    with tempfile.TemporaryDirectory() as output_dir:
+        subprocess.run(
+            build_transcode_command(source, output_dir, ladder, poster_at),
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=HLS_TRANSCODE_TIMEOUT,
+        )
+        with open(os.path.join(output_dir, HLS_MANIFEST_NAME), 'w') as manifest:
+            manifest.write(build_master_playlist(ladder, probe['width'], probe['height']))
+
+        files = []
+        for file_name in sorted(os.listdir(output_dir)):
+            with open(os.path.join(output_dir, file_name), 'rb') as file:
+                files.append(storage.save(f'{prefix}/{file_name}', File(file)))
+
+    return {
+        'source': media.media.name,
+        'hls': {
+            'manifest': f'{prefix}/{HLS_MANIFEST_NAME}',
+            'poster': f'{prefix}/{HLS_POSTER_NAME}',
+            'variants': [variant['name'] for variant in ladder],
+            'files': files,
+        },
+    }
@@ -1,10 +1,108 @@
 from celery import shared_task
 
-from .services import Bucket
+from gse.utils.caching import bump_cache_version, CACHE_NAMESPACE_PRODUCTS
+from .choices import MEDIA_TYPE_VIDEO
+from .co_purchases import build_co_purchases
+from .deletions import MEDIA_DELETION_DELAY, flush_media_deletions, queue_media_deletions
+from .media_urls import media_urls_are_signed
+from .models import ProductMedia
+from .rankings import RANKING_REFRESH_DELAY, queue_ranking_refresh, refresh_product_rankings, refresh_queued_rankings
+from .renditions import generate_renditions, get_rendition_names
+from .selectors import get_referenced_blob_names
+from .services import Bucket, sync_campaign_prices, sync_product_campaign_prices
+from .streaming import generate_streams
 
-bucket = Bucket()
+# long enough for the transaction that wrote a blob file to have ended.
+MEDIA_BLOB_ORPHAN_CHECK_DELAY = 60 * 60
+
+
+@shared_task(bind=True, max_retries=5)
+def delete_media_files(self) -> None:
+    failed_count = flush_media_deletions(Bucket(), get_referenced_keys=get_referenced_blob_names)
+    if failed_count:
+        raise self.retry(countdown=30 * 2 ** self.request.retries)
+
+
+def schedule_media_deletions(keys: list[str]) -> None:
+    """
+    Queues storage keys for deletion, call it once the transaction that removed their rows has committed.
+    A burst of deletions is flushed by a single `delete_media_files` task.
+    """
+    if queue_media_deletions(keys):
+        delete_media_files.apply_async(countdown=MEDIA_DELETION_DELAY)
+
+
+@shared_task
+def delete_orphaned_blob_file(name: str) -> None:
+    if not get_referenced_blob_names([name]):
+        schedule_media_deletions([name])
+
+
+def schedule_orphaned_blob_check(name: str) -> None:
+    """
+    Schedules the deletion of a just written blob file in case the transaction of its blob row is rolled back.
+    The file is kept when the row was committed.
+    """
+    delete_orphaned_blob_file.apply_async((name,), countdown=MEDIA_BLOB_ORPHAN_CHECK_DELAY)
+
+
+@shared_task
+def sync_campaigns(force: bool = False) -> dict[str, int]:
+    return sync_campaign_prices(force=force)
+
+
+@shared_task
+def sync_product_campaigns(product_ids: list[int]) -> None:
+    sync_product_campaign_prices(product_ids)
 
 
 @shared_task
-def delete_product_picture(file):
-    bucket.delete_file_object(key=file)
+def update_co_purchases() -> int:
+    return build_co_purchases()
+
+
+@shared_task
+def refresh_rankings() -> int:
+    return refresh_queued_rankings()
+
+
+@shared_task
+def expire_rankings() -> int:
+    """Drops the sales that left the window, queued refreshes only see products with new events."""
+    return refresh_product_rankings()
+
+
+def schedule_ranking_refresh(product_ids) -> None:
+    """
+    Queues products whose orders or reviews changed, call it once the transaction has committed.
+    The events of a burst are refreshed by a single `refresh_rankings` task.
+    """
+    if queue_ranking_refresh(product_ids):
+        refresh_rankings.apply_async(countdown=RANKING_REFRESH_DELAY)
+
+
+@shared_task
+def generate_media_renditions(media_id: int) -> None:
+    """Generates the resized versions of an image or the HLS variants of a video."""
+    media: ProductMedia | None = ProductMedia.objects.filter(id=media_id).first()
+    if media is None or media.renditions.get('source') == media.media.name:
+        return
+
+    if media.media_type == MEDIA_TYPE_VIDEO and media_urls_are_signed(media.media.storage):
+        # the segments of a stream could not be played, the `generate_media_renditions` command
+        # queues the video again once urls are public.
+        return
+
+    stale_names = get_rendition_names(media.renditions)
+    if media.media_type == MEDIA_TYPE_VIDEO:
+        renditions = generate_streams(media)
+    else:
+        renditions = generate_renditions(media)
+    # the file may have been replaced meanwhile, then the new file has its own job.
+    updated = ProductMedia.objects.filter(id=media_id, media=media.media.name).update(renditions=renditions)
+    if not updated:
+        stale_names = get_rendition_names(renditions)
+    else:
+        bump_cache_version(CACHE_NAMESPACE_PRODUCTS)
+
+    schedule_media_deletions(stale_names)
@@ -0,0 +1,2 @@
+# the tests do not need a redis server for the versioned response cache.
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
@@ -0,0 +1,61 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from gse.products.models import Product, ProductCategory, ProductReview
+from gse.users.models import User
+from gse.utils.caching import (
+    get_cache_versions,
+    CACHE_NAMESPACE_CATEGORIES,
+    CACHE_NAMESPACE_PRODUCTS,
+    CACHE_NAMESPACE_REVIEWS
+)
+from . import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class VersionedCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(title='product', quantity=1, description='-', unit_price=1000)
+        self.url = reverse('products:product_retrieve', args=[self.product.id])
+
+    def get_version(self, namespace):
+        return get_cache_versions([namespace])[namespace]
+
+    def assertBumps(self, namespace, write):
+        version = self.get_version(namespace)
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+        self.assertGreater(self.get_version(namespace), version)
+
+    def test_responses_are_cached_until_a_write_commits(self):
+        self.assertEqual(self.client.get(self.url).data['data']['title'], 'product')
+        Product.objects.filter(id=self.product.id).update(title='changed')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).data['data']['title'], 'product')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.title = 'saved'
+            self.product.save()
+        self.assertEqual(self.client.get(self.url).data['data']['title'], 'saved')
+
+    @mock.patch('gse.products.signals.schedule_ranking_refresh')
+    def test_writes_bump_their_namespaces(self, schedule_ranking_refresh):
+        user = User.objects.create_user(email='user@example.com', password='password')
+        category = ProductCategory.objects.create(title='category')
+        self.assertBumps(CACHE_NAMESPACE_PRODUCTS, lambda: self.product.save())
+        self.assertBumps(CACHE_NAMESPACE_CATEGORIES, lambda: self.product.category.add(category))
+        self.assertBumps(CACHE_NAMESPACE_CATEGORIES, lambda: category.save())
+        self.assertBumps(
+            CACHE_NAMESPACE_REVIEWS,
+            lambda: ProductReview.objects.create(product=self.product, owner=user, body='-', rate=5)
+        )
+
+    def test_rolled_back_writes_keep_the_version(self):
+        version = self.get_version(CACHE_NAMESPACE_PRODUCTS)
+        with self.captureOnCommitCallbacks(execute=False):
+            self.product.save()
+        self.assertEqual(self.get_version(CACHE_NAMESPACE_PRODUCTS), version)
@@ -0,0 +1,112 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from gse.products.models import Campaign, Product, ProductCategory
+from gse.products.services import sync_campaign_prices, sync_product_campaign_prices
+from . import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CampaignSyncTest(TestCase):
+    def setUp(self):
+        self.parent = ProductCategory.objects.create(title='parent')
+        self.child = ProductCategory.objects.create(title='child', sub_category=self.parent, is_sub=True)
+        self.product = self.create_product(discount_percent=10)
+        self.categorized = self.create_product()
+        self.categorized.category.add(self.child)
+        self.untouched = self.create_product()
+
+    def create_product(self, **kwargs):
+        return Product.objects.create(title='-', quantity=1, description='-', unit_price=1000, **kwargs)
+
+    def create_campaign(self, discount_percent, starts_in=-1, ends_in=1, products=(), categories=()):
+        now = timezone.now()
+        campaign = Campaign.objects.create(
+            title='campaign', discount_percent=discount_percent,
+            starts_at=now + timedelta(hours=starts_in), ends_at=now + timedelta(hours=ends_in)
+        )
+        campaign.products.set(products)
+        campaign.categories.set(categories)
+        return campaign
+
+    def get_prices(self, product):
+        product.refresh_from_db()
+        return product.campaign_discount_percent, product.final_price
+
+    def test_running_campaigns_are_activated_and_applied(self):
+        campaign = self.create_campaign(30, products=[self.product], categories=[self.parent])
+        self.create_campaign(50, starts_in=1, ends_in=2, products=[self.untouched])
+
+        self.assertEqual(sync_campaign_prices(), {'activated': 1, 'deactivated': 0})
+        campaign.refresh_from_db()
+        self.assertTrue(campaign.is_active)
+        self.assertEqual(self.get_prices(self.product), (30, 700))
+        self.assertEqual(self.get_prices(self.categorized), (30, 700))
+        self.assertEqual(self.get_prices(self.untouched), (0, 1000))
+
+        self.assertEqual(sync_campaign_prices(), {'activated': 0, 'deactivated': 0})
+
+    def test_the_highest_discount_wins(self):
+        self.create_campaign(5, products=[self.product])
+        self.create_campaign(20, products=[self.product])
+        sync_campaign_prices()
+        self.assertEqual(self.get_prices(self.product), (20, 800))
+
+    def test_a_lower_campaign_than_the_product_discount_keeps_it(self):
+        self.create_campaign(5, products=[self.product])
+        sync_campaign_prices()
+        self.assertEqual(self.get_prices(self.product), (5, 900))
+
+    def test_ended_campaigns_are_deactivated_and_reset(self):
+        campaign = self.create_campaign(30, products=[self.product, self.untouched])
+        sync_campaign_prices()
+        Campaign.objects.filter(id=campaign.id).update(ends_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(sync_campaign_prices(), {'activated': 0, 'deactivated': 1})
+        self.assertEqual(self.get_prices(self.product), (0, 900))
+        self.assertEqual(self.get_prices(self.untouched), (0, 1000))
+
+    def test_forced_sync_applies_edited_targets(self):
+        campaign = self.create_campaign(30, products=[self.product])
+        sync_campaign_prices()
+        campaign.products.set([self.untouched])
+
+        self.assertEqual(sync_campaign_prices(force=True), {'activated': 0, 'deactivated': 0})
+        self.assertEqual(self.get_prices(self.product), (0, 900))
+        self.assertEqual(self.get_prices(self.untouched), (30, 700))
+
+    def resync_product_campaigns(self, sync_product_campaigns, change):
+        """Runs `change` and applies the product resyncs it scheduled."""
+        sync_product_campaigns.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        for call in sync_product_campaigns.delay.call_args_list:
+            sync_product_campaign_prices(*call.args)
+        return sync_product_campaigns.delay.called
+
+    @mock.patch('gse.products.signals.sync_product_campaigns')
+    def test_products_moved_into_a_running_campaign_category_are_discounted(self, sync_product_campaigns):
+        self.assertFalse(self.resync_product_campaigns(
+            sync_product_campaigns, lambda: self.untouched.category.add(self.child)
+        ))
+        self.untouched.category.clear()
+        self.create_campaign(30, categories=[self.parent])
+        sync_campaign_prices()
+
+        added = self.create_product()
+        self.resync_product_campaigns(sync_product_campaigns, lambda: added.category.add(self.child))
+        self.assertEqual(self.get_prices(added), (30, 700))
+
+        self.resync_product_campaigns(sync_product_campaigns, lambda: self.child.products.remove(self.categorized))
+        self.assertEqual(self.get_prices(self.categorized), (0, 1000))
+
+        other = ProductCategory.objects.create(title='other')
+        moved = ProductCategory.objects.create(title='moved', sub_category=other, is_sub=True)
+        self.untouched.category.add(moved)
+        moved.sub_category = self.parent
+        self.resync_product_campaigns(sync_product_campaigns, moved.save)
+        self.assertEqual(self.get_prices(self.untouched), (30, 700))
+        self.assertEqual(self.get_prices(self.product), (0, 900))
@@ -0,0 +1,58 @@
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+
+from gse.products.models import Product, ProductCategory
+from gse.products.selectors import build_category_tree, filter_products_by_category_tree
+from . import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CategoryTreeTest(TestCase):
+    def create_category(self, title, parent=None):
+        return ProductCategory.objects.create(title=title, sub_category=parent, is_sub=parent is not None)
+
+    def setUp(self):
+        self.root = self.create_category('root')
+        self.child = self.create_category('child', self.root)
+        self.grandchild = self.create_category('grandchild', self.child)
+        self.other_root = self.create_category('other root')
+
+    def assertPath(self, category, path, depth):
+        category.refresh_from_db()
+        self.assertEqual((category.path, category.depth), (path, depth))
+
+    def test_paths_follow_the_parents(self):
+        self.assertPath(self.root, f'/{self.root.id}/', 0)
+        self.assertPath(self.child, f'/{self.root.id}/{self.child.id}/', 1)
+        self.assertPath(self.grandchild, f'/{self.root.id}/{self.child.id}/{self.grandchild.id}/', 2)
+
+    def test_moving_a_category_rewrites_its_descendants(self):
+        self.child.sub_category = self.other_root
+        self.child.save()
+        self.assertPath(self.child, f'/{self.other_root.id}/{self.child.id}/', 1)
+        self.assertPath(self.grandchild, f'/{self.other_root.id}/{self.child.id}/{self.grandchild.id}/', 2)
+        self.assertPath(self.root, f'/{self.root.id}/', 0)
+
+        self.child.sub_category = None
+        self.child.save()
+        self.assertPath(self.grandchild, f'/{self.child.id}/{self.grandchild.id}/', 1)
+
+    def test_a_category_can_not_move_under_its_descendant(self):
+        self.root.sub_category = self.grandchild
+        with self.assertRaises(ValidationError):
+            self.root.save()
+        self.assertPath(self.root, f'/{self.root.id}/', 0)
+
+    def test_products_of_sub_categories_are_included(self):
+        product = Product.objects.create(title='product', quantity=1, description='-', unit_price=1000)
+        product.category.add(self.grandchild)
+        other = Product.objects.create(title='other', quantity=1, description='-', unit_price=1000)
+        other.category.add(self.other_root)
+
+        products = filter_products_by_category_tree(Product.objects.all(), self.root)
+        self.assertEqual(list(products), [product])
+
+        tree = {node['title']: node for node in build_category_tree()}
+        self.assertEqual(tree['root']['products_count'], 1)
+        self.assertEqual(tree['root']['children'][0]['children'][0]['title'], 'grandchild')
+        self.assertEqual(tree['other root']['products_count'], 1)
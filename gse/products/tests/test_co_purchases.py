@@ -0,0 +1,64 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from gse.orders.choices import ORDER_STATUS_PENDING, ORDER_STATUS_SUCCESS
+from gse.orders.models import Order, OrderItem
+from gse.products import co_purchases
+from gse.products.co_purchases import build_co_purchases
+from gse.products.models import CoPurchaseOrder, Product, ProductCoPurchase
+from gse.products.selectors import get_related_products
+from gse.users.models import User
+from . import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CoPurchaseTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='user@example.com', password='password')
+        self.a, self.b, self.c = [
+            Product.objects.create(title=title, quantity=10, description='-', unit_price=1000) for title in 'abc'
+        ]
+
+    def create_order(self, products, status=ORDER_STATUS_SUCCESS):
+        order = Order.objects.create(owner=self.user, status=status)
+        for product in products:
+            OrderItem.objects.create(order=order, product=product, quantity=1)
+        return order
+
+    def get_scores(self):
+        return {
+            (co_purchase.product.title, co_purchase.related_product.title): co_purchase.score
+            for co_purchase in ProductCoPurchase.objects.select_related('product', 'related_product')
+        }
+
+    def test_successful_orders_are_counted_once(self):
+        self.create_order([self.a, self.b])
+        self.create_order([self.a, self.b, self.c])
+        pending = self.create_order([self.a, self.c], status=ORDER_STATUS_PENDING)
+
+        self.assertEqual(build_co_purchases(batch_size=1), 2)
+        self.assertEqual(self.get_scores(), {
+            ('a', 'b'): 2, ('b', 'a'): 2, ('a', 'c'): 1, ('c', 'a'): 1, ('b', 'c'): 1, ('c', 'b'): 1,
+        })
+        self.assertEqual(build_co_purchases(), 0)
+
+        # paid after later orders were counted.
+        Order.objects.filter(id=pending.id).update(status=ORDER_STATUS_SUCCESS)
+        self.assertEqual(build_co_purchases(), 1)
+        self.assertEqual(self.get_scores()[('c', 'a')], 2)
+        self.assertEqual(list(get_related_products(self.a.id)), [self.b, self.c])
+
+    def test_orders_counted_by_a_concurrent_run_stop_the_run(self):
+        self.create_order([self.a, self.b])
+        get_uncounted_order_ids = co_purchases.get_uncounted_order_ids
+
+        def get_concurrently_counted_order_ids(limit, after_id=0):
+            order_ids = get_uncounted_order_ids(limit, after_id)
+            CoPurchaseOrder.objects.create(order_id=order_ids[0])
+            return order_ids
+
+        with mock.patch.object(co_purchases, 'get_uncounted_order_ids', get_concurrently_counted_order_ids):
+            with self.assertLogs(co_purchases.logger, 'WARNING'):
+                self.assertEqual(build_co_purchases(), 0)
+        self.assertFalse(ProductCoPurchase.objects.exists())
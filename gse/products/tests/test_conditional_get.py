@@ -0,0 +1,56 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from gse.products.media_urls import MEDIA_URL_EXPIRY_MARGIN
+from gse.products.models import Product
+from . import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(title='product', quantity=1, description='-', unit_price=1000)
+        self.url = reverse('products:product_retrieve', args=[self.product.id])
+
+    def test_matching_etag_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', response.headers)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response.headers['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_any_etag_matches_existing_objects_only(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        missing_url = reverse('products:product_retrieve', args=[self.product.id + 1])
+        response = self.client.get(missing_url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_if_modified_since_alone_is_not_answered(self):
+        response = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response.headers['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_signed_urls_change_the_etag_before_they_expire(self):
+        etag = self.client.get(self.url).headers['ETag']
+        later = time.time_ns() + MEDIA_URL_EXPIRY_MARGIN * 1_000_000_000
+        with mock.patch('gse.utils.caching.time.time_ns', return_value=later):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    @override_settings(PRODUCT_MEDIA_PUBLIC_URL='https://cdn.example.com/')
+    def test_public_urls_keep_the_etag(self):
+        etag = self.client.get(self.url).headers['ETag']
+        later = time.time_ns() + MEDIA_URL_EXPIRY_MARGIN * 1_000_000_000
+        with mock.patch('gse.utils.caching.time.time_ns', return_value=later):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
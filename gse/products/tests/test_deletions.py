@@ -0,0 +1,65 @@
+from unittest import mock
+
+import fakeredis
+from django.test import SimpleTestCase, override_settings
+from moto import mock_aws
+
+from gse.products.deletions import (
+    MEDIA_DELETION_QUEUE_KEY,
+    MEDIA_DELETION_SCHEDULED_KEY,
+    flush_media_deletions,
+    queue_media_deletions
+)
+from gse.products.services import Bucket
+from gse.utils.redis_client import get_redis_client
+from gse.utils.storages import get_s3_client
+
+
+@mock_aws
+@mock.patch('gse.utils.storages._s3_resource', None)
+@mock.patch.object(Bucket, '_instance', None)
+@override_settings(AWS_S3_ENDPOINT_URL=None, AWS_S3_REGION_NAME='us-east-1', AWS_STORAGE_BUCKET_NAME='gse-media')
+class MediaDeletionTest(SimpleTestCase):
+    def setUp(self):
+        redis_client = mock.patch('gse.utils.redis_client._redis_client', fakeredis.FakeRedis(decode_responses=True))
+        redis_client.start()
+        self.addCleanup(redis_client.stop)
+        self.bucket = Bucket()
+        get_s3_client().create_bucket(Bucket=self.bucket.bucket_name)
+        self.keys = ['a.png', 'b.png', 'c.png']
+        for key in self.keys:
+            get_s3_client().put_object(Bucket=self.bucket.bucket_name, Key=key, Body=b'-')
+
+    def get_stored_keys(self):
+        response = get_s3_client().list_objects_v2(Bucket=self.bucket.bucket_name)
+        return sorted(item['Key'] for item in response.get('Contents', []))
+
+    def test_the_first_queued_keys_schedule_a_flush(self):
+        self.assertTrue(queue_media_deletions(['a.png', 'a.png', '']))
+        self.assertFalse(queue_media_deletions(['b.png']))
+        self.assertFalse(queue_media_deletions(['']))
+        self.assertEqual(get_redis_client().smembers(MEDIA_DELETION_QUEUE_KEY), {'a.png', 'b.png'})
+
+    def test_queued_keys_are_deleted_in_batches(self):
+        queue_media_deletions(self.keys)
+        with mock.patch.object(Bucket, 'delete_file_objects', wraps=self.bucket.delete_file_objects) as delete:
+            self.assertEqual(flush_media_deletions(self.bucket, batch_size=2), 0)
+        self.assertEqual([len(call.args[0]) for call in delete.call_args_list], [2, 1])
+        self.assertEqual(self.get_stored_keys(), [])
+        self.assertFalse(get_redis_client().exists(MEDIA_DELETION_QUEUE_KEY, MEDIA_DELETION_SCHEDULED_KEY))
+        # the flush cleared the schedule, so new keys schedule another one.
+        self.assertTrue(queue_media_deletions(['d.png']))
+
+    def test_referenced_keys_are_kept(self):
+        queue_media_deletions(self.keys)
+        flush_media_deletions(self.bucket, get_referenced_keys=lambda keys: {'b.png'} & set(keys))
+        self.assertEqual(self.get_stored_keys(), ['b.png'])
+
+    def test_keys_of_a_failed_request_are_queued_again(self):
+        queue_media_deletions(self.keys)
+        with mock.patch.object(self.bucket, 'bucket_name', 'missing-bucket'):
+            self.assertEqual(flush_media_deletions(self.bucket), 3)
+        self.assertEqual(get_redis_client().smembers(MEDIA_DELETION_QUEUE_KEY), set(self.keys))
+
+        self.assertEqual(flush_media_deletions(self.bucket), 0)
+        self.assertEqual(self.get_stored_keys(), [])
@@ -0,0 +1,32 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from gse.products.models import Product, ProductDetail
+from . import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProductDetailsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = Product.objects.create(title='shirt', quantity=1, description='-', unit_price=1000)
+        self.details = [
+            ProductDetail.objects.create(product=self.product, attribute='color', value=value)
+            for value in ('red', 'blue')
+        ]
+
+    def test_retrieve_returns_details_and_specs(self):
+        data = self.client.get(reverse('products:product_retrieve', args=[self.product.id])).data['data']
+        self.assertEqual(
+            data['details'],
+            [{'id': detail.id, 'attribute': 'color', 'value': detail.value} for detail in self.details]
+        )
+        self.assertEqual(data['specs'], {'color': ['red', 'blue']})
+
+    def test_specs_follow_detail_writes(self):
+        self.details[0].value = 'green'
+        self.details[0].save()
+        self.details[1].delete()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.specs, {'color': ['green']})
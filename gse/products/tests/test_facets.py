@@ -0,0 +1,46 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from gse.products.models import Product, ProductCategory, ProductDetail
+from gse.products.selectors import get_product_facets
+from . import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProductFacetsTest(TestCase):
+    def setUp(self):
+        self.shoes = ProductCategory.objects.create(title='shoes')
+        self.sale = ProductCategory.objects.create(title='sale')
+        self.red = self.create_product(1000, {'color': 'red', 'size': 'L'}, [self.shoes, self.sale])
+        self.blue = self.create_product(3000, {'color': 'blue'}, [self.shoes])
+        self.create_product(500, {'color': 'red'}, [], available=False)
+
+    def create_product(self, unit_price, details, categories, **kwargs):
+        product = Product.objects.create(title='-', quantity=1, description='-', unit_price=unit_price, **kwargs)
+        product.category.set(categories)
+        ProductDetail.objects.bulk_create(
+            ProductDetail(product=product, attribute=attribute, value=value) for attribute, value in details.items()
+        )
+        return product
+
+    def test_facets_count_the_given_products(self):
+        facets = get_product_facets(Product.objects.filter(available=True))
+        self.assertEqual(facets['price'], {'min': 1000, 'max': 3000})
+        self.assertEqual(
+            {category['title']: category['count'] for category in facets['categories']},
+            {'shoes': 2, 'sale': 1}
+        )
+        self.assertEqual(facets['specs'], [
+            {'attribute': 'color', 'values': [{'value': 'blue', 'count': 1}, {'value': 'red', 'count': 1}]},
+            {'attribute': 'size', 'values': [{'value': 'L', 'count': 1}]},
+        ])
+
+    def test_empty_querysets_have_empty_facets(self):
+        facets = get_product_facets(Product.objects.none())
+        self.assertEqual(facets, {'price': {'min': None, 'max': None}, 'categories': [], 'specs': []})
+
+    def test_facets_are_returned_on_request(self):
+        url = reverse('products:products_list')
+        self.assertNotIn('facets', self.client.get(url).data)
+        facets = self.client.get(url, {'facets': 'true', 'category': self.sale.id}).data['facets']
+        self.assertEqual(facets['price'], {'min': 1000, 'max': 1000})
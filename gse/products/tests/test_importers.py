@@ -0,0 +1,77 @@
+import io
+import json
+
+from django.test import TestCase
+
+from gse.products.importers import import_products, read_rows
+from gse.products.models import Product, ProductCategory
+from gse.products.search import search_products
+
+
+class ProductImportTest(TestCase):
+    def setUp(self):
+        self.shoes = ProductCategory.objects.create(title='shoes')
+        self.sale = ProductCategory.objects.create(title='sale')
+
+    def import_csv(self, text, chunk_size=500):
+        return import_products(read_rows(io.BytesIO(text.encode()), 'csv'), chunk_size=chunk_size)
+
+    def import_jsonl(self, rows, chunk_size=500):
+        text = '\n'.join(row if isinstance(row, str) else json.dumps(row) for row in rows)
+        return import_products(read_rows(io.BytesIO(text.encode()), 'jsonl'), chunk_size=chunk_size)
+
+    def test_rows_are_upserted_by_sku(self):
+        report = self.import_csv(
+            'sku,title,quantity,description,unit_price,discount_percent,categories\n'
+            'A-1,runner,5,-,1000,10,shoes|sale\n'
+            'A-2,walker,3,-,2000,,shoes\n'
+        )
+        self.assertEqual((report['created'], report['updated'], report['failed']), (2, 0, 0))
+        runner = Product.objects.get(sku='A-1')
+        self.assertEqual(runner.final_price, 900)
+        self.assertEqual(set(runner.category.values_list('title', flat=True)), {'shoes', 'sale'})
+
+        report = self.import_csv(
+            'sku,title,quantity,description,unit_price,categories\n'
+            'A-1,runner pro,0,-,1500,shoes\n'
+        )
+        self.assertEqual((report['created'], report['updated']), (0, 1))
+        runner.refresh_from_db()
+        self.assertEqual((runner.title, runner.unit_price, runner.final_price), ('runner pro', 1500, 1350))
+        self.assertFalse(runner.available)
+        self.assertEqual(list(runner.category.values_list('title', flat=True)), ['shoes'])
+        self.assertEqual(Product.objects.count(), 2)
+
+    def test_rows_without_sku_are_matched_by_slug(self):
+        row = {'title': 'Blue Mug', 'quantity': 1, 'description': '-', 'unit_price': 100}
+        self.import_jsonl([row])
+        report = self.import_jsonl([{**row, 'unit_price': 120}])
+        self.assertEqual((report['created'], report['updated']), (0, 1))
+        self.assertEqual(Product.objects.get().unit_price, 120)
+
+    def test_details_replace_the_previous_ones_and_refresh_specs(self):
+        row = {
+            'sku': 'B-1', 'title': 'shirt', 'quantity': 1, 'description': '-', 'unit_price': 100,
+            'details': [{'attribute': 'color', 'value': 'red'}, {'attribute': 'color', 'value': 'blue'}]
+        }
+        self.import_jsonl([row])
+        self.import_jsonl([{**row, 'details': [{'attribute': 'size', 'value': 'L'}]}])
+        product = Product.objects.get()
+        self.assertEqual(list(product.details.values_list('attribute', 'value')), [('size', 'L')])
+        self.assertEqual(product.specs, {'size': ['L']})
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        report = self.import_jsonl([
+            {'sku': 'C-1', 'title': 'ok', 'quantity': 1, 'description': '-', 'unit_price': 100},
+            'not json',
+            {'sku': 'C-2', 'title': 'no price', 'quantity': 1, 'description': '-'},
+            {'sku': 'C-3', 'title': 'bad category', 'quantity': 1, 'description': '-', 'unit_price': 1,
+             'categories': ['missing']},
+        ], chunk_size=2)
+        self.assertEqual((report['created'], report['failed']), (1, 3))
+        self.assertEqual([error['row'] for error in report['errors']], [2, 3, 4])
+        self.assertEqual(list(Product.objects.values_list('sku', flat=True)), ['C-1'])
+
+    def test_imported_products_are_searchable(self):
+        self.import_jsonl([{'sku': 'D-1', 'title': 'lamp', 'quantity': 1, 'description': '-', 'unit_price': 1}])
+        self.assertEqual(list(search_products(Product.objects.all(), 'lamp').values_list('sku', flat=True)), ['D-1'])
@@ -0,0 +1,120 @@
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from gse.products.media_blobs import acquire_media_blob
+from gse.products.media_inspection import get_content_hash
+from gse.products.models import MediaBlob, Product, ProductMedia
+from gse.products.tasks import delete_orphaned_blob_file
+from . import LOCMEM_CACHES
+
+IN_MEMORY_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, STORAGES=IN_MEMORY_STORAGES)
+@mock.patch('gse.products.signals.generate_media_renditions')
+@mock.patch('gse.products.signals.schedule_orphaned_blob_check')
+@mock.patch('gse.products.signals.schedule_media_deletions')
+class MediaBlobTest(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(title='product', quantity=1, description='-', unit_price=1000)
+
+    def create_media(self, content, product=None):
+        media = ProductMedia(
+            product=product or self.product,
+            media_type='image',
+            media=SimpleUploadedFile('photo.PNG', content)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            media.save(skip_clean=True)
+        return media
+
+    def get_deleted_names(self, schedule_media_deletions):
+        return [name for call in schedule_media_deletions.call_args_list for name in call.args[0]]
+
+    def test_duplicate_uploads_share_one_blob(self, schedule_media_deletions, schedule_orphaned_blob_check, _):
+        first = self.create_media(b'content')
+        second = self.create_media(b'content')
+        blob = MediaBlob.objects.get()
+        self.assertEqual((blob.ref_count, blob.name), (2, f'{get_content_hash(first.media)}.png'))
+        self.assertEqual({first.media.name, second.media.name}, {blob.name})
+        schedule_orphaned_blob_check.assert_called_once_with(blob.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+        self.assertEqual(self.get_deleted_names(schedule_media_deletions), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertEqual(self.get_deleted_names(schedule_media_deletions), [blob.name])
+
+    def test_replaced_files_release_their_blob(self, schedule_media_deletions, *_):
+        media = self.create_media(b'old')
+        old_name = media.blob.name
+        media.media = SimpleUploadedFile('photo.png', b'new')
+        with self.captureOnCommitCallbacks(execute=True):
+            media.save(skip_clean=True)
+
+        self.assertEqual(list(MediaBlob.objects.values_list('name', 'ref_count')), [(media.media.name, 1)])
+        self.assertEqual(self.get_deleted_names(schedule_media_deletions), [old_name])
+
+    def test_deleted_products_release_their_blobs(self, schedule_media_deletions, *_):
+        other = Product.objects.create(title='other', quantity=1, description='-', unit_price=1000)
+        self.create_media(b'shared')
+        self.create_media(b'shared', product=other)
+        only = self.create_media(b'only')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.delete()
+        self.assertEqual(list(MediaBlob.objects.values_list('ref_count', flat=True)), [1])
+        self.assertEqual(self.get_deleted_names(schedule_media_deletions), [only.media.name])
+
+    def test_rolled_back_files_are_deleted_later(self, schedule_media_deletions, schedule_orphaned_blob_check, _):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.create_media(b'rolled back')
+            raise RuntimeError
+        kept = self.create_media(b'kept')
+        self.assertFalse(MediaBlob.objects.exclude(id=kept.blob_id).exists())
+
+        with mock.patch('gse.products.tasks.schedule_media_deletions') as schedule_deletions:
+            for call in schedule_orphaned_blob_check.call_args_list:
+                delete_orphaned_blob_file(*call.args)
+        rolled_back_name = schedule_orphaned_blob_check.call_args_list[0].args[0]
+        schedule_deletions.assert_called_once_with([rolled_back_name])
+
+
+@override_settings(STORAGES=IN_MEMORY_STORAGES)
+class ConcurrentBlobTest(TestCase):
+    def acquire_after_concurrent_upload(self, file, concurrent_name):
+        """Acquires a blob of `file` as if another upload committed it right after it was looked up."""
+        MediaBlob.objects.create(sha256=get_content_hash(file), name=concurrent_name, size=file.size, ref_count=1)
+        select_for_update = MediaBlob.objects.select_for_update
+        querysets = [MediaBlob.objects.none()]
+        with mock.patch.object(
+                MediaBlob.objects,
+                'select_for_update',
+                side_effect=lambda: querysets.pop() if querysets else select_for_update()
+        ):
+            return acquire_media_blob(file, default_storage)
+
+    def test_a_file_written_under_the_same_name_is_kept(self):
+        file = SimpleUploadedFile('photo.png', b'content')
+        name = f'{get_content_hash(file)}.png'
+        blob = self.acquire_after_concurrent_upload(file, name)
+        self.assertEqual((blob.name, blob.ref_count), (name, 2))
+        self.assertTrue(default_storage.exists(name))
+
+    def test_a_file_written_under_another_name_is_deleted(self):
+        file = SimpleUploadedFile('photo.png', b'content')
+        name = f'{get_content_hash(file)}.png'
+        blob = self.acquire_after_concurrent_upload(file, f'{get_content_hash(file)}_concurrent.png')
+        self.assertEqual(blob.ref_count, 2)
+        self.assertFalse(default_storage.exists(name))
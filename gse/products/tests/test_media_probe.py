@@ -0,0 +1,34 @@
+import subprocess
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+
+from gse.products.media_probe import probe_media
+
+
+class ProbeStreamTest(SimpleTestCase):
+    @mock.patch('gse.products.media_probe.PROBE_TIMEOUT', 0.1)
+    @mock.patch('gse.products.media_probe.FFPROBE_COMMAND', ['sh', '-c', 'sleep 5', 'ffprobe'])
+    def test_hung_probes_are_killed(self):
+        processes, popen_class = [], subprocess.Popen
+
+        def popen(*args, **kwargs):
+            processes.append(popen_class(*args, **kwargs))
+            return processes[-1]
+
+        with mock.patch('gse.products.media_probe.subprocess.Popen', side_effect=popen):
+            with self.assertRaises(ValidationError):
+                # more than a pipe buffer, so writing stdin blocks until the probe is killed.
+                probe_media(SimpleUploadedFile('video.mp4', b'\0' * 1024 * 1024))
+        self.assertEqual(processes[0].returncode, -9)
+
+    @mock.patch(
+        'gse.products.media_probe.FFPROBE_COMMAND',
+        ['sh', '-c', 'head -c 10 > /dev/null; echo \'{"format": {"duration": "1.5"}}\'', 'ffprobe']
+    )
+    def test_probes_stop_reading_early(self):
+        file = SimpleUploadedFile('video.mp4', b'\0' * 1024 * 1024)
+        self.assertEqual(probe_media(file)['duration'], 1.5)
+        self.assertEqual(file.tell(), 0)
@@ -0,0 +1,68 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, override_settings
+from moto import mock_aws
+
+from gse.products.media_urls import MEDIA_URL_EXPIRY_MARGIN
+from gse.products.models import ProductMedia
+from gse.products.serializers import ProductMediaSerializer
+from . import LOCMEM_CACHES
+
+
+@mock_aws
+@mock.patch('gse.utils.storages._s3_resource', None)
+@override_settings(CACHES=LOCMEM_CACHES, PRODUCT_MEDIA_PUBLIC_URL='')
+class MediaUrlsTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.page = [ProductMedia(media_type='image', media=f'photo {number}.png') for number in range(3)]
+
+    def serialize(self):
+        """Renders the page, returning its urls and the cache and signing calls it made."""
+        with mock.patch('gse.products.media_urls.cache', wraps=cache) as cache_spy, \
+                mock.patch.object(default_storage, 'url', wraps=default_storage.url) as url:
+            urls = [item['media'] for item in ProductMediaSerializer(self.page, many=True).data]
+        return urls, cache_spy, url
+
+    def test_signed_urls_of_a_page_are_cached_in_one_round_trip(self):
+        self.assertTrue(default_storage.querystring_auth)
+        urls, cache_spy, url = self.serialize()
+        self.assertEqual(url.call_count, 3)
+        self.assertTrue(all('Signature=' in signed_url for signed_url in urls), urls)
+        cache_spy.get_many.assert_called_once()
+        cache_spy.set_many.assert_called_once()
+        self.assertEqual(
+            cache_spy.set_many.call_args.kwargs['timeout'],
+            default_storage.querystring_expire - MEDIA_URL_EXPIRY_MARGIN
+        )
+
+        cached_urls, cache_spy, url = self.serialize()
+        self.assertEqual(cached_urls, urls)
+        url.assert_not_called()
+        cache_spy.get_many.assert_called_once()
+        cache_spy.set_many.assert_not_called()
+
+    def test_only_missing_urls_are_signed(self):
+        self.serialize()
+        self.page.append(ProductMedia(media_type='image', media='new.png'))
+        _, cache_spy, url = self.serialize()
+        url.assert_called_once_with('new.png')
+        self.assertEqual(len(cache_spy.set_many.call_args.args[0]), 1)
+
+    @override_settings(PRODUCT_MEDIA_PUBLIC_URL='https://cdn.example.com/')
+    def test_public_urls_are_built_without_signing(self):
+        urls, cache_spy, url = self.serialize()
+        self.assertEqual(urls, [f'https://cdn.example.com/photo%20{number}.png' for number in range(3)])
+        url.assert_not_called()
+        self.assertEqual(cache_spy.method_calls, [])
+
+    def test_unsigned_urls_are_not_cached(self):
+        with mock.patch.object(default_storage, 'querystring_auth', False):
+            urls, cache_spy, url = self.serialize()
+        self.assertEqual(url.call_count, 3)
+        self.assertEqual([unsigned_url.rsplit('/', 1)[1] for unsigned_url in urls], [
+            f'photo%20{number}.png' for number in range(3)
+        ])
+        self.assertEqual(cache_spy.method_calls, [])
@@ -0,0 +1,54 @@
+import json
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from gse.products.models import Product
+from . import LOCMEM_CACHES
+
+
+def encode_cursor(position, reverse=False):
+    return urlsafe_b64encode(json.dumps({'p': position, 'r': int(reverse)}).encode()).decode()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CursorPaginationTest(APITestCase):
+    def setUp(self):
+        now = timezone.now()
+        for index in range(5):
+            product = Product.objects.create(title=f'product {index}', quantity=1, description='-', unit_price=1000)
+            # two products share a creation time, the id breaks the tie.
+            Product.objects.filter(id=product.id).update(created_date=now - timedelta(days=min(index, 3)))
+        self.url = reverse('products:products_list')
+
+    def get_titles(self, response):
+        return [product['title'] for product in response.data['data']]
+
+    def test_pages_follow_the_ordering_in_both_directions(self):
+        response = self.client.get(self.url, {'pagination': 'cursor', 'limit': 2})
+        self.assertEqual(self.get_titles(response), ['product 0', 'product 1'])
+        self.assertIsNone(response.data['pagination']['items_count'])
+
+        response = self.client.get(response.data['pagination']['next_page'])
+        self.assertEqual(self.get_titles(response), ['product 2', 'product 4'])
+
+        next_page = self.client.get(response.data['pagination']['next_page'])
+        self.assertEqual(self.get_titles(next_page), ['product 3'])
+        self.assertFalse(next_page.data['pagination']['has_next'])
+
+        previous_page = self.client.get(response.data['pagination']['previous_page'])
+        self.assertEqual(self.get_titles(previous_page), ['product 0', 'product 1'])
+
+    def test_malformed_cursors_are_not_found(self):
+        for cursor in ('not base64', encode_cursor(['not a date', 1]), encode_cursor([None, 1]), encode_cursor([1])):
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, cursor)
+
+    def test_orderings_that_can_not_be_sought_on_are_rejected(self):
+        response = self.client.get(self.url, {'pagination': 'cursor', 'search': 'product'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,83 @@
+from importlib import import_module
+
+from django.apps import apps
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from gse.products.models import Product, ProductCategory
+from gse.users.models import User
+from . import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BulkPriceUpdateTest(APITestCase):
+    def setUp(self):
+        admin = User.objects.create_user(email='admin@example.com', password='password', role='admin')
+        self.client.force_authenticate(admin)
+        self.url = reverse('products:product_bulk_price_update')
+        self.category = ProductCategory.objects.create(title='category')
+        self.product = self.create_product(1005, discount_percent=50)
+        self.product.category.add(self.category)
+        self.other = self.create_product(3000)
+
+    def create_product(self, unit_price, **kwargs):
+        return Product.objects.create(title='-', quantity=1, description='-', unit_price=unit_price, **kwargs)
+
+    def get_prices(self, product):
+        product.refresh_from_db()
+        return product.unit_price, product.final_price
+
+    def test_final_price_rounds_halves_up(self):
+        self.assertEqual(self.get_prices(self.product), (1005, 503))
+
+    def test_percent_change_of_a_category(self):
+        response = self.client.patch(self.url, {'category': self.category.id, 'price_change_percent': 10}, format='json')
+        self.assertEqual(response.data['data']['updated'], 1)
+        self.assertEqual(self.get_prices(self.product), (1106, 553))
+        self.assertEqual(self.get_prices(self.other), (3000, 3000))
+
+    def test_amount_change_never_goes_below_zero(self):
+        self.client.patch(self.url, {'ids': [self.product.id, self.other.id], 'price_change_amount': -2000}, format='json')
+        self.assertEqual(self.get_prices(self.product), (0, 0))
+        self.assertEqual(self.get_prices(self.other), (1000, 1000))
+
+    def test_discount_by_list_filters(self):
+        response = self.client.patch(
+            self.url, {'filters': {'min_price': 1000}, 'discount_percent': 25}, format='json'
+        )
+        self.assertEqual(response.data['data']['updated'], 1)
+        self.assertEqual(self.get_prices(self.other), (3000, 2250))
+
+    def test_invalid_requests_are_rejected(self):
+        for data in (
+                {'ids': [self.product.id], 'price_change_amount': 10 ** 16},
+                {'filters': {'min_price': 'cheap'}, 'discount_percent': 10},
+                {'ids': [self.product.id]},
+                {'price_change_percent': 10},
+        ):
+            response = self.client.patch(self.url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, data)
+        self.assertEqual(self.get_prices(self.product), (1005, 503))
+
+    def test_changes_that_overflow_the_price_are_rejected(self):
+        expensive = self.create_product(10 ** 14)
+        for data in (
+                {'ids': [expensive.id, self.other.id], 'price_change_percent': 1000},
+                {'ids': [expensive.id], 'price_change_amount': 10 ** 15 - 10 ** 14},
+        ):
+            response = self.client.patch(self.url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, data)
+        self.assertEqual(self.get_prices(expensive), (10 ** 14, 10 ** 14))
+        self.assertEqual(self.get_prices(self.other), (3000, 3000))
+
+        response = self.client.patch(self.url, {'ids': [expensive.id], 'price_change_percent': 899}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_prices(expensive), (999 * 10 ** 12, 999 * 10 ** 12))
+
+    def test_migration_recomputes_stored_prices(self):
+        Product.objects.update(final_price=0)
+        import_module('gse.products.migrations.0023_recompute_final_prices').recompute_final_prices(apps, None)
+        self.assertEqual(self.get_prices(self.product), (1005, 503))
+        self.assertEqual(self.get_prices(self.other), (3000, 3000))
@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from gse.orders.choices import ORDER_STATUS_SUCCESS
+from gse.orders.models import Order, OrderItem
+from gse.products.models import Product, ProductReview
+from gse.products.rankings import refresh_product_rankings
+from gse.users.models import User
+from . import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProductRankingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='user@example.com', password='password')
+        self.recent, self.old, self.reviewed = [
+            Product.objects.create(title=title, quantity=10, description='-', unit_price=1000)
+            for title in ('recent', 'old', 'reviewed')
+        ]
+
+    def create_paid_order(self, product, quantity, paid_days_ago):
+        order = Order.objects.create(owner=self.user, status=ORDER_STATUS_SUCCESS)
+        OrderItem.objects.create(order=order, product=product, quantity=quantity)
+        Order.objects.filter(id=order.id).update(paid_at=timezone.now() - timedelta(days=paid_days_ago))
+        return order
+
+    def get_titles(self, ordering):
+        response = self.client.get(reverse('products:products_list'), {'ordering': ordering})
+        return [product['title'] for product in response.data['data']]
+
+    def test_sales_are_counted_within_the_window_of_their_payment(self):
+        self.create_paid_order(self.recent, 2, paid_days_ago=10)
+        old_order = self.create_paid_order(self.old, 5, paid_days_ago=40)
+        # a later save of an old order does not bring its sales back into the window.
+        old_order.refresh_from_db()
+        old_order.save()
+
+        self.assertEqual(refresh_product_rankings(), 1)
+        self.assertEqual(
+            dict(Product.objects.values_list('title', 'sales_count_30d')),
+            {'recent': 2, 'old': 0, 'reviewed': 0}
+        )
+
+    def test_products_are_ordered_by_their_rankings(self):
+        self.create_paid_order(self.recent, 1, paid_days_ago=1)
+        self.create_paid_order(self.old, 3, paid_days_ago=1)
+        ProductReview.objects.create(product=self.reviewed, owner=self.user, body='-', rate=5)
+        refresh_product_rankings([self.recent.id, self.old.id, self.reviewed.id])
+
+        self.reviewed.refresh_from_db()
+        self.assertEqual(self.reviewed.popularity_score, round(20 / 6, 4))
+        self.assertEqual(self.get_titles('bestseller'), ['old', 'recent', 'reviewed'])
+        self.assertEqual(self.get_titles('top-rated'), ['reviewed', 'old', 'recent'])
@@ -0,0 +1,66 @@
+from django.test import TestCase
+
+from gse.products.models import Product, ProductReview
+from gse.products.services import reconcile_product_ratings
+from gse.users.models import User
+
+
+class ProductRatingTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='user@example.com', password='password')
+        self.product = Product.objects.create(title='product', quantity=10, description='-', unit_price=1000)
+        self.other_product = Product.objects.create(title='other', quantity=10, description='-', unit_price=1000)
+
+    def create_review(self, product, rate):
+        return ProductReview.objects.create(product=product, owner=self.user, body='-', rate=rate)
+
+    def assertRating(self, product, rating_sum, rating_count, rating_histogram):
+        product.refresh_from_db()
+        self.assertEqual(
+            (product.rating_sum, product.rating_count, product.rating_histogram),
+            (rating_sum, rating_count, rating_histogram)
+        )
+
+    def test_created_reviews_are_added(self):
+        self.create_review(self.product, 5)
+        self.create_review(self.product, 4)
+        self.create_review(self.product, 5)
+        self.assertRating(self.product, 14, 3, {'5': 2, '4': 1})
+        self.assertEqual(self.product.overall_rate, 4.7)
+
+    def test_changed_rate_replaces_the_previous_one(self):
+        review = self.create_review(self.product, 2)
+        review.rate = 5
+        review.save()
+        self.assertRating(self.product, 5, 1, {'5': 1})
+
+    def test_review_moved_to_another_product(self):
+        review = self.create_review(self.product, 3)
+        review.product = self.other_product
+        review.save()
+        self.assertRating(self.product, 0, 0, {})
+        self.assertRating(self.other_product, 3, 1, {'3': 1})
+
+    def test_deleted_review_is_removed(self):
+        self.create_review(self.product, 4)
+        review = self.create_review(self.product, 1)
+        review.delete()
+        self.assertRating(self.product, 4, 1, {'4': 1})
+
+    def test_unchanged_rate_is_not_counted_again(self):
+        review = self.create_review(self.product, 4)
+        review.body = 'edited'
+        review.save()
+        self.assertRating(self.product, 4, 1, {'4': 1})
+
+    def test_reconcile_fixes_drifted_products_only(self):
+        self.create_review(self.product, 4)
+        self.create_review(self.other_product, 2)
+        Product.objects.filter(id=self.product.id).update(rating_sum=40, rating_count=7, rating_histogram={})
+
+        self.assertEqual(reconcile_product_ratings(dry_run=True), 1)
+        self.assertRating(self.product, 40, 7, {})
+        self.assertEqual(reconcile_product_ratings(), 1)
+        self.assertRating(self.product, 4, 1, {'4': 1})
+        self.assertRating(self.other_product, 2, 1, {'2': 1})
+        self.assertEqual(reconcile_product_ratings(), 0)
@@ -0,0 +1,59 @@
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from gse.products.models import Product, ProductCategory
+from gse.products.search import search_products
+from . import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProductSearchTest(TestCase):
+    def create_product(self, title, description='-', categories=()):
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            product = Product.objects.create(title=title, quantity=10, description=description, unit_price=1000)
+            product.category.add(*categories)
+        return product
+
+    def search(self, query):
+        return list(search_products(Product.objects.all(), query).values_list('title', flat=True))
+
+    def test_title_matches_rank_above_description_matches(self):
+        self.create_product('کفش ورزشی', description='مناسب دویدن')
+        self.create_product('جوراب', description='مناسب کفش ورزشی')
+        self.assertEqual(self.search('کفش'), ['کفش ورزشی', 'جوراب'])
+
+    def test_arabic_spelling_and_prefixes_match(self):
+        self.create_product('کیف چرمی')
+        self.assertEqual(self.search('كيف چرم'), ['کیف چرمی'])
+
+    def test_category_titles_are_searchable_and_follow_renames(self):
+        category = ProductCategory.objects.create(title='لوازم جانبی')
+        self.create_product('قاب گوشی', categories=[category])
+        self.assertEqual(self.search('لوازم'), ['قاب گوشی'])
+
+        category.title = 'اکسسوری'
+        with self.captureOnCommitCallbacks(execute=True):
+            category.save()
+        self.assertEqual(self.search('لوازم'), [])
+        self.assertEqual(self.search('اکسسوری'), ['قاب گوشی'])
+
+    def test_deleted_products_leave_the_index(self):
+        product = self.create_product('ساعت')
+        product.delete()
+        self.assertEqual(self.search('ساعت'), [])
+
+    def test_a_transaction_indexes_each_product_once(self):
+        category = ProductCategory.objects.create(title='category')
+        with mock.patch('gse.products.search.index_products') as index_products:
+            self.create_product('product', categories=[category])
+        index_products.assert_called_once()
+        self.assertEqual(len(index_products.call_args.args[0]), 1)
+
+    def test_a_rolled_back_transaction_does_not_stop_later_indexing(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Product.objects.create(title='rolled back', quantity=1, description='-', unit_price=1000)
+            raise RuntimeError
+        self.create_product('committed')
+        self.assertEqual(self.search('committed'), ['committed'])
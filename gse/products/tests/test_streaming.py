@@ -0,0 +1,86 @@
+import shutil
+import subprocess
+import tempfile
+from unittest import mock, skipUnless
+
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from gse.products.models import Product, ProductMedia
+from gse.products.serializers import ProductMediaSerializer
+from gse.products.tasks import generate_media_renditions
+from . import LOCMEM_CACHES
+
+CLIP_PROBE = {'duration': 1.0, 'codec': 'h264', 'width': 640, 'height': 360}
+
+
+@skipUnless(shutil.which('ffmpeg'), 'ffmpeg is not installed')
+@mock.patch('gse.products.tasks.schedule_media_deletions')
+@mock.patch('gse.products.streaming.probe_source', return_value=CLIP_PROBE)
+class MediaStreamTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(
+            CACHES=LOCMEM_CACHES,
+            PRODUCT_MEDIA_PUBLIC_URL='',
+            STORAGES={
+                'default': {
+                    'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                    'OPTIONS': {'location': media_root, 'base_url': '/media/'},
+                },
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            }
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        subprocess.run(
+            [
+                'ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc=size=640x360:rate=10',
+                '-t', '1', '-pix_fmt', 'yuv420p', default_storage.path('clip.mp4'),
+            ],
+            check=True,
+        )
+        product = Product.objects.create(title='product', quantity=1, description='-', unit_price=1000)
+        with mock.patch('gse.products.signals.generate_media_renditions'):
+            self.media = ProductMedia(product=product, media_type='video', media='clip.mp4')
+            self.media.save(skip_clean=True)
+
+    def test_videos_are_transcoded_into_a_playlist(self, *_):
+        generate_media_renditions(self.media.id)
+        self.media.refresh_from_db()
+        stream = self.media.renditions['hls']
+        self.assertEqual(self.media.renditions['source'], 'clip.mp4')
+        self.assertEqual(stream['variants'], ['360p'])
+        self.assertRegex(stream['manifest'], r'^clip_hls_\w{8}/master\.m3u8$')
+
+        prefix = stream['manifest'].rsplit('/', 1)[0]
+        self.assertIn(f'{prefix}/360p.m3u8', stream['files'])
+        self.assertIn(stream['poster'], stream['files'])
+        for name in stream['files']:
+            self.assertTrue(default_storage.exists(name), name)
+        with default_storage.open(stream['manifest']) as manifest:
+            self.assertEqual(manifest.read().decode(), (
+                '#EXTM3U\n'
+                '#EXT-X-VERSION:3\n'
+                '#EXT-X-STREAM-INF:BANDWIDTH=1047200,RESOLUTION=640x360\n'
+                '360p.m3u8\n'
+            ))
+        with default_storage.open(f'{prefix}/360p.m3u8') as playlist:
+            segments = [line for line in playlist.read().decode().splitlines() if line.endswith('.ts')]
+        self.assertEqual([f'{prefix}/{segment}' for segment in segments], [
+            name for name in stream['files'] if name.endswith('.ts')
+        ])
+
+        stream_urls = ProductMediaSerializer(self.media).data['stream']
+        self.assertEqual(stream_urls['manifest'], f'/media/{stream["manifest"]}')
+        with mock.patch('gse.products.serializers.media_urls_are_signed', return_value=True):
+            self.assertIsNone(ProductMediaSerializer(self.media).data['stream'])
+
+    def test_videos_are_not_transcoded_for_signed_urls(self, probe_source, _):
+        with mock.patch('gse.products.tasks.media_urls_are_signed', return_value=True):
+            generate_media_renditions(self.media.id)
+        self.media.refresh_from_db()
+        self.assertEqual(self.media.renditions, {})
+        probe_source.assert_not_called()
@@ -0,0 +1,84 @@
+import hashlib
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopUpload
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from gse.products.models import MediaBlob, Product
+from gse.products.upload_handlers import MEDIA_SNIFF_SIZE, MediaUploadHandler
+from gse.users.models import User
+from . import LOCMEM_CACHES
+from .test_media_blobs import IN_MEMORY_STORAGES
+from .test_uploads import build_image
+
+
+class MediaUploadHandlerTest(SimpleTestCase):
+    def upload(self, content, chunk_size=MediaUploadHandler.chunk_size, **kwargs):
+        handler = MediaUploadHandler(**kwargs)
+        handler.new_file('media', 'photo.png', 'image/png', len(content))
+        for start in range(0, len(content), chunk_size):
+            handler.receive_data_chunk(content[start:start + chunk_size], start)
+        return handler.file_complete(len(content))
+
+    def test_the_type_and_hash_are_attached_to_the_file(self):
+        content = build_image()
+        file = self.upload(content, chunk_size=1000)
+        self.assertEqual(file.media_type, 'image')
+        self.assertEqual(file.sha256, hashlib.sha256(content).hexdigest())
+        file.seek(0)
+        self.assertEqual(file.read(), content)
+
+    def test_unknown_content_stops_at_the_first_sniffed_chunk(self):
+        handler = MediaUploadHandler()
+        handler.new_file('media', 'photo.png', 'image/png', None)
+        with self.assertRaises(StopUpload) as stop:
+            handler.receive_data_chunk(b'\0' * MEDIA_SNIFF_SIZE, 0)
+        self.assertTrue(stop.exception.connection_reset)
+        self.assertTrue(handler.file.closed)
+
+    def test_content_over_the_max_size_is_stopped(self):
+        with self.assertRaises(StopUpload):
+            self.upload(build_image(), chunk_size=100, max_size=1000)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, STORAGES=IN_MEMORY_STORAGES)
+@mock.patch('gse.products.signals.generate_media_renditions')
+@mock.patch('gse.products.signals.schedule_orphaned_blob_check')
+class MediaUploadMixinTest(APITestCase):
+    def setUp(self):
+        admin = User.objects.create_user(email='admin@example.com', password='password', role='admin')
+        self.client.force_authenticate(admin)
+        self.product = Product.objects.create(title='product', quantity=1, description='-', unit_price=1000)
+        self.url = reverse('products:media_create', args=[self.product.id])
+
+    def post(self, content, **extra):
+        return self.client.post(
+            self.url,
+            {'media_type': 'image', 'media': SimpleUploadedFile('photo.png', content)},
+            format='multipart',
+            **extra
+        )
+
+    def test_valid_uploads_are_stored_under_their_hash(self, *_):
+        content = build_image()
+        response = self.post(content)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(MediaBlob.objects.get().sha256, hashlib.sha256(content).hexdigest())
+
+    def test_declared_sizes_over_the_limit_are_rejected_before_reading(self, *_):
+        with mock.patch.object(MediaUploadHandler, 'receive_data_chunk') as receive_data_chunk:
+            response = self.post(build_image(), CONTENT_LENGTH=str(600 * 1024 * 1024))
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertIn('media', response.data['data']['errors'])
+        receive_data_chunk.assert_not_called()
+
+    def test_unknown_content_is_rejected(self, *_):
+        for content in (b'not an image', b'\0' * (MEDIA_SNIFF_SIZE * 2)):
+            response = self.post(content)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, content[:20])
+            self.assertEqual(response.data['data']['errors']['media'], 'نوع رسانه مجاز نمیباشد.')
+        self.assertFalse(self.product.media.exists())
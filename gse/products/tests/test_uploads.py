@@ -0,0 +1,119 @@
+from io import BytesIO
+from unittest import mock
+
+import requests
+from botocore.exceptions import EndpointConnectionError
+from django.test import override_settings
+from django.urls import reverse
+from moto import mock_aws
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from gse.products.models import Product, ProductMedia
+from gse.products.services import Bucket
+from gse.users.models import User
+from gse.utils.storages import get_s3_client
+from . import LOCMEM_CACHES
+
+
+def build_image(width=950, height=950) -> bytes:
+    content = BytesIO()
+    Image.new('RGB', (width, height), 'white').save(content, 'PNG')
+    return content.getvalue()
+
+
+@mock_aws
+@mock.patch('gse.utils.storages._s3_resource', None)
+@mock.patch.object(Bucket, '_instance', None)
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    AWS_S3_ENDPOINT_URL=None,
+    AWS_S3_REGION_NAME='us-east-1',
+    AWS_STORAGE_BUCKET_NAME='gse-media'
+)
+class MediaUploadTest(APITestCase):
+    def setUp(self):
+        get_s3_client().create_bucket(Bucket=Bucket().bucket_name)
+        admin = User.objects.create_user(email='admin@example.com', password='password', role='admin')
+        self.client.force_authenticate(admin)
+        self.product = Product.objects.create(title='product', quantity=1, description='-', unit_price=1000)
+
+    def post(self, name, data):
+        return self.client.post(reverse(f'products:{name}', args=[self.product.id]), data, format='json')
+
+    def initiate(self, content):
+        response = self.post('media_upload_initiate', {
+            'file_name': 'Photo.PNG', 'content_type': 'image/png', 'size': len(content)
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['data']
+
+    def upload_parts(self, upload, content):
+        response = self.post('media_upload_parts', {
+            'upload_token': upload['upload_token'], 'part_numbers': list(range(1, upload['parts_count'] + 1))
+        })
+        parts = []
+        for part in response.data['data']['parts']:
+            start = (part['part_number'] - 1) * upload['part_size']
+            put = requests.put(part['url'], data=content[start:start + upload['part_size']])
+            self.assertEqual(put.status_code, 200)
+            parts.append({'part_number': part['part_number'], 'etag': put.headers['ETag']})
+        return parts
+
+    def test_uploaded_parts_are_completed_into_a_media(self):
+        content = build_image()
+        upload = self.initiate(content)
+        self.assertEqual(upload['parts_count'], 1)
+        self.assertTrue(upload['key'].endswith('.png'))
+        parts = self.upload_parts(upload, content)
+
+        response = self.post('media_upload_complete', {
+            'upload_token': upload['upload_token'], 'parts': parts, 'is_primary': True
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        media = ProductMedia.objects.get(product=self.product)
+        self.assertEqual((media.media.name, media.media_type, media.is_primary), (upload['key'], 'image', True))
+        self.assertEqual(Bucket().head_file_object(upload['key'])['ContentLength'], len(content))
+
+    def test_invalid_uploads_are_deleted(self):
+        content = build_image(width=100)
+        upload = self.initiate(content)
+        response = self.post('media_upload_complete', {
+            'upload_token': upload['upload_token'], 'parts': self.upload_parts(upload, content)
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn('Contents', get_s3_client().list_objects_v2(Bucket=Bucket().bucket_name))
+        self.assertFalse(ProductMedia.objects.exists())
+
+    def test_aborted_uploads_discard_their_parts(self):
+        content = build_image()
+        upload = self.initiate(content)
+        self.upload_parts(upload, content)
+        # aborting twice, e.g. on a client retry, is not an error.
+        for _ in range(2):
+            response = self.post('media_upload_abort', {'upload_token': upload['upload_token']})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Uploads', get_s3_client().list_multipart_uploads(Bucket=Bucket().bucket_name))
+
+    def test_tampered_and_foreign_tokens_are_rejected(self):
+        upload = self.initiate(build_image())
+        response = self.post('media_upload_abort', {'upload_token': upload['upload_token'] + 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        other = Product.objects.create(title='other', quantity=1, description='-', unit_price=1000)
+        response = self.client.post(
+            reverse('products:media_upload_abort', args=[other.id]),
+            {'upload_token': upload['upload_token']},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unreachable_storage_is_unavailable(self):
+        error = EndpointConnectionError(endpoint_url='http://s3')
+        with mock.patch.object(Bucket, 'create_multipart_upload', side_effect=error):
+            response = self.post('media_upload_initiate', {
+                'file_name': 'photo.png', 'content_type': 'image/png', 'size': 100
+            })
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertIn('storage', response.data['data']['errors'])
@@ -0,0 +1,99 @@
+import hashlib
+
+from django.core.files.uploadhandler import StopUpload, TemporaryFileUploadHandler
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.parsers import FormParser, MultiPartParser
+
+from .choices import MEDIA_ALLOWED_TYPES, MEDIA_MAX_SIZE
+from .validators import detect_media_type
+
+MEDIA_SNIFF_SIZE = 2048
+# room for the multipart boundaries and the other form fields.
+MULTIPART_OVERHEAD = 1024 * 1024
+
+
+class MediaUploadRejected(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(detail={'data': {'errors': {'media': message}}})
+        self.status_code = status_code
+
+
+class MediaUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams media uploads to a temporary file in small chunks, so memory use stays at one chunk per upload.
+    The request is aborted as soon as the declared or received size exceeds `max_size` or the first chunk
+    does not sniff as an allowed type. The sniffed type and the sha-256 of the content are attached
+    to the file as `media_type` and `sha256`.
+    """
+    chunk_size = 64 * 1024
+
+    def __init__(self, request=None, max_size: int = MEDIA_MAX_SIZE, allowed_types: dict = MEDIA_ALLOWED_TYPES):
+        super().__init__(request)
+        self.max_size = max_size
+        self.allowed_types = allowed_types
+
+    def reject(self, message: str, status_code: int = status.HTTP_400_BAD_REQUEST):
+        if self.request is not None:
+            self.request.media_upload_rejection = (message, status_code)
+        if getattr(self, 'file', None) is not None:
+            self.file.close()
+        # stops reading the body, the rest of the upload is never received.
+        raise StopUpload(connection_reset=True)
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length > self.max_size + MULTIPART_OVERHEAD:
+            # nothing is read yet, so the request can be answered right away.
+            raise MediaUploadRejected('حجم فایل باید کمتر از ۵۰۰ مگابایت باشد.', status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received_size = 0
+        self.head = b''
+        self.media_type = None
+        self.digest = hashlib.sha256()
+
+    def sniff(self):
+        self.media_type = detect_media_type(self.head, self.allowed_types)
+        if self.media_type is None:
+            self.reject('نوع رسانه مجاز نمیباشد.')
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received_size += len(raw_data)
+        if self.received_size > self.max_size:
+            self.reject('حجم فایل باید کمتر از ۵۰۰ مگابایت باشد.', status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if self.media_type is None and len(self.head) < MEDIA_SNIFF_SIZE:
+            self.head += raw_data[:MEDIA_SNIFF_SIZE - len(self.head)]
+            if len(self.head) == MEDIA_SNIFF_SIZE:
+                self.sniff()
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if self.media_type is None:
+            self.sniff()
+        file = super().file_complete(file_size)
+        file.media_type = self.media_type
+        file.sha256 = self.digest.hexdigest()
+        return file
+
+
+class MediaUploadMixin:
+    """
+    Parses multipart media uploads with `MediaUploadHandler` and answers rejected uploads with their reason.
+    """
+    parser_classes = [MultiPartParser, FormParser]
+
+    def initialize_request(self, request, *args, **kwargs):
+        request.upload_handlers = [MediaUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.content_type.startswith('multipart/'):
+            request.data  # runs the upload handler before the view does anything else.
+            rejection = getattr(request._request, 'media_upload_rejection', None)
+            if rejection is not None:
+                raise MediaUploadRejected(*rejection)
@@ -0,0 +1,135 @@
+import math
+import os
+from io import BytesIO
+from uuid import uuid4
+
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.files.images import get_image_dimensions
+
+from .choices import MEDIA_TYPE_IMAGE, MEDIA_TYPE_VIDEO, MEDIA_ALLOWED_TYPES, MEDIA_MAX_SIZE, MEDIA_MAX_VIDEO_DURATION
+from .models import ProductMedia
+from .services import Bucket
+from .validators import detect_media_type, get_video_duration
+
+MEDIA_UPLOAD_TOKEN_SALT = 'products.media-upload'
+MEDIA_UPLOAD_TOKEN_MAX_AGE = 60 * 60 * 24
+
+# s3 parts are at least 5 MB (except the last one) and at most 10,000 per upload.
+MEDIA_UPLOAD_MIN_PART_SIZE = 8 * 1024 * 1024
+MEDIA_UPLOAD_MAX_PARTS = 10_000
+
+# image headers are usually in the first few kilobytes, jpeg files with large exif blocks need more.
+IMAGE_HEADER_READ_SIZES = (64 * 1024, 1024 * 1024)
+
+
+def get_part_size(size: int) -> int:
+    return max(MEDIA_UPLOAD_MIN_PART_SIZE, math.ceil(size / MEDIA_UPLOAD_MAX_PARTS))
+
+
+def build_media_key(file_name: str) -> str:
+    _, extension = os.path.splitext(file_name)
+    return f'{uuid4().hex}{extension.lower()}'
+
+
+def initiate_media_upload(product_id: int, file_name: str, content_type: str, size: int, media_type: str) -> dict:
+    """
+    Starts a multipart upload straight to the bucket. The returned token carries the upload state,
+    so nothing is stored until the upload is completed.
+    """
+    key = build_media_key(file_name)
+    upload_id = Bucket().create_multipart_upload(key, content_type)
+    part_size = get_part_size(size)
+    upload = {'product_id': product_id, 'key': key, 'upload_id': upload_id, 'size': size, 'media_type': media_type}
+    return {
+        'upload_token': signing.dumps(upload, salt=MEDIA_UPLOAD_TOKEN_SALT),
+        'key': key,
+        'part_size': part_size,
+        'parts_count': math.ceil(size / part_size),
+    }
+
+
+def load_media_upload(upload_token: str, product_id: int) -> dict | None:
+    try:
+        upload = signing.loads(upload_token, salt=MEDIA_UPLOAD_TOKEN_SALT, max_age=MEDIA_UPLOAD_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return upload if upload['product_id'] == product_id else None
+
+
+def get_media_upload_part_urls(upload: dict, part_numbers: list[int]) -> list[dict]:
+    bucket = Bucket()
+    return [
+        {
+            'part_number': part_number,
+            'url': bucket.generate_upload_part_url(upload['key'], upload['upload_id'], part_number),
+        }
+        for part_number in part_numbers
+    ]
+
+
+def abort_media_upload(upload: dict) -> None:
+    Bucket().abort_multipart_upload(upload['key'], upload['upload_id'])
+
+
+def read_image_dimensions(bucket: Bucket, key: str) -> tuple[int | None, int | None]:
+    for read_size in IMAGE_HEADER_READ_SIZES:
+        width, height = get_image_dimensions(BytesIO(bucket.read_file_object(key, 0, read_size - 1)))
+        if width is not None:
+            return width, height
+    return None, None
+
+
+def inspect_uploaded_media(upload: dict) -> None:
+    """
+    Validates an uploaded object like `ProductMediaSerializer` validates a posted file, reading only what is needed:
+    the object metadata, its first bytes and, for videos, a ranged stream read by ffprobe.
+    """
+    bucket = Bucket()
+    key = upload['key']
+
+    size = bucket.head_file_object(key)['ContentLength']
+    if size != upload['size'] or size > MEDIA_MAX_SIZE:
+        raise ValidationError('حجم فایل آپلود شده با حجم اعلام شده مطابقت ندارد.')
+
+    media_type = detect_media_type(bucket.read_file_object(key, 0, 2047), MEDIA_ALLOWED_TYPES)
+    if media_type != upload['media_type']:
+        raise ValidationError('نوع رسانه مجاز نمیباشد.')
+
+    if media_type == MEDIA_TYPE_IMAGE:
+        width, height = read_image_dimensions(bucket, key)
+        if width is None:
+            raise ValidationError('فایل آپلود شده عکس معتبری نیست.')
+        if not 900 <= width <= 1000:
+            raise ValidationError('عرض عکس باید بین ۹۰۰ تا ۱۰۰۰ پیکسل باشد.')
+        if not 900 <= height <= 1000:
+            raise ValidationError('طول عکس باید بین ۹۰۰ تا ۱۰۰۰ پیکسل باشد.')
+
+    if media_type == MEDIA_TYPE_VIDEO:
+        # ffprobe reads the few ranges it needs over http instead of a local copy of the file.
+        duration = get_video_duration(bucket.generate_download_url(key))
+        if duration > MEDIA_MAX_VIDEO_DURATION:
+            raise ValidationError(f'مدت ویدیو نباید بیشتر از {MEDIA_MAX_VIDEO_DURATION} ثانیه باشد.')
+
+
+def complete_media_upload(upload: dict, parts: list[dict], is_primary: bool = False) -> ProductMedia:
+    """
+    Completes the multipart upload, validates the stored object and registers it as a `ProductMedia`.
+    Invalid objects are deleted from the bucket.
+    """
+    bucket = Bucket()
+    bucket.complete_multipart_upload(upload['key'], upload['upload_id'], sorted(parts, key=lambda p: p['part_number']))
+    try:
+        inspect_uploaded_media(upload)
+    except ValidationError:
+        bucket.delete_file_object(upload['key'])
+        raise
+
+    media = ProductMedia(
+        product_id=upload['product_id'],
+        media_type=upload['media_type'],
+        media=upload['key'],
+        is_primary=is_primary,
+    )
+    media.save(skip_clean=True)
+    return media
@@ -6,6 +6,7 @@ app_name = 'products'
 
 category_patterns = [
     path('', categories.CategoriesListAPI.as_view(), name='categories_list'),
+    path('tree/', categories.CategoryTreeAPI.as_view(), name='categories_tree'),
     path('<int:category_id>/', categories.CategoryRetrieveAPI.as_view(), name='category_retrieve'),
     path('<int:category_id>/update/', categories.CategoryUpdateAPI.as_view(), name='category_update'),
     path('<int:category_id>/delete/', categories.CategoryDeleteAPI.as_view(), name='category_delete'),
@@ -15,12 +16,16 @@ category_patterns = [
 product_patterns = [
     path('', products.ProductsListAPI.as_view(), name='products_list'),
     path('<int:product_id>/', products.ProductRetrieveAPI.as_view(), name='product_retrieve'),
+    path('<int:product_id>/related/', products.ProductRelatedAPI.as_view(), name='product_related'),
     path('<int:product_id>/update/', products.ProductUpdateAPI.as_view(), name='product_update'),
     path('<int:product_id>/delete/', products.ProductDestroyAPI.as_view(), name='product_delete'),
     path('add/', products.ProductCreateAPI.as_view(), name='product_create'),
+    path('import/', products.ProductImportAPI.as_view(), name='product_import'),
+    path('prices/', products.ProductBulkPriceUpdateAPI.as_view(), name='product_bulk_price_update'),
 ]
 
 detail_patterns = [
+    path('', details.ProductDetailListAPI.as_view(), name='details_list'),
     path('<int:detail_id>/update/', details.ProductDetailUpdateAPI.as_view(), name='detail_update'),
     path('<int:detail_id>/delete/', details.ProductDetailDeleteAPI.as_view(), name='detail_delete'),
     path('add/', details.ProductDetailCreateAPI.as_view(), name='detail_create'),
@@ -30,6 +35,10 @@ media_patterns = [
     path('add/', media.ProductMediaCreateAPI.as_view(), name='media_create'),
     path('<int:media_id>/update/', media.ProductMediaUpdateAPI.as_view(), name='media_update'),
     path('<int:media_id>/delete/', media.ProductMediaDeleteAPI.as_view(), name='media_delete'),
+    path('uploads/', media.MediaUploadInitiateAPI.as_view(), name='media_upload_initiate'),
+    path('uploads/parts/', media.MediaUploadPartsAPI.as_view(), name='media_upload_parts'),
+    path('uploads/complete/', media.MediaUploadCompleteAPI.as_view(), name='media_upload_complete'),
+    path('uploads/abort/', media.MediaUploadAbortAPI.as_view(), name='media_upload_abort'),
 ]
 
 review_patterns = [
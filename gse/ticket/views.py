@@ -7,6 +7,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from gse.utils import is_child_of, format_errors
+from gse.utils.counters import CachedCount, EstimatedCount
 from gse.utils.doc_serializers import ResponseSerializer
 from gse.utils.permissions import IsAdminOrOwner, IsAdminOrSupporter
 from .models import Ticket, TicketAnswer
@@ -24,6 +25,7 @@ class TicketsListAPI(ListAPIView):
     serializer_class = TicketsListSerializer
     queryset = get_all_tickets()
     filterset_fields = ('status',)
+    count_strategy = EstimatedCount(fallback=CachedCount(timeout=30))
 
 
 @extend_schema(tags=['Tickets'])
@@ -5,6 +5,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
 from gse.utils import permissions, format_errors
+from gse.utils.counters import CachedCount, EstimatedCount
 from gse.utils.doc_serializers import ResponseSerializer
 from .. import serializers
 from ..models import User
@@ -23,6 +24,7 @@ class UsersListAPI(ListAPIView):
     serializer_class = serializers.UserSerializer
     filterset_fields = ['is_active', 'is_superuser', 'role']
     search_fields = ['email']
+    count_strategy = EstimatedCount(fallback=CachedCount(timeout=30))
 
 
 @extend_schema(tags=['Users'])
@@ -0,0 +1,132 @@
+import time
+from hashlib import sha1
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+CACHE_VERSION_KEY_PREFIX = 'cache-version'
+RESPONSE_CACHE_KEY_PREFIX = 'response'
+
+CACHE_NAMESPACE_PRODUCTS = 'products'
+CACHE_NAMESPACE_CATEGORIES = 'categories'
+CACHE_NAMESPACE_REVIEWS = 'reviews'
+CACHE_NAMESPACE_RELATED_PRODUCTS = 'related-products'
+CACHE_NAMESPACE_WEBSITE = 'website'
+CACHE_VERSION_PERIOD = 'period'
+
+
+def get_cache_versions(namespaces) -> dict[str, int]:
+    """
+    Returns the version of each namespace. A version is the time (in nanoseconds) of the last write,
+    so it doubles as a `Last-Modified` value and never repeats after a cache flush.
+    """
+    keys = {f'{CACHE_VERSION_KEY_PREFIX}:{namespace}': namespace for namespace in namespaces}
+    versions = cache.get_many(keys.keys())
+    for key in keys.keys() - versions.keys():
+        cache.add(key, time.time_ns(), timeout=None)
+        versions[key] = cache.get(key)
+    return {namespace: versions[key] for key, namespace in keys.items()}
+
+
+def bump_cache_version(namespace: str) -> None:
+    """
+    Invalidates every cached response depending on `namespace` once the current transaction commits.
+    """
+    key = f'{CACHE_VERSION_KEY_PREFIX}:{namespace}'
+    transaction.on_commit(lambda: cache.set(key, time.time_ns(), timeout=None))
+
+
+def build_response_cache_key(request, versions: dict[str, int]) -> str:
+    query = sorted((key, tuple(sorted(values))) for key, values in request.query_params.lists())
+    version = ':'.join(f'{namespace}={versions[namespace]}' for namespace in sorted(versions))
+    raw_key = f'{request.path}:{query}:{version}'
+    return sha1(raw_key.encode()).hexdigest()
+
+
+class CacheVersionsMixin:
+    cache_namespaces: tuple[str, ...] = ()
+
+    def get_versions_lifetime(self) -> int | None:
+        """
+        Seconds after which responses change without any write, e.g. because they carry expiring signed urls.
+        The versions then include the start of the current period, so cached responses and validators expire with it.
+        """
+        return None
+
+    def get_cache_versions(self) -> dict[str, int]:
+        if not hasattr(self, '_cache_versions'):
+            versions = get_cache_versions(self.cache_namespaces)
+            lifetime = self.get_versions_lifetime()
+            if lifetime:
+                period = lifetime * 1_000_000_000
+                versions[CACHE_VERSION_PERIOD] = time.time_ns() // period * period
+            self._cache_versions = versions
+        return self._cache_versions
+
+
+class VersionedCacheMixin(CacheVersionsMixin):
+    """
+    Caches successful GET responses of public read endpoints, keyed by path, normalized query string
+    and the versions of `cache_namespaces`. Writes bump the versions, so stale entries are never read again
+    and simply expire.
+    """
+    cache_timeout = 60 * 10
+
+    def get(self, request, *args, **kwargs):
+        key = f'{RESPONSE_CACHE_KEY_PREFIX}:{build_response_cache_key(request, self.get_cache_versions())}'
+        cached = cache.get(key)
+        if cached is not None:
+            return Response(data=cached['data'], status=cached['status'])
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, {'data': response.data, 'status': response.status_code}, self.cache_timeout)
+        return response
+
+
+class ConditionalGetMixin(CacheVersionsMixin):
+    """
+    Adds `ETag`/`Last-Modified` validators derived from the versions of `cache_namespaces` and answers
+    a matching `If-None-Match` with a 304 before anything is queried or serialized.
+
+    `Cache-Control` and `Vary` are opt-in, e.g. `cache_control = {'public': True, 'max_age': 30}`.
+    """
+    cache_control: dict | None = None
+    vary_headers: tuple[str, ...] = ()
+
+    def get_etag(self, request) -> str:
+        return f'"{build_response_cache_key(request, self.get_cache_versions())}"'
+
+    def get_last_modified(self) -> int:
+        return max(self.get_cache_versions().values(), default=0) // 1_000_000_000
+
+    def is_not_modified(self, request, etag: str) -> bool:
+        # `If-Modified-Since` is not answered, a second is too coarse for writes made in the same second.
+        return etag in parse_etags(request.headers.get('If-None-Match', ''))
+
+    def matches_any(self, request) -> bool:
+        # `*` matches any current representation, so it is only answered once the object turned out to exist.
+        return '*' in parse_etags(request.headers.get('If-None-Match', ''))
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_etag(request), self.get_last_modified()
+        if self.is_not_modified(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK and self.matches_any(request):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response.headers['ETag'] = etag
+            if last_modified:
+                response.headers['Last-Modified'] = http_date(last_modified)
+            if self.cache_control:
+                patch_cache_control(response, **self.cache_control)
+            if self.vary_headers:
+                patch_vary_headers(response, self.vary_headers)
+        return response
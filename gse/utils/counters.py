@@ -0,0 +1,87 @@
+from hashlib import sha1
+
+from django.core.cache import cache
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class ExactCount:
+    """Runs an exact `COUNT(*)` over the filtered queryset."""
+
+    def count(self, queryset, request=None, view=None) -> int:
+        return queryset.count()
+
+
+class CachedCount(ExactCount):
+    """
+    Caches exact counts for a short time, keyed by the list path, the requesting user
+    and the normalized filter parameters (pagination parameters are ignored).
+    """
+    ignored_params = ('page', 'limit', 'cursor', 'pagination')
+
+    def __init__(self, timeout: int = 60, key_prefix: str = 'list-count'):
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+
+    def get_cache_key(self, queryset, request) -> str:
+        params = sorted(
+            (key, tuple(sorted(values)))
+            for key, values in request.query_params.lists()
+            if key not in self.ignored_params
+        )
+        user_id = request.user.id if request.user.is_authenticated else None
+        raw_key = f'{queryset.model._meta.label}:{request.path}:{user_id}:{params}'
+        return f'{self.key_prefix}:{sha1(raw_key.encode()).hexdigest()}'
+
+    def count(self, queryset, request=None, view=None) -> int:
+        if request is None:
+            return super().count(queryset)
+        return cache.get_or_set(
+            self.get_cache_key(queryset, request),
+            lambda: super(CachedCount, self).count(queryset),
+            self.timeout
+        )
+
+
+class EstimatedCount(ExactCount):
+    """
+    Uses the PostgreSQL planner statistics (`pg_class.reltuples`) for unfiltered querysets of large tables.
+    Filtered querysets, small tables and other databases fall back to `fallback`.
+    """
+
+    def __init__(self, threshold: int = 100_000, fallback: ExactCount | None = None):
+        self.threshold = threshold
+        self.fallback = fallback or ExactCount()
+
+    def estimate(self, queryset) -> int | None:
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql' or queryset.query.where:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def count(self, queryset, request=None, view=None) -> int:
+        estimate = self.estimate(queryset)
+        if estimate is None or estimate < self.threshold:
+            return self.fallback.count(queryset, request, view)
+        return estimate
+
+
+class StrategyPaginator(DjangoPaginator):
+    """Django paginator that delegates `count` to a count strategy."""
+
+    def __init__(self, *args, count_strategy: ExactCount = None, request=None, view=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_strategy = count_strategy or ExactCount()
+        self.request = request
+        self.view = view
+
+    @cached_property
+    def count(self):
+        return self.count_strategy.count(self.object_list, self.request, self.view)
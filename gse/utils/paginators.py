@@ -1,15 +1,211 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import partial
 from urllib.parse import urlencode
 
+from django.core.exceptions import FieldDoesNotExist, FieldError, ValidationError
+from django.db.models import F, Field, OrderBy, Q
+from rest_framework.exceptions import NotFound, ParseError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
+from .counters import ExactCount, StrategyPaginator
+
+PAGINATION_MODE_PAGE = 'page'
+PAGINATION_MODE_CURSOR = 'cursor'
+
 
 class NeatPagination(PageNumberPagination):
+    """
+    Page number pagination with an opt-in keyset (cursor) mode.
+
+    The cursor mode is enabled by setting `pagination_mode = 'cursor'` on a view or by sending
+    `?pagination=cursor` or a `cursor` query parameter. It seeks on the queryset ordering
+    (plus `id` as a tie-breaker) instead of counting and offsetting, and returns the same envelope
+    with `current_page`, `items_count`, `pages_count` and `last` set to null.
+
+    In page mode the `items_count` is computed by the `count_strategy` of the view
+    (see `gse.utils.counters`), which defaults to an exact count.
+    """
     page_size = 10
     max_page_size = 20
     page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    pagination_mode_query_param = 'pagination'
+    invalid_cursor_message = 'نشانگر صفحه نامعتبر است.'
+    unsupported_ordering_message = 'این ترتیب در صفحه بندی با نشانگر پشتیبانی نمیشود.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.mode = self.get_pagination_mode(request, view)
+        if self.mode == PAGINATION_MODE_CURSOR:
+            return self.paginate_queryset_by_cursor(queryset, request, view)
+
+        self.django_paginator_class = partial(
+            StrategyPaginator,
+            count_strategy=getattr(view, 'count_strategy', None) or ExactCount(),
+            request=request,
+            view=view,
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_pagination_mode(self, request, view) -> str:
+        if self.cursor_query_param in request.query_params:
+            return PAGINATION_MODE_CURSOR
+        requested_mode = request.query_params.get(self.pagination_mode_query_param)
+        if requested_mode in (PAGINATION_MODE_PAGE, PAGINATION_MODE_CURSOR):
+            return requested_mode
+        return getattr(view, 'pagination_mode', PAGINATION_MODE_PAGE)
+
+    def get_cursor_ordering(self, queryset, view) -> list[str]:
+        pk_name = queryset.model._meta.pk.name
+        ordering = []
+        for field in (
+                getattr(view, 'cursor_ordering', None)
+                or queryset.query.order_by
+                or queryset.model._meta.ordering
+                or ['-id']
+        ):
+            if isinstance(field, OrderBy) and isinstance(field.expression, F):
+                field = f'-{field.expression.name}' if field.descending else field.expression.name
+            if not isinstance(field, str):
+                raise ParseError(self.unsupported_ordering_message)
+            if field.lstrip('-') == 'pk':
+                field = f'{field[:-2]}{pk_name}'
+            ordering.append(field)
+        if not any(field.lstrip('-') == pk_name for field in ordering):
+            ordering.append(f'-{pk_name}' if ordering[-1].startswith('-') else pk_name)
+        return ordering
+
+    def get_ordering_field(self, queryset, name: str) -> Field:
+        """
+        Returns the field a position value of `name` is parsed with. Only non null model fields and annotations
+        of a known type can be sought on, related lookups (`a__b`) and expressions are rejected.
+        """
+        field = None
+        if name in queryset.query.annotations:
+            try:
+                field = queryset.query.annotations[name].output_field
+            except (AttributeError, FieldError):
+                pass
+            # e.g. `RawSQL` without an output field, values of an unknown type can not be parsed.
+            if type(field) is Field:
+                field = None
+        else:
+            try:
+                field = queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                pass
+            if field is not None and (field.is_relation or not field.concrete):
+                field = None
+        if field is None or field.null:
+            raise ParseError(self.unsupported_ordering_message)
+        return field
+
+    def paginate_queryset_by_cursor(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.ordering = self.get_cursor_ordering(queryset, view)
+        self.ordering_fields = [self.get_ordering_field(queryset, field.lstrip('-')) for field in self.ordering]
+        position, reverse = self.decode_cursor(request)
+
+        ordering = [self.flip_ordering(field) for field in self.ordering] if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.build_seek_filter(ordering, position))
+
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+        if reverse:
+            results.reverse()
+
+        self.has_previous = has_more if reverse else position is not None
+        self.has_next = True if reverse else has_more
+        self.first_position = self.get_position(results[0]) if results else None
+        self.last_position = self.get_position(results[-1]) if results else None
+        return results
+
+    @staticmethod
+    def flip_ordering(field: str) -> str:
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def build_seek_filter(ordering: list[str], position: list) -> Q:
+        """
+        Builds `(a, b, c) > (x, y, z)` style filters that respect the direction of each ordering field.
+        """
+        seek_filter = Q()
+        equal_filter = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            seek_filter |= equal_filter & Q(**{f'{name}__{lookup}': value})
+            equal_filter &= Q(**{name: value})
+        return seek_filter
+
+    def get_position(self, instance) -> list:
+        position = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip('-'))
+            position.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+        return position
+
+    def decode_cursor(self, request) -> tuple[list | None, bool]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode()).decode())
+            position, reverse = cursor['p'], bool(cursor['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            position = [field.to_python(value) for field, value in zip(self.ordering_fields, position)]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if any(value is None for value in position):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def build_cursor_link(self, position: list | None, reverse: bool = False):
+        url = self.request.build_absolute_uri(self.request.path)
+        query_params = self.request.GET.copy()
+        query_params.pop(self.page_query_param, None)
+        query_params[self.pagination_mode_query_param] = PAGINATION_MODE_CURSOR
+        if position is None:
+            query_params.pop(self.cursor_query_param, None)
+        else:
+            cursor = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+            query_params[self.cursor_query_param] = urlsafe_b64encode(cursor.encode()).decode()
+        return f'{url}?{urlencode(query_params)}'
+
+    def get_cursor_paginated_response(self, data):
+        return Response({
+            'pagination': {
+                'current_page': None,
+                'items_count': None,
+                'pages_count': None,
+                'previous_page': self.build_cursor_link(self.first_position, reverse=True)
+                if self.has_previous and self.first_position else None,
+                'next_page': self.build_cursor_link(self.last_position)
+                if self.has_next and self.last_position else None,
+                'has_previous': self.has_previous,
+                'has_next': self.has_next,
+                'first': self.build_cursor_link(None) if self.has_previous else None,
+                'last': None
+            },
+            'data': data
+        })
 
     def get_paginated_response(self, data):
+        if self.mode == PAGINATION_MODE_CURSOR:
+            return self.get_cursor_paginated_response(data)
+
         current_page = self.page.number
         paginator = self.page.paginator
 
@@ -35,6 +231,7 @@ class NeatPagination(PageNumberPagination):
             'properties': {
                 'current_page': {
                     'type': 'integer',
+                    'nullable': True,
                     'example': 3,
                 },
                 'items_count': {
@@ -44,6 +241,7 @@ class NeatPagination(PageNumberPagination):
                 },
                 'pages_count': {
                     'type': 'integer',
+                    'nullable': True,
                     'example': 4,
                 },
                 'previous_page': {
@@ -76,7 +274,7 @@ class NeatPagination(PageNumberPagination):
                 },
                 'last': {
                     'type': 'string',
-                    'nullable': False,
+                    'nullable': True,
                     'format': False,
                     'example': 'http://127.0.0.1:8000/users/?page=23'
                 },
@@ -84,6 +282,26 @@ class NeatPagination(PageNumberPagination):
             },
         }
 
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters += [
+            {
+                'name': self.pagination_mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Pagination mode, `page` (default) or `cursor`.',
+                'schema': {'type': 'string', 'enum': [PAGINATION_MODE_PAGE, PAGINATION_MODE_CURSOR]},
+            },
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Opaque cursor taken from the `next_page`/`previous_page` links.',
+                'schema': {'type': 'string'},
+            },
+        ]
+        return parameters
+
     def get_first_link(self):
         if self.page.number == 1:
             return None
@@ -0,0 +1,20 @@
+import threading
+
+import redis
+from django.conf import settings
+
+_redis_client = None
+_redis_client_lock = threading.Lock()
+
+
+def get_redis_client() -> redis.Redis:
+    """
+    Returns the redis client of the process for the queues kept outside the cache, built on first use
+    from `REDIS_LOCATION`. Its connection pool is thread-safe and shared by every caller.
+    """
+    global _redis_client
+    if _redis_client is None:
+        with _redis_client_lock:
+            if _redis_client is None:
+                _redis_client = redis.Redis.from_url(settings.REDIS_LOCATION, decode_responses=True)
+    return _redis_client
@@ -0,0 +1,59 @@
+import threading
+
+import boto3
+from botocore.config import Config
+from django.conf import settings
+from storages.backends.s3 import S3Storage
+
+_s3_resource = None
+_s3_resource_lock = threading.Lock()
+
+
+def build_s3_config() -> Config:
+    return Config(
+        max_pool_connections=settings.AWS_S3_MAX_POOL_CONNECTIONS,
+        connect_timeout=settings.AWS_S3_CONNECT_TIMEOUT,
+        read_timeout=settings.AWS_S3_READ_TIMEOUT,
+        retries={'mode': 'adaptive', 'max_attempts': settings.AWS_S3_MAX_ATTEMPTS},
+    )
+
+
+def get_s3_resource():
+    """
+    Returns the s3 resource of the process, built on first use. Its client (`.meta.client`) is thread-safe
+    and holds the single connection pool used by `Bucket` and the default storage.
+    """
+    global _s3_resource
+    if _s3_resource is None:
+        with _s3_resource_lock:
+            if _s3_resource is None:
+                session = boto3.session.Session(
+                    aws_access_key_id=settings.AWS_S3_ACCESS_KEY_ID,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                )
+                _s3_resource = session.resource(
+                    service_name=settings.AWS_SERVICE_NAME,
+                    endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+                    region_name=getattr(settings, 'AWS_S3_REGION_NAME', None),
+                    config=build_s3_config(),
+                )
+    return _s3_resource
+
+
+def get_s3_client():
+    return get_s3_resource().meta.client
+
+
+class SharedS3Storage(S3Storage):
+    """
+    `S3Storage` whose per-thread resources wrap the shared client of `get_s3_resource`
+    instead of building a session and a connection pool per thread.
+    """
+
+    @property
+    def connection(self):
+        connection = getattr(self._connections, 'connection', None)
+        if connection is None:
+            resource = get_s3_resource()
+            self._connections.connection = type(resource)(client=resource.meta.client)
+        return self._connections.connection
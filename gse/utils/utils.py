@@ -1,3 +1,4 @@
+import threading
 from typing import Type
 
 from django.db import models
@@ -7,10 +8,13 @@ from rest_framework.response import Response
 
 class Singleton(type):
     _instance = None
+    _lock = threading.Lock()
 
     def __call__(cls, *args, **kwargs):
         if cls._instance is None:
-            cls._instance = super().__call__(*args, **kwargs)
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__call__(*args, **kwargs)
         return cls._instance
 
 
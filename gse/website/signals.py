@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from gse.utils.caching import bump_cache_version, CACHE_NAMESPACE_WEBSITE
+from .models import Website
+
+
+@receiver([post_save, post_delete], sender=Website)
+def bump_website_cache_version(sender, **kwargs):
+    bump_cache_version(CACHE_NAMESPACE_WEBSITE)
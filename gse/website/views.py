@@ -5,6 +5,7 @@ from rest_framework.generics import GenericAPIView, ListAPIView, DestroyAPIView
 from rest_framework.response import Response
 
 from gse.utils import format_errors
+from gse.utils.caching import ConditionalGetMixin, VersionedCacheMixin, CACHE_NAMESPACE_WEBSITE
 from gse.utils.doc_serializers import ResponseSerializer
 from gse.utils.permissions import IsAdminOrSupporter
 from .models import Website
@@ -36,12 +37,14 @@ class WebsiteAttributeCreateAPI(GenericAPIView):
 
 
 @extend_schema(tags=['Website'])
-class WebSiteAttributeListAPI(ListAPIView):
+class WebSiteAttributeListAPI(ConditionalGetMixin, VersionedCacheMixin, ListAPIView):
     """
     API for listing website attributes.
     """
     serializer_class = WebsiteSerializer
     queryset = get_all_attributes()
+    cache_namespaces = (CACHE_NAMESPACE_WEBSITE,)
+    cache_control = {'public': True, 'max_age': 300}
 
 
 @extend_schema(tags=['Website'])